@@ -0,0 +1,29 @@
+import os
+from typing import Annotated
+
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from llmops_api.base.db.engine import Database
+from llmops_api.base.redis.pool import Redis
+from llmops_api.depends.auth import get_current_user_id
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(get_current_user_id)])
+
+
+@router.get(
+    "",
+    response_class=PlainTextResponse,
+    description="Prometheus格式的数据库和Redis连接池指标",
+)
+@inject
+async def metrics(
+    db: Annotated[Database, Depends(Provide["db"])],
+    redis: Annotated[Redis, Depends(Provide["redis"])],
+):
+    # 指标按进程统计，多worker部署时以worker标签区分各进程的序列，查询时按worker聚合
+    labels = {"worker": os.getpid()}
+    lines = db.render_metrics(labels)
+    lines.extend(redis.metrics().render(labels))
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
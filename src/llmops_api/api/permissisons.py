@@ -1,7 +1,7 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, Header, Path, Query, Response, status
 
 from llmops_api.base.db.repo import Paginator
 from llmops_api.base.response.base_response import BaseResponse, Empty
@@ -11,12 +11,14 @@ from llmops_api.depends.auth import get_current_user_id
 from llmops_api.form.permissions import (
     AddRoleActionForm,
     AddUserRoleForm,
+    BatchPermissionsForm,
     DeleteRoleActionForm,
     DeleteUserRoleForm,
 )
 from llmops_api.service.permissions import PermissionsService
+from llmops_api.util.etag import etag_matches
 from llmops_api.view.action import ActionViewModel
-from llmops_api.view.permissions import PermissionViewModel
+from llmops_api.view.permissions import BatchPermissionsViewModel, PermissionViewModel
 from llmops_api.view.role import RoleViewModel
 from llmops_api.view.user import UserViewModel
 
@@ -175,8 +177,37 @@ async def get_user_permissions(
         PermissionsService, Depends(Provide["permissions_module.permissions_service"])
     ],
     user_id: Annotated[int, Path(description="用户ID")],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
-    user_permissions = await permissions_service.get_user_permissions(user_id)
+    version = await permissions_service.get_user_permissions_version()
+    etag = f'"{user_id}-{version}"'
+
+    # 权限树未变更时直接返回304，不再构建权限树
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    user_permissions = await permissions_service.get_user_permissions(user_id, version)
+    response.headers["ETag"] = etag
     return BaseResponse[ListViewModel[PermissionViewModel]](
         data=user_permissions, code=SUCCESS_CODE, msg="获取用户权限成功"
     )
+
+
+@router.post(
+    "/batch",
+    dependencies=[Depends(get_current_user_id)],
+    description="批量校验用户权限、获取用户权限树和角色权限",
+    response_model=BaseResponse[BatchPermissionsViewModel],
+)
+@inject
+async def batch_permissions(
+    permissions_service: Annotated[
+        PermissionsService, Depends(Provide["permissions_module.permissions_service"])
+    ],
+    batch_permissions_form: BatchPermissionsForm,
+):
+    batch_result = await permissions_service.batch_permissions(batch_permissions_form)
+    return BaseResponse[BatchPermissionsViewModel](
+        data=batch_result, code=SUCCESS_CODE, msg="批量获取权限成功"
+    )
@@ -0,0 +1,103 @@
+import asyncio
+from contextlib import AbstractAsyncContextManager
+from typing import Any, Callable, List, Optional
+from uuid import uuid4
+
+from loguru._logger import Logger
+from pydantic import BaseModel, Field
+from redis.asyncio import Redis
+
+from llmops_api.base.cache.ttl_cache import TTLCache
+
+
+class InvalidateMessage(BaseModel):
+    local_id: str = Field(default="")
+    keys: List[str] = Field(default_factory=list)
+
+
+class RedisSyncedCache:
+    """
+    进程内缓存，通过redis发布订阅在多个worker之间同步失效
+    """
+
+    def __init__(
+        self,
+        publish_client_factory: Callable[..., AbstractAsyncContextManager[Redis]],
+        logger: Logger,
+        channel: str,
+        maxsize: int,
+        ttl: float,
+        subscribe_timeout: int = 2,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        self.local_id = str(uuid4())
+        self.publish_client_factory = publish_client_factory
+        self.channel = channel
+        self.stop_subscribe = False
+        self.subscribe_timeout = subscribe_timeout
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self.logger = logger
+        self.cache: TTLCache[str, Any] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def init_subscribe_client(self):
+        async with self.publish_client_factory() as client:
+            self.subscribe_client = client.pubsub()
+
+    async def subscribe(self):
+        await self.subscribe_client.subscribe(f"channel:{self.channel}")
+
+        while not self.stop_subscribe:
+            try:
+                message = await self.subscribe_client.get_message(
+                    ignore_subscribe_messages=True, timeout=self.subscribe_timeout
+                )
+                if message is not None:
+                    msg = InvalidateMessage.model_validate_json(message["data"])
+                    if msg.local_id != self.local_id:
+                        for key in msg.keys:
+                            self.cache.delete(key)
+            except Exception as e:
+                self.logger.opt(exception=e).error("occured an error when watch cache invalidation")
+                # 无法确认漏掉了哪些失效消息，直接清空本地缓存
+                self.cache.clear()
+                continue
+        await self.subscribe_client.aclose()
+
+    def stop_subscribe_msg(self):
+        self.stop_subscribe = True
+
+    def get(self, key: str) -> Any:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.cache.set(key, value, ttl)
+
+    async def invalidate(self, *keys: str):
+        """使本地及其他worker中的缓存项失效"""
+        for key in keys:
+            self.cache.delete(key)
+
+        msg = InvalidateMessage(local_id=self.local_id, keys=list(keys))
+        async with self.publish_client_factory() as client:
+            return await client.publish(f"channel:{self.channel}", msg.model_dump_json())
+
+
+async def new_synced_cache(
+    publish_client_factory: Callable[..., AbstractAsyncContextManager[Redis]],
+    logger: Logger,
+    channel: str,
+    maxsize: int,
+    ttl: float,
+    subscribe_timeout: int = 2,
+) -> RedisSyncedCache:
+    synced_cache = RedisSyncedCache(
+        publish_client_factory,
+        logger,
+        channel=channel,
+        maxsize=maxsize,
+        ttl=ttl,
+        subscribe_timeout=subscribe_timeout,
+    )
+    await synced_cache.init_subscribe_client()
+    synced_cache.loop.create_task(synced_cache.subscribe())
+    return synced_cache
@@ -0,0 +1,68 @@
+from contextlib import AbstractAsyncContextManager
+from typing import Callable, Generic, Optional, TypeVar
+
+from loguru._logger import Logger
+from redis.asyncio import Redis
+
+from llmops_api.base.cache.ttl_cache import TTLCache
+
+VT = TypeVar("VT")
+
+
+class VersionedCache(Generic[VT]):
+    """
+    进程内 + redis两级缓存，附带一个redis中的全局版本号
+
+    调用方将版本号拼入缓存键，数据变更后递增版本号即可让所有worker的旧缓存失效，
+    旧版本的缓存项由ttl自然淘汰
+    """
+
+    def __init__(
+        self,
+        redis_client_factory: Callable[..., AbstractAsyncContextManager[Redis]],
+        logger: Logger,
+        name: str,
+        dumps: Callable[[VT], str | bytes],
+        loads: Callable[[bytes], VT],
+        maxsize: int,
+        ttl: int,
+    ):
+        self.redis_client_factory = redis_client_factory
+        self.logger = logger
+        self.name = name
+        self.version_key = f"{name}:version"
+        self.dumps = dumps
+        self.loads = loads
+        self.ttl = ttl
+        self.cache: TTLCache[str, VT] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _get_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def fetch_version(self) -> int:
+        async with self.redis_client_factory() as client:
+            version = await client.get(self.version_key)
+        return 0 if version is None else int(version)
+
+    async def bump_version(self) -> int:
+        async with self.redis_client_factory() as client:
+            return await client.incr(self.version_key)
+
+    async def get(self, key: str) -> Optional[VT]:
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+
+        async with self.redis_client_factory() as client:
+            payload = await client.get(self._get_key(key))
+        if payload is None:
+            return None
+
+        value = self.loads(payload)
+        self.cache.set(key, value)
+        return value
+
+    async def set(self, key: str, value: VT) -> None:
+        self.cache.set(key, value)
+        async with self.redis_client_factory() as client:
+            await client.set(self._get_key(key), self.dumps(value), ex=self.ttl)
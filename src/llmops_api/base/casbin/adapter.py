@@ -1,7 +1,7 @@
+import asyncio
 from contextlib import AbstractAsyncContextManager
-from typing import Any, Callable, List, Tuple, cast
+from typing import Any, AsyncIterator, Callable, Iterable, List, Optional, Tuple, TypeVar, cast
 
-from casbin import persist
 from casbin.model import Model
 from casbin.persist.adapters.asyncio import AsyncAdapter
 from pydantic import BaseModel, Field
@@ -10,6 +10,39 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from llmops_api.base.db.model import CasbinRule
 
+_T = TypeVar("_T", bound=Tuple[Any, ...])
+
+RULE_COLUMNS = (
+    CasbinRule.ptype,
+    CasbinRule.v0,
+    CasbinRule.v1,
+    CasbinRule.v2,
+    CasbinRule.v3,
+    CasbinRule.v4,
+    CasbinRule.v5,
+)
+
+
+def to_rule(values: Iterable[Optional[str]]) -> List[str]:
+    """v0..v5列转为策略规则，遇到第一个空值截止"""
+    rule: List[str] = []
+    for v in values:
+        if v is None:
+            break
+        rule.append(v)
+    return rule
+
+
+def add_rules_to_model(model: Model, rules: Iterable[Tuple[str, List[str]]]) -> None:
+    """将策略直接追加到模型中
+
+    与persist.load_policy_line一致不做查重，避免model.add_policy逐条在列表中查重的O(n)开销
+    """
+    for ptype, rule in rules:
+        sec = ptype[0]
+        if sec in model.model.keys() and ptype in model.model[sec].keys():
+            model.model[sec][ptype].policy.append(rule)
+
 
 class Filter(BaseModel):
     ptype: str | List[str] = Field(default="")
@@ -25,31 +58,51 @@ class CasbinAdapter(AsyncAdapter):
     def __init__(
         self,
         transaction_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        load_batch_size: int = 1000,
     ):
         self.transaction_factory = transaction_factory
+        self.load_batch_size = load_batch_size
 
     def is_filtered(self) -> bool:
         return True
 
     async def load_policy(self, model: Model) -> None:
         """loads all policy rules from the storage."""
+        async for rules in self.stream_policy_rules():
+            add_rules_to_model(model, rules)
+
+    async def load_policy_rules(self) -> List[Tuple[str, List[str]]]:
+        """loads all policy rules from the storage as (ptype, rule) tuples."""
+        rules: List[Tuple[str, List[str]]] = []
+        async for batch in self.stream_policy_rules():
+            rules.extend(batch)
+        return rules
+
+    async def stream_policy_rules(
+        self, filter: Any = None
+    ) -> AsyncIterator[List[Tuple[str, List[str]]]]:
+        """分批流式读取策略，每批为(ptype, rule)列表
+
+        只查询原始列，不构建ORM对象，每批之间让出事件循环，避免大量策略加载时阻塞其他请求
+        """
+        stmt = select(*RULE_COLUMNS)
+        if filter is not None:
+            stmt = self.filter_query(stmt, filter)
+        else:
+            stmt = stmt.order_by(CasbinRule.id)
+
         async with self.transaction_factory() as session:
-            lines = await session.scalars(select(CasbinRule))
-            for line in lines:
-                persist.load_policy_line(str(line), model)
+            result = await session.stream(stmt.execution_options(yield_per=self.load_batch_size))
+            async for rows in result.partitions():
+                yield [(ptype, to_rule(values)) for ptype, *values in rows]
+                await asyncio.sleep(0)
 
     async def load_filtered_policy(self, model: Model, filter: Any) -> None:
         """loads all policy rules from the storage."""
-        async with self.transaction_factory() as session:
-            stmt = select(CasbinRule)
-            stmt = self.filter_query(stmt, filter)
-            result = await session.scalars(stmt)
-            for line in result:
-                persist.load_policy_line(str(line), model)
+        async for rules in self.stream_policy_rules(filter):
+            add_rules_to_model(model, rules)
 
-    def filter_query(
-        self, stmt: Select[Tuple[CasbinRule]], filter: Any
-    ) -> Select[Tuple[CasbinRule]]:
+    def filter_query(self, stmt: Select[_T], filter: Any) -> Select[_T]:
         for attr in ("ptype", "v0", "v1", "v2", "v3", "v4", "v5"):
             if attr == "ptype" and isinstance(getattr(filter, attr), str):
                 stmt = stmt.where(getattr(CasbinRule, attr) == getattr(filter, attr))
@@ -1,62 +1,527 @@
+import asyncio
 import os
+from typing import Awaitable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, cast
 
 import casbin
+from casbin.model import Model
+from casbin.model.policy_op import PolicyOp
+from casbin.rbac import default_role_manager
 from loguru._logger import Logger
 
-from llmops_api.base.casbin.adapter import CasbinAdapter
+from llmops_api.base.casbin.adapter import CasbinAdapter, add_rules_to_model
+from llmops_api.base.casbin.snapshot import PolicySnapshot
 from llmops_api.base.casbin.watcher import Message, RedisCasbinWatcher
 
+Permission = Tuple[str, str]
 
-async def new_casbin_enforcer(adapter: CasbinAdapter, watcher: RedisCasbinWatcher, logger: Logger):
-    casbin_enforcer = CasbinEnforcer(adapter, watcher, logger)
+# 等待其他worker写入策略快照时轮询快照版本号的间隔(秒)
+SNAPSHOT_POLL_INTERVAL = 0.2
+
+
+async def new_casbin_enforcer(
+    adapter: CasbinAdapter,
+    watcher: RedisCasbinWatcher,
+    logger: Logger,
+    snapshot_wait_timeout: float = 30,
+    snapshot_rewrite_deltas: int = 500,
+):
+    casbin_enforcer = CasbinEnforcer(
+        adapter, watcher, logger, snapshot_wait_timeout, snapshot_rewrite_deltas
+    )
     await casbin_enforcer.init()
     return casbin_enforcer
 
 
 class CasbinEnforcer:
-    def __init__(self, adapter: CasbinAdapter, watcher: RedisCasbinWatcher, logger: Logger):
-        self.enforcer = casbin.AsyncEnforcer(os.path.join(os.getcwd(), "rbac_model.conf"), adapter)
+    def __init__(
+        self,
+        adapter: CasbinAdapter,
+        watcher: RedisCasbinWatcher,
+        logger: Logger,
+        snapshot_wait_timeout: float = 30,
+        snapshot_rewrite_deltas: int = 500,
+    ):
+        self.model_path = os.path.join(os.getcwd(), "rbac_model.conf")
+        self.enforcer = casbin.AsyncEnforcer(self.model_path, adapter)
+        # 变更消息由增删方法在持久化之后发出，见_commit_local_change
+        self.enforcer.enable_auto_notify_watcher(False)
+        self.adapter = adapter
         self.watcher = watcher
         self.logger = logger
+        # 已应用到本地模型的策略版本号
+        self.policy_version = 0
+        # 等待其他worker写入策略快照的最长时间(秒)
+        self.snapshot_wait_timeout = snapshot_wait_timeout
+        # 本地版本领先快照这么多个变更后重写快照，新启动的worker需要重放的变更不超过该数量，
+        # 应小于watcher保留的变更日志条数
+        self.snapshot_rewrite_deltas = snapshot_rewrite_deltas
+        # 已知的最新快照版本号
+        self.snapshot_version = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        # 本地增删策略的次数，以及已修改本地模型、尚未持久化的增删数
+        self._mutation_generation = 0
+        self._pending_mutations = 0
+        self._mutations_committed = asyncio.Event()
+        self._mutations_committed.set()
+
+        # 主体(用户/角色) -> 直接授予的 (path, method) 集合
+        self._policy_index: Dict[str, Set[Permission]] = {}
+        # 主体 -> 隐式权限集合（包含继承自角色的权限），按需构建
+        self._permission_index: Dict[str, FrozenSet[Permission]] = {}
+        # 主体 -> 隐式角色集合，用于策略变更时定位受影响的主体
+        self._role_index: Dict[str, FrozenSet[str]] = {}
 
     async def init(self):
         self.watcher_id = self.watcher.local_id
         await self.watcher.set_update_callback(self._watcher_callback)
         self.enforcer.set_watcher(self.watcher)
-        await self.enforcer.load_policy()
+        # 加载期间收到的变更消息等待加载完成后再处理
+        async with self.watcher.mutex:
+            await self._load_policy_on_startup()
+
+    async def _load_policy_on_startup(self):
+        """优先从策略快照启动
+
+        快照不存在或已无法追平时，只由获得锁的worker从数据库加载策略并写入新快照，
+        其余worker只轮询快照版本号，等新快照写入后再读取一次快照，
+        部署时数据库和redis的负载与worker数量无关
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.snapshot_wait_timeout
+
+        seen = await self.watcher.fetch_snapshot_version()
+        while True:
+            if seen is not None and await self._load_snapshot():
+                return
+            if await self.watcher.acquire_snapshot_lock(self.snapshot_wait_timeout):
+                break
+
+            seen = await self._wait_snapshot(seen, deadline)
+            if seen is None:
+                self.logger.warning("wait for policy snapshot timeout, load from storage")
+                await self._reload_policy()
+                return
+
+        try:
+            await self._reload_policy(save_snapshot=True)
+        finally:
+            await self.watcher.release_snapshot_lock()
+
+    async def _wait_snapshot(self, seen: Optional[int], deadline: float) -> Optional[int]:
+        """等待版本号不同于seen的快照写入，返回新快照的版本号，超时返回None"""
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            await asyncio.sleep(SNAPSHOT_POLL_INTERVAL)
+            version = await self.watcher.fetch_snapshot_version()
+            if version is not None and version != seen:
+                return version
+        return None
+
+    @staticmethod
+    def _build_model(
+        model_path: str, rules: List[Tuple[str, List[str]]]
+    ) -> Tuple[Model, Dict[str, default_role_manager.RoleManager]]:
+        model = casbin.Enforcer.new_model(model_path)
+
+        add_rules_to_model(model, rules)
+        model.sort_policies_by_subject_hierarchy()
+        model.sort_policies_by_priority()
+
+        rm_map = {ptype: default_role_manager.RoleManager(10) for ptype in model.model["g"].keys()}
+        model.build_role_links(rm_map)
+        return model, rm_map
+
+    async def _apply_rules(self, rules: List[Tuple[str, List[str]]], version: int):
+        """用全量策略替换本地模型，模型与角色关系在线程中构建，不阻塞事件循环"""
+        model, rm_map = await asyncio.to_thread(self._build_model, self.model_path, rules)
+
+        self.enforcer.model = model
+        self.enforcer.rm_map = rm_map
+        self.policy_version = max(self.policy_version, version)
+        self._rebuild_index()
+
+    async def _reload_policy(self, save_snapshot: bool = False):
+        """
+        从数据库全量加载策略
+
+        加载期间本地有增删时，读到的策略可能不包含该增删，替换后本地模型会丢失这次修改，
+        此时等待本地增删持久化后重新加载
+        """
+        while True:
+            generation = self._mutation_generation
+            # 先读取版本号再读取策略，保证加载的策略至少包含该版本之前的所有变更
+            version = await self.watcher.fetch_version()
+            rules = await self.adapter.load_policy_rules()
+            await self._apply_rules(rules, version)
+            if generation == self._mutation_generation and self._pending_mutations == 0:
+                break
+
+            self.logger.info("local policy changed during reload, reload again")
+            await self._mutations_committed.wait()
+
+        self.logger.info(f"policy reloaded, rules:{len(rules)}, version:{self.policy_version}")
+
+        if save_snapshot:
+            await self._save_snapshot(PolicySnapshot(version, rules))
+
+    async def _save_snapshot(self, snapshot: PolicySnapshot):
+        payload = await asyncio.to_thread(snapshot.dumps)
+        await self.watcher.save_snapshot(snapshot.version, payload)
+        self.snapshot_version = max(self.snapshot_version, snapshot.version)
+        self.logger.info(f"policy snapshot saved, version:{snapshot.version}, size:{len(payload)}")
+
+    def _policy_rules(self) -> List[Tuple[str, List[str]]]:
+        """本地模型中的全量策略，与数据库加载的格式一致"""
+        return [
+            (ptype, list(rule))
+            for sec in ("p", "g")
+            for ptype, assertion in self.enforcer.model.model.get(sec, {}).items()
+            for rule in assertion.policy
+        ]
+
+    def _maybe_rewrite_snapshot(self):
+        """本地版本领先快照过多时在后台用本地模型重写快照，不访问数据库"""
+        if self.policy_version - self.snapshot_version < self.snapshot_rewrite_deltas:
+            return
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            return
+        # 同步复制策略，保证快照内容与版本号一致
+        snapshot = PolicySnapshot(self.policy_version, self._policy_rules())
+        self._snapshot_task = asyncio.create_task(self._rewrite_snapshot(snapshot))
+
+    async def _rewrite_snapshot(self, snapshot: PolicySnapshot):
+        # 其他worker已在重写时不重复写入，视为快照已追上
+        if not await self.watcher.acquire_snapshot_lock(self.snapshot_wait_timeout):
+            self.snapshot_version = max(self.snapshot_version, snapshot.version)
+            return
+        try:
+            await self._save_snapshot(snapshot)
+        except Exception as e:
+            self.logger.opt(exception=e).error("rewrite policy snapshot failed")
+        finally:
+            await self.watcher.release_snapshot_lock()
+
+    async def _load_snapshot(self) -> bool:
+        """从策略快照加载并应用之后的变更，快照不存在或变更日志已无法追平时返回False"""
+        payload = await self.watcher.fetch_snapshot()
+        if payload is None:
+            return False
+
+        snapshot = await asyncio.to_thread(PolicySnapshot.loads, payload)
+        version = await self.watcher.fetch_version()
+        messages = await self._fetch_deltas(snapshot.version, version)
+        if messages is None:
+            self.logger.info(
+                f"policy snapshot is stale, snapshot:{snapshot.version}, current:{version}"
+            )
+            return False
+
+        await self._apply_rules(snapshot.rules, snapshot.version)
+        self.snapshot_version = snapshot.version
+        for msg in messages:
+            self._apply_message(msg)
+            self.policy_version = msg.version
+
+        self.logger.info(
+            f"policy loaded from snapshot, rules:{len(snapshot.rules)}, "
+            f"snapshot:{snapshot.version}, version:{self.policy_version}"
+        )
+        return True
+
+    async def _fetch_deltas(self, from_version: int, to_version: int) -> Optional[List[Message]]:
+        """获取from_version之后到to_version的变更，变更日志不完整或包含全量更新时返回None"""
+        if to_version <= from_version:
+            return []
+
+        messages = await self.watcher.fetch_messages(from_version + 1, to_version)
+        expected = list(range(from_version + 1, to_version + 1))
+
+        if [msg.version for msg in messages] != expected:
+            return None
+        # 其他worker的全量更新无法增量应用，本worker发出的全量更新已作用于本地模型
+        if any(msg.method == "Update" and msg.local_id != self.watcher_id for msg in messages):
+            return None
+        return messages
+
+    async def _catch_up(self, version: int) -> bool:
+        """应用本地版本号到version之间的变更，变更日志不完整时返回False"""
+        messages = await self._fetch_deltas(self.policy_version, version)
+        if messages is None:
+            return False
+
+        for msg in messages:
+            self._apply_message(msg)
+            self.policy_version = msg.version
+        return True
+
+    async def sync_version(self) -> int:
+        """
+        读取redis中共享的策略版本号，本地落后时立即追平，返回该版本号
+
+        各worker应用变更消息的时机不同，对外暴露的版本号(如ETag)应使用共享版本号，
+        并保证本地策略不旧于该版本
+        """
+        version = await self.watcher.fetch_version()
+        if self.policy_version >= version:
+            return version
+
+        async with self.watcher.mutex:
+            if self.policy_version < version and not await self._catch_up(version):
+                await self._reload_policy()
+        return version
+
+    async def _commit_local_change(self, change: Awaitable[bool]) -> bool:
+        """
+        执行pycasbin的增删：先修改本地模型，再持久化到数据库
+
+        记录增删次数和未持久化的增删数，供_reload_policy判断加载的策略是否遗漏了本地修改；
+        变更消息发出时需要获取watcher.mutex，全量加载也持有该锁，所以消息在持久化之后、
+        不计入未持久化时由调用方发出，全量加载等待持久化时不会互相等待
+        """
+        self._mutation_generation += 1
+        self._pending_mutations += 1
+        self._mutations_committed.clear()
+        try:
+            return await change
+        finally:
+            self._pending_mutations -= 1
+            if self._pending_mutations == 0:
+                self._mutations_committed.set()
+
+    async def add_role_for_user(self, user: str, role: str) -> bool:
+        """为用户添加角色，本地权限索引随之同步更新，不依赖变更消息回环"""
+        rule = [user, role]
+        try:
+            added = await self._commit_local_change(self.enforcer.add_role_for_user(user, role))
+        finally:
+            # 模型可能已修改而持久化失败，索引始终与本地模型保持一致
+            self._update_index("g", "g", [rule], PolicyOp.Policy_add)
+        if added:
+            await self.watcher.update_for_add_policy("g", "g", rule)
+        return added
+
+    async def delete_role_for_user(self, user: str, role: str) -> bool:
+        rule = [user, role]
+        try:
+            removed = await self._commit_local_change(
+                self.enforcer.delete_role_for_user(user, role)
+            )
+        finally:
+            self._update_index("g", "g", [rule], PolicyOp.Policy_remove)
+        if removed:
+            await self.watcher.update_for_remove_policy("g", "g", rule)
+        return removed
+
+    async def add_permission_for_user(self, user: str, *permission: str) -> bool:
+        rule = [user, *permission]
+        try:
+            added = await self._commit_local_change(
+                self.enforcer.add_permission_for_user(user, *permission)
+            )
+        finally:
+            self._update_index("p", "p", [rule], PolicyOp.Policy_add)
+        if added:
+            await self.watcher.update_for_add_policy("p", "p", rule)
+        return added
+
+    async def delete_permission_for_user(self, user: str, *permission: str) -> bool:
+        rule = [user, *permission]
+        try:
+            removed = await self._commit_local_change(
+                self.enforcer.delete_permission_for_user(user, *permission)
+            )
+        finally:
+            self._update_index("p", "p", [rule], PolicyOp.Policy_remove)
+        if removed:
+            await self.watcher.update_for_remove_policy("p", "p", rule)
+        return removed
+
+    async def has_permission(self, sub: str, path: str, method: str) -> bool:
+        permissions = await self.get_permission_set(sub)
+        return (path, method) in permissions
+
+    async def get_permission_set(self, sub: str) -> FrozenSet[Permission]:
+        permissions = self._permission_index.get(sub)
+        if permissions is not None:
+            return permissions
+
+        return (await self.get_permission_sets([sub]))[sub]
+
+    async def get_permission_sets(self, subs: Iterable[str]) -> Dict[str, FrozenSet[Permission]]:
+        """批量获取多个主体的隐式权限集合，未缓存的主体共用一次角色图遍历"""
+        result: Dict[str, FrozenSet[Permission]] = {}
+        missing: List[str] = []
+        for sub in dict.fromkeys(subs):
+            permissions = self._permission_index.get(sub)
+            if permissions is not None:
+                result[sub] = permissions
+            else:
+                missing.append(sub)
+
+        for sub, roles in self._traverse_roles(missing).items():
+            permission_set: Set[Permission] = set(self._policy_index.get(sub, ()))
+            for role in roles:
+                permission_set.update(self._policy_index.get(role, ()))
+
+            permissions = frozenset(permission_set)
+            self._permission_index[sub] = permissions
+            self._role_index[sub] = roles
+            result[sub] = permissions
+        return result
+
+    def _traverse_roles(self, subs: Iterable[str]) -> Dict[str, FrozenSet[str]]:
+        """求出多个主体的隐式角色
+
+        遍历到已求出隐式角色的主体时直接合并其结果，不再展开，相同的角色子图只遍历一次
+        """
+        closures: Dict[str, FrozenSet[str]] = {}
+        for sub in subs:
+            roles: Set[str] = set()
+            queue = [sub]
+            while queue:
+                name = queue.pop()
+                for rm in self.enforcer.rm_map.values():
+                    for role in rm.get_roles(name):
+                        if role in roles:
+                            continue
+                        roles.add(role)
+
+                        known = closures.get(role)
+                        if known is not None:
+                            roles.update(known)
+                        else:
+                            queue.append(role)
+            closures[sub] = frozenset(roles)
+        return closures
+
+    def _rebuild_index(self):
+        self._policy_index = {}
+        for rule in self.enforcer.get_policy():
+            self._add_to_policy_index(rule)
+        self._permission_index = {}
+        self._role_index = {}
+
+    def _add_to_policy_index(self, rule: List[str]):
+        sub, path, method = rule[:3]
+        self._policy_index.setdefault(sub, set()).add((path, method))
+
+    def _remove_from_policy_index(self, rule: List[str]):
+        sub, path, method = rule[:3]
+        permissions = self._policy_index.get(sub)
+        if permissions is not None:
+            permissions.discard((path, method))
+            if len(permissions) == 0:
+                del self._policy_index[sub]
+
+    def _invalidate_subjects(self, subjects: Iterable[str]):
+        """使指定主体及继承了这些主体的主体的权限索引失效"""
+        subjects = set(subjects)
+        affected = [
+            sub
+            for sub, roles in self._role_index.items()
+            if sub in subjects or not roles.isdisjoint(subjects)
+        ]
+        for sub in affected:
+            self._permission_index.pop(sub, None)
+            self._role_index.pop(sub, None)
+
+    def _update_index(self, sec: str, ptype: str, rules: List[List[str]], op: PolicyOp):
+        if sec == "p":
+            for rule in rules:
+                if op == PolicyOp.Policy_add:
+                    self._add_to_policy_index(rule)
+                else:
+                    self._remove_from_policy_index(rule)
+        self._invalidate_subjects(rule[0] for rule in rules)
+
+    def _apply_role_links(self, sec: str, ptype: str, rules: List[List[str]], op: PolicyOp):
+        if sec == "g" and ptype in self.enforcer.rm_map:
+            self.enforcer.model.build_incremental_role_links(
+                self.enforcer.rm_map[ptype], op, sec, ptype, rules
+            )
 
     async def _watcher_callback(self, message: str):
         msg = Message.model_validate_json(message)
+        self.logger.info(f"{msg.method} callback msg recieved, msg:{message}")
+        await self._handle_message(msg)
+        self._maybe_rewrite_snapshot()
+
+    async def _handle_message(self, msg: Message):
+        is_remote = msg.local_id != self.watcher_id
 
-        if msg.method == "Update":
-            self.logger.info(f"Update callback msg recieved, msg:{message}")
-            if msg.local_id != self.watcher_id:
-                await self.enforcer.load_policy()
-        elif msg.method == "UpdateForAddPolicy":
-            self.logger.info(f"UpdateForAddPolicy callback msg recieved, msg:{message}")
-            if msg.local_id != self.watcher_id:
-                self.enforcer.model.add_policy(msg.sec, msg.ptype, msg.rules)
+        if msg.version == 0:
+            # 滚动发布期间旧版本worker发出的消息不带版本号，也不写入变更日志，只能全量加载
+            self.logger.info("unversioned policy msg recieved, reload policy")
+            await self._reload_policy()
+            return
+
+        if msg.version <= self.policy_version:
+            return
+
+        if msg.method == "Update" and is_remote:
+            await self._reload_policy()
+            return
+
+        if msg.version > self.policy_version + 1:
+            self.logger.warning(
+                f"policy version gap detected, local:{self.policy_version}, remote:{msg.version}"
+            )
+            if not await self._catch_up(msg.version - 1):
+                await self._reload_policy()
+                return
+
+        # 本地发出的Update消息对应的变更已作用于本地模型，只需更新版本号
+        self._apply_message(msg)
+        self.policy_version = msg.version
+
+    def _apply_message(self, msg: Message):
+        if msg.local_id == self.watcher_id:
+            self._apply_local_message(msg)
+            return
+
+        if msg.method == "UpdateForAddPolicy":
+            rule = cast(List[str], msg.rules)
+            self.enforcer.model.add_policy(msg.sec, msg.ptype, rule)
+            self._apply_role_links(msg.sec, msg.ptype, [rule], PolicyOp.Policy_add)
+            self._update_index(msg.sec, msg.ptype, [rule], PolicyOp.Policy_add)
         elif msg.method == "UpdateForRemovePolicy":
-            self.logger.info(f"UpdateForRemovePolicy callback msg recieved, msg:{message}")
-            if msg.local_id != self.watcher_id:
-                self.enforcer.model.remove_policy(msg.sec, msg.ptype, msg.rules)
+            rule = cast(List[str], msg.rules)
+            self.enforcer.model.remove_policy(msg.sec, msg.ptype, rule)
+            self._apply_role_links(msg.sec, msg.ptype, [rule], PolicyOp.Policy_remove)
+            self._update_index(msg.sec, msg.ptype, [rule], PolicyOp.Policy_remove)
         elif msg.method == "UpdateForRemoveFilteredPolicy":
-            self.logger.info(f"UpdateForRemoveFilteredPolicy callback msg recieved, msg:{message}")
-            if msg.local_id != self.watcher_id:
-                self.enforcer.model.remove_filtered_policy(
-                    msg.sec, msg.ptype, msg.field_index, *msg.rules
-                )
+            self.enforcer.model.remove_filtered_policy(
+                msg.sec, msg.ptype, msg.field_index, *msg.rules
+            )
+            if msg.sec == "g":
+                self.enforcer.build_role_links()
+            self._rebuild_index()
         elif msg.method == "UpdateForSavePolicy":
-            self.logger.info(f"UpdateForSavePolicy callback msg recieved, msg:{message}")
-            if msg.local_id != self.watcher_id:
-                self.enforcer.model = self.enforcer.model.load_model_from_text(msg.model)
+            self.enforcer.model = self.enforcer.model.load_model_from_text(msg.model)
+            self._rebuild_index()
         elif msg.method == "UpdateForAddPolicies":
-            self.logger.info(f"UpdateForAddPolicies callback msg recieved, msg:{message}")
-            if msg.local_id != self.watcher_id:
-                self.enforcer.model.add_policies(msg.sec, msg.ptype, msg.rules)
+            rules = cast(List[List[str]], msg.rules)
+            self.enforcer.model.add_policies(msg.sec, msg.ptype, rules)
+            self._apply_role_links(msg.sec, msg.ptype, rules, PolicyOp.Policy_add)
+            self._update_index(msg.sec, msg.ptype, rules, PolicyOp.Policy_add)
         elif msg.method == "UpdateForRemovePolicies":
-            self.logger.info(f"UpdateForRemovePolicies callback msg recieved, msg:{message}")
-            if msg.local_id != self.watcher_id:
-                self.enforcer.model.remove_policies(msg.sec, msg.ptype, msg.rules)
+            rules = cast(List[List[str]], msg.rules)
+            self.enforcer.model.remove_policies(msg.sec, msg.ptype, rules)
+            self._apply_role_links(msg.sec, msg.ptype, rules, PolicyOp.Policy_remove)
+            self._update_index(msg.sec, msg.ptype, rules, PolicyOp.Policy_remove)
         else:
-            self.logger.warning(f"unknown callback msg recieved, msg:{message},skip...")
+            self.logger.warning(f"unknown callback msg recieved, msg:{msg},skip...")
+
+    def _apply_local_message(self, msg: Message):
+        """
+        本地发出的变更回环
+
+        变更已在增删方法中同步作用于本地模型和权限索引，这里不再按增量修改索引：
+        回环晚于之后的本地变更到达时，重放增量会把索引改回旧状态。只做幂等的处理
+        """
+        if msg.method in ("UpdateForRemoveFilteredPolicy", "UpdateForSavePolicy"):
+            self._rebuild_index()
+        elif msg.method in ("UpdateForAddPolicy", "UpdateForRemovePolicy"):
+            self._invalidate_subjects([cast(List[str], msg.rules)[0]])
+        elif msg.method in ("UpdateForAddPolicies", "UpdateForRemovePolicies"):
+            self._invalidate_subjects(rule[0] for rule in cast(List[List[str]], msg.rules))
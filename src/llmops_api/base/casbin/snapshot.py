@@ -0,0 +1,28 @@
+import json
+import zlib
+from dataclasses import dataclass
+from typing import List, Tuple
+
+
+@dataclass
+class PolicySnapshot:
+    """某一策略版本下的全量策略，worker启动时由此构建模型和角色关系，再应用之后的变更"""
+
+    version: int
+    rules: List[Tuple[str, List[str]]]
+
+    def dumps(self) -> bytes:
+        payload = json.dumps(
+            {"version": self.version, "rules": self.rules},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return zlib.compress(payload.encode("utf-8"))
+
+    @classmethod
+    def loads(cls, data: bytes) -> "PolicySnapshot":
+        payload = json.loads(zlib.decompress(data))
+        return cls(
+            version=payload["version"],
+            rules=[(ptype, rule) for ptype, rule in payload["rules"]],
+        )
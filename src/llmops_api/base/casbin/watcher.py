@@ -7,9 +7,44 @@ from casbin import Model
 from loguru._logger import Logger
 from pydantic import BaseModel, Field
 from redis.asyncio import Redis
+from redis.exceptions import NoScriptError
+
+# KEYS: 策略版本号, 策略变更日志
+# ARGV: 不含version字段的消息json, 变更日志保留条数, 频道
+# 版本号递增、写入变更日志和发布消息在同一个脚本中完成，保证各worker收到的版本号连续有序
+PUBLISH_SCRIPT = """
+local version = redis.call("INCR", KEYS[1])
+local payload = '{"version":' .. version .. ',' .. string.sub(ARGV[1], 2)
+redis.call("ZADD", KEYS[2], version, payload)
+redis.call("ZREMRANGEBYRANK", KEYS[2], 0, -tonumber(ARGV[2]) - 1)
+redis.call("PUBLISH", ARGV[3], payload)
+return version
+"""
+
+# KEYS: 策略快照
+# ARGV: 快照版本号, 快照内容
+# 只保留版本号更新的快照，避免较慢的worker用旧快照覆盖新快照
+SAVE_SNAPSHOT_SCRIPT = """
+local version = redis.call("HGET", KEYS[1], "version")
+if version and tonumber(version) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("HSET", KEYS[1], "version", ARGV[1], "payload", ARGV[2])
+return 1
+"""
+
+# KEYS: 快照构建锁
+# ARGV: 持有者id
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
 
 
 class Message(BaseModel):
+    version: int = Field(default=0)
     method: str = Field(default="")
     local_id: str = Field(default="")
     sec: str = Field(default="")
@@ -28,10 +63,17 @@ class RedisCasbinWatcher:
         subscribe_timeout: int = 2,
         callback: Optional[Callable[[str], Any]] = None,
         loop: Optional[asyncio.AbstractEventLoop] = None,
+        max_deltas: int = 1000,
     ):
         self.local_id = str(uuid4())
         self.publish_client_factory = publish_client_factory
         self.channel = channel
+        self.version_key = f"{channel}:version"
+        self.delta_key = f"{channel}:deltas"
+        self.snapshot_key = f"{channel}:snapshot"
+        self.snapshot_lock_key = f"{channel}:snapshot:lock"
+        self.max_deltas = max_deltas
+        self.publish_script_sha: Optional[str] = None
         self.stop_subscribe = False
         self.subscribe_timeout = subscribe_timeout
         self.mutex = asyncio.Lock()
@@ -46,6 +88,7 @@ class RedisCasbinWatcher:
     async def init_subscribe_client(self):
         async with self.publish_client_factory() as client:
             self.subscribe_client = client.pubsub()
+            self.publish_script_sha = await client.script_load(PUBLISH_SCRIPT)
 
     async def subscribe(self):
         await self.subscribe_client.subscribe(f"channel:{self.channel}")
@@ -81,11 +124,71 @@ class RedisCasbinWatcher:
         self.stop_subscribe_msg()
         await self.subscribe_client.aclose()
 
+    async def _eval_publish_script(self, client: Redis, msg: Message):
+        keys = [self.version_key, self.delta_key]
+        args = [
+            msg.model_dump_json(exclude={"version"}),
+            self.max_deltas,
+            f"channel:{self.channel}",
+        ]
+
+        if self.publish_script_sha is None:
+            self.publish_script_sha = await client.script_load(PUBLISH_SCRIPT)
+
+        try:
+            return await client.evalsha(self.publish_script_sha, len(keys), *keys, *args)  # type: ignore
+        except NoScriptError:
+            self.publish_script_sha = await client.script_load(PUBLISH_SCRIPT)
+            return await client.evalsha(self.publish_script_sha, len(keys), *keys, *args)  # type: ignore
+
+    async def _publish(self, msg: Message) -> int:
+        """发布策略变更消息，返回本次变更的版本号"""
+        async with self.publish_client_factory() as client:
+            return await self._eval_publish_script(client, msg)
+
+    async def fetch_version(self) -> int:
+        async with self.publish_client_factory() as client:
+            version = await client.get(self.version_key)
+        return 0 if version is None else int(version)
+
+    async def fetch_messages(self, min_version: int, max_version: int) -> List[Message]:
+        """获取版本号在[min_version, max_version]之间的变更消息"""
+        async with self.publish_client_factory() as client:
+            payloads = await client.zrangebyscore(self.delta_key, min_version, max_version)
+        return [Message.model_validate_json(payload) for payload in payloads]
+
+    async def fetch_snapshot(self) -> Optional[bytes]:
+        async with self.publish_client_factory() as client:
+            return await client.hget(self.snapshot_key, "payload")  # type: ignore
+
+    async def fetch_snapshot_version(self) -> Optional[int]:
+        """只读取快照的版本号，快照不存在时返回None"""
+        async with self.publish_client_factory() as client:
+            version = await client.hget(self.snapshot_key, "version")  # type: ignore
+        return None if version is None else int(version)
+
+    async def save_snapshot(self, version: int, payload: bytes) -> bool:
+        """保存策略快照，已有快照版本号不低于version时不覆盖"""
+        async with self.publish_client_factory() as client:
+            saved = await client.eval(SAVE_SNAPSHOT_SCRIPT, 1, self.snapshot_key, version, payload)  # type: ignore
+        return saved == 1
+
+    async def acquire_snapshot_lock(self, timeout: float) -> bool:
+        """获取快照构建锁，同一时间只允许一个worker从数据库加载策略并写入快照"""
+        async with self.publish_client_factory() as client:
+            acquired = await client.set(
+                self.snapshot_lock_key, self.local_id, nx=True, px=int(timeout * 1000)
+            )
+        return bool(acquired)
+
+    async def release_snapshot_lock(self):
+        async with self.publish_client_factory() as client:
+            await client.eval(RELEASE_LOCK_SCRIPT, 1, self.snapshot_lock_key, self.local_id)  # type: ignore
+
     async def update(self):
         async with self.mutex:
             msg = Message(method="Update", local_id=self.local_id)
-            async with self.publish_client_factory() as client:
-                return await client.publish(f"channel:{self.channel}", msg.model_dump_json())
+            return await self._publish(msg)
 
     async def update_for_add_policy(self, sec: str, ptype: str, rule: List[str]):
         async with self.mutex:
@@ -96,8 +199,7 @@ class RedisCasbinWatcher:
                 ptype=ptype,
                 rules=cast(List[str | List[str]], rule),
             )
-            async with self.publish_client_factory() as client:
-                return await client.publish(f"channel:{self.channel}", msg.model_dump_json())
+            return await self._publish(msg)
 
     async def update_for_remove_policy(self, sec: str, ptype: str, rule: List[str]):
         async with self.mutex:
@@ -108,8 +210,7 @@ class RedisCasbinWatcher:
                 ptype=ptype,
                 rules=cast(List[str | List[str]], rule),
             )
-            async with self.publish_client_factory() as client:
-                return await client.publish(f"channel:{self.channel}", msg.model_dump_json())
+            return await self._publish(msg)
 
     async def update_for_remove_filtered_policy(
         self, sec: str, ptype: str, field_index: int, rule: List[str]
@@ -123,8 +224,7 @@ class RedisCasbinWatcher:
                 field_index=field_index,
                 rules=cast(List[str | List[str]], rule),
             )
-            async with self.publish_client_factory() as client:
-                return await client.publish(f"channel:{self.channel}", msg.model_dump_json())
+            return await self._publish(msg)
 
     async def update_for_save_policy(self, model: Model):
         async with self.mutex:
@@ -134,8 +234,7 @@ class RedisCasbinWatcher:
                 model=model.to_text(),
             )
 
-            async with self.publish_client_factory() as client:
-                return await client.publish(f"channel:{self.channel}", msg.model_dump_json())
+            return await self._publish(msg)
 
     async def update_for_add_policies(self, sec: str, ptype: str, rules: List[List[str]]):
         async with self.mutex:
@@ -146,8 +245,7 @@ class RedisCasbinWatcher:
                 ptype=ptype,
                 rules=cast(List[str | List[str]], rules),
             )
-            async with self.publish_client_factory() as client:
-                return await client.publish(self.channel, msg.model_dump_json())
+            return await self._publish(msg)
 
     async def update_for_remove_policies(self, sec: str, ptype: str, rules: List[List[str]]):
         async with self.mutex:
@@ -158,8 +256,7 @@ class RedisCasbinWatcher:
                 ptype=ptype,
                 rules=cast(List[str | List[str]], rules),
             )
-            async with self.publish_client_factory() as client:
-                return await client.publish(f"channel:{self.channel}", msg.model_dump_json())
+            return await self._publish(msg)
 
 
 async def new_watcher(
@@ -168,6 +265,7 @@ async def new_watcher(
     channel: str = "casbin",
     subscribe_timeout: int = 2,
     callback: Optional[Callable[[str], Any]] = None,
+    max_deltas: int = 1000,
 ) -> RedisCasbinWatcher:
     watcher = RedisCasbinWatcher(
         publish_client_factory,
@@ -175,6 +273,7 @@ async def new_watcher(
         channel=channel,
         subscribe_timeout=subscribe_timeout,
         callback=callback,
+        max_deltas=max_deltas,
     )
     await watcher.init_subscribe_client()
     watcher.loop.create_task(watcher.subscribe())
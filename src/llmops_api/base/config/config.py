@@ -7,6 +7,8 @@ from pydantic import BaseModel, Field, computed_field, model_validator
 
 from llmops_api.const.constant import (
     DEBUG_MODE,
+    DEFAULT_ACCESS_TOKEN_CACHE_SIZE,
+    DEFAULT_ACCESS_TOKEN_CACHE_TTL,
     DEFAULT_ACCESS_TOKEN_EXPIRE,
     DEFAULT_CELERY_BACKEND_DATABASE_DB,
     DEFAULT_CELERY_BACKEND_DATABASE_HOST,
@@ -26,17 +28,31 @@ from llmops_api.const.constant import (
     DEFAULT_CORS_MAX_AGE,
     DEFAULT_DATABASE_DB,
     DEFAULT_DATABASE_HOST,
+    DEFAULT_DATABASE_ISOLATION_LEVEL,
+    DEFAULT_DATABASE_PGBOUNCER,
     DEFAULT_DATABASE_PORT,
+    DEFAULT_DATABASE_PREPARED_STATEMENT_CACHE_SIZE,
+    DEFAULT_DATABASE_REPLICA_HOSTS,
+    DEFAULT_DATABASE_REPLICA_LAG_CHECK_INTERVAL,
+    DEFAULT_DATABASE_REPLICA_LAG_CHECK_TIMEOUT,
+    DEFAULT_DATABASE_REPLICA_MAX_LAG,
+    DEFAULT_DATABASE_REPLICA_STRATEGY,
     DEFAULT_DATABASE_SCHEMA,
     DEFAULT_DATABASE_USER,
     DEFAULT_LOGGER_LEVEL,
+    DEFAULT_PERMISSION_TREE_CACHE_SIZE,
+    DEFAULT_PERMISSION_TREE_CACHE_TTL,
     DEFAULT_RABBITMQ_HOST,
     DEFAULT_RABBITMQ_PORT,
     DEFAULT_RABBITMQ_USERNAME,
     DEFAULT_RABBITMQ_VHOST,
     DEFAULT_REDIS_DB,
+    DEFAULT_REDIS_HEALTH_CHECK_INTERVAL,
     DEFAULT_REDIS_HOST,
+    DEFAULT_REDIS_MAX_CONNECTIONS,
+    DEFAULT_REDIS_POOL_TIMEOUT,
     DEFAULT_REDIS_PORT,
+    DEFAULT_REDIS_SINGLETON_CLIENT,
     DEFAULT_REDIS_USER_NAME,
     DEFAULT_REFRESH_TOKEN_EXPIRE,
     DEFAULT_RESULT_EXPIRES,
@@ -45,6 +61,11 @@ from llmops_api.const.constant import (
     DEFAULT_SQLALCHEMY_POOL_RECYLE,
     DEFAULT_SQLALCHEMY_POOL_SIZE,
     DEFAULT_SQLALCHEMY_POOL_TIMEOUT,
+    DEFAULT_SQLALCHEMY_QUERY_CACHE_SIZE,
+    DEFAULT_SQLALCHEMY_SLOW_QUERY_THRESHOLD,
+    DEFAULT_UPLOAD_SPOOL_CHUNK_SIZE,
+    DEFAULT_UPLOAD_SPOOL_DIR,
+    DEFAULT_UPLOAD_SPOOL_TTL,
     DEFAULT_WORKER_MAX_TASKS_PER_CHILD,
     DEFAULT_WORKER_PREFETCH_MULTIPLIER,
 )
@@ -137,6 +158,69 @@ class DatabaseConfig(ConfigBase, FromEnvBase):
         Field(default=DEFAULT_SQLALCHEMY_ECHO),
         EnvField(env="SQLALCHEMY_ECHO"),
     ]
+    slow_query_threshold: Annotated[
+        float,
+        Field(default=DEFAULT_SQLALCHEMY_SLOW_QUERY_THRESHOLD),
+        EnvField(env="SQLALCHEMY_SLOW_QUERY_THRESHOLD"),
+    ]
+    query_cache_size: Annotated[
+        int,
+        Field(default=DEFAULT_SQLALCHEMY_QUERY_CACHE_SIZE),
+        EnvField(env="SQLALCHEMY_QUERY_CACHE_SIZE"),
+    ]
+    prepared_statement_cache_size: Annotated[
+        int,
+        Field(default=DEFAULT_DATABASE_PREPARED_STATEMENT_CACHE_SIZE),
+        EnvField(env="DATABASE_PREPARED_STATEMENT_CACHE_SIZE"),
+    ]
+    pgbouncer: Annotated[
+        bool, Field(default=DEFAULT_DATABASE_PGBOUNCER), EnvField(env="DATABASE_PGBOUNCER")
+    ]
+
+    isolation_level: Annotated[
+        str,
+        Field(
+            default=DEFAULT_DATABASE_ISOLATION_LEVEL,
+            pattern="^(READ COMMITTED|REPEATABLE READ|SERIALIZABLE)$",
+        ),
+        EnvField(env="DATABASE_ISOLATION_LEVEL"),
+    ]
+    replica_hosts_str: Annotated[
+        str,
+        Field(default=DEFAULT_DATABASE_REPLICA_HOSTS),
+        EnvField(env="DATABASE_REPLICA_HOSTS"),
+    ]
+    replica_strategy: Annotated[
+        str,
+        Field(
+            default=DEFAULT_DATABASE_REPLICA_STRATEGY, pattern="^(round_robin|least_connections)$"
+        ),
+        EnvField(env="DATABASE_REPLICA_STRATEGY"),
+    ]
+    replica_max_lag: Annotated[
+        float,
+        Field(default=DEFAULT_DATABASE_REPLICA_MAX_LAG),
+        EnvField(env="DATABASE_REPLICA_MAX_LAG"),
+    ]
+    replica_lag_check_interval: Annotated[
+        float,
+        Field(default=DEFAULT_DATABASE_REPLICA_LAG_CHECK_INTERVAL),
+        EnvField(env="DATABASE_REPLICA_LAG_CHECK_INTERVAL"),
+    ]
+    replica_lag_check_timeout: Annotated[
+        float,
+        Field(default=DEFAULT_DATABASE_REPLICA_LAG_CHECK_TIMEOUT),
+        EnvField(env="DATABASE_REPLICA_LAG_CHECK_TIMEOUT"),
+    ]
+
+    @computed_field
+    def replica_urls(self) -> List[str]:
+        if self.replica_hosts_str == "":
+            return []
+        return [
+            f"postgresql+asyncpg://{self.user}:{self.password}@{host}/{self.db}"
+            for host in self.replica_hosts_str.split(",")
+        ]
 
     @computed_field
     def url(self) -> str:
@@ -200,10 +284,35 @@ class RedisConfig(ConfigBase, FromEnvBase):
     password: Annotated[str, EnvField(env="REDIS_PASSWORD")]
     host: Annotated[str, Field(default=DEFAULT_REDIS_HOST), EnvField(env="REDIS_HOST")]
 
-    port: Annotated[str, Field(default=DEFAULT_REDIS_PORT), EnvField(env="REDIS_PORT)")]
+    port: Annotated[str, Field(default=DEFAULT_REDIS_PORT), EnvField(env="REDIS_PORT")]
 
     db: Annotated[int, Field(default=DEFAULT_REDIS_DB), EnvField(env="REDIS_DB")]
 
+    singleton_client: Annotated[
+        bool,
+        Field(default=DEFAULT_REDIS_SINGLETON_CLIENT),
+        EnvField(env="REDIS_SINGLETON_CLIENT"),
+    ]
+
+    max_connections: Annotated[
+        int,
+        Field(default=DEFAULT_REDIS_MAX_CONNECTIONS),
+        EnvField(env="REDIS_MAX_CONNECTIONS"),
+    ]
+
+    # 连接池耗尽时等待空闲连接的超时时间(秒)
+    pool_timeout: Annotated[
+        int,
+        Field(default=DEFAULT_REDIS_POOL_TIMEOUT),
+        EnvField(env="REDIS_POOL_TIMEOUT"),
+    ]
+
+    health_check_interval: Annotated[
+        int,
+        Field(default=DEFAULT_REDIS_HEALTH_CHECK_INTERVAL),
+        EnvField(env="REDIS_HEALTH_CHECK_INTERVAL"),
+    ]
+
     @computed_field
     def url(self) -> str:
         url = f"redis://{self.username}:{self.password}@{self.host}:{self.port}/{self.db}"
@@ -223,6 +332,32 @@ class AuthConfig(ConfigBase, FromEnvBase):
         EnvField(env="REFRESH_TOKEN_EXPIRE"),
     ]
 
+    # 进程内access_token缓存，ttl同时受token剩余有效期限制
+    access_token_cache_size: Annotated[
+        int,
+        Field(default=DEFAULT_ACCESS_TOKEN_CACHE_SIZE),
+        EnvField(env="ACCESS_TOKEN_CACHE_SIZE"),
+    ]
+
+    access_token_cache_ttl: Annotated[
+        int,
+        Field(default=DEFAULT_ACCESS_TOKEN_CACHE_TTL),
+        EnvField(env="ACCESS_TOKEN_CACHE_TTL"),
+    ]
+
+    # 用户权限树缓存(进程内 + redis)，菜单或权限变更时通过版本号失效
+    permission_tree_cache_size: Annotated[
+        int,
+        Field(default=DEFAULT_PERMISSION_TREE_CACHE_SIZE),
+        EnvField(env="PERMISSION_TREE_CACHE_SIZE"),
+    ]
+
+    permission_tree_cache_ttl: Annotated[
+        int,
+        Field(default=DEFAULT_PERMISSION_TREE_CACHE_TTL),
+        EnvField(env="PERMISSION_TREE_CACHE_TTL"),
+    ]
+
 
 class BrokerConfig(ConfigBase, FromEnvBase):
     username: Annotated[
@@ -322,6 +457,26 @@ class CeleryConfig(ConfigBase, FromEnvBase):
     ]
 
 
+class UploadConfig(ConfigBase, FromEnvBase):
+    spool_dir: Annotated[
+        str,
+        Field(default=DEFAULT_UPLOAD_SPOOL_DIR),
+        EnvField(env="UPLOAD_SPOOL_DIR"),
+    ]
+
+    spool_chunk_size: Annotated[
+        int,
+        Field(default=DEFAULT_UPLOAD_SPOOL_CHUNK_SIZE, gt=0),
+        EnvField(env="UPLOAD_SPOOL_CHUNK_SIZE"),
+    ]
+
+    spool_ttl: Annotated[
+        int,
+        Field(default=DEFAULT_UPLOAD_SPOOL_TTL, gt=0),
+        EnvField(env="UPLOAD_SPOOL_TTL"),
+    ]
+
+
 class Config(FromEnvBase):
     """
     项目配置
@@ -335,6 +490,7 @@ class Config(FromEnvBase):
     redis: RedisConfig
     auth: AuthConfig
     celery: CeleryConfig
+    upload: UploadConfig
 
 
 def load_config():
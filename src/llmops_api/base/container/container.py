@@ -1,6 +1,8 @@
 from dependency_injector import providers
 from dependency_injector.containers import DeclarativeContainer
 
+from llmops_api.base.cache.synced_cache import new_synced_cache
+from llmops_api.base.cache.versioned_cache import VersionedCache
 from llmops_api.base.casbin.adapter import CasbinAdapter
 from llmops_api.base.casbin.enforcer import new_casbin_enforcer
 from llmops_api.base.casbin.watcher import new_watcher
@@ -8,6 +10,8 @@ from llmops_api.base.config import load_config
 from llmops_api.base.db.engine import Database, SyncDatabase
 from llmops_api.base.logger import init_logger
 from llmops_api.base.redis.pool import Redis
+from llmops_api.base.upload.spool import UploadSpool
+from llmops_api.base.view.model import ListViewModel
 from llmops_api.container.action import Container as ActionContainer
 from llmops_api.container.auth import Container as AuthContainer
 from llmops_api.container.document import Container as DocumentContainer
@@ -20,15 +24,29 @@ from llmops_api.repo.action import ActionRepo
 from llmops_api.repo.document import KnowledgeDocumentRepo, SyncKnowledgeDocumentRepo
 from llmops_api.repo.knowledge import KnowledgeRepo, SyncKnowledgeRepo
 from llmops_api.repo.menu import MenuRepo
+from llmops_api.view.permissions import PermissionViewModel
 
 
 class CeleryContainer(DeclarativeContainer):
     config = providers.Singleton(load_config)
-    db = providers.Singleton(Database, config=config.provided.database)
-    sync_db = providers.Singleton(SyncDatabase, config=config.provided.database)
     logger = providers.Singleton(
         init_logger, level=config.provided.logger.level, debug=config.provided.env.debug_mode
     )
+    db = providers.Singleton(
+        Database, config=config.provided.database, logger=logger.provided.bind.call(name="db")
+    )
+    sync_db = providers.Singleton(
+        SyncDatabase,
+        config=config.provided.database,
+        logger=logger.provided.bind.call(name="sync-db"),
+    )
+
+    upload_spool = providers.Singleton(
+        UploadSpool,
+        spool_dir=config.provided.upload.spool_dir,
+        chunk_size=config.provided.upload.spool_chunk_size,
+        ttl=config.provided.upload.spool_ttl,
+    )
 
     sync_knowledge_repo = providers.Singleton(
         SyncKnowledgeRepo, logger=logger.provided.bind.call(name="sync-knowledge-repo")
@@ -41,20 +59,53 @@ class CeleryContainer(DeclarativeContainer):
 
 class ApplicationContainer(DeclarativeContainer):
     config = providers.Singleton(load_config)
-    db = providers.Singleton(Database, config=config.provided.database)
-    sync_db = providers.Singleton(SyncDatabase, config=config.provided.database)
     logger = providers.Singleton(
         init_logger, level=config.provided.logger.level, debug=config.provided.env.debug_mode
     )
+    db = providers.Singleton(
+        Database, config=config.provided.database, logger=logger.provided.bind.call(name="db")
+    )
+    sync_db = providers.Singleton(
+        SyncDatabase,
+        config=config.provided.database,
+        logger=logger.provided.bind.call(name="sync-db"),
+    )
 
     redis = providers.Singleton(Redis, config=config.provided.redis)
 
+    upload_spool = providers.Singleton(
+        UploadSpool,
+        spool_dir=config.provided.upload.spool_dir,
+        chunk_size=config.provided.upload.spool_chunk_size,
+        ttl=config.provided.upload.spool_ttl,
+    )
+
     casbin_watcher = providers.Singleton(
         new_watcher,
         publish_client_factory=redis.provided.client,
         logger=logger.provided.bind.call(name="casbin-watcher"),
     )
 
+    token_cache = providers.Singleton(
+        new_synced_cache,
+        publish_client_factory=redis.provided.client,
+        logger=logger.provided.bind.call(name="token-cache"),
+        channel="access-token",
+        maxsize=config.provided.auth.access_token_cache_size,
+        ttl=config.provided.auth.access_token_cache_ttl,
+    )
+
+    permission_tree_cache = providers.Singleton(
+        VersionedCache,
+        redis_client_factory=redis.provided.client,
+        logger=logger.provided.bind.call(name="permission-tree-cache"),
+        name="permission-tree",
+        dumps=ListViewModel[PermissionViewModel].model_dump_json,
+        loads=ListViewModel[PermissionViewModel].model_validate_json,
+        maxsize=config.provided.auth.permission_tree_cache_size,
+        ttl=config.provided.auth.permission_tree_cache_ttl,
+    )
+
     casbin_adapter = providers.Singleton(
         CasbinAdapter, transaction_factory=db.provided.transaction_session
     )
@@ -79,6 +130,7 @@ class ApplicationContainer(DeclarativeContainer):
 
     menu_module = providers.Container(
         MenuContainer,
+        permission_tree_cache=permission_tree_cache,
         db=db,
         menu_repo=menu_repo,
         action_repo=action_repo,
@@ -87,6 +139,7 @@ class ApplicationContainer(DeclarativeContainer):
 
     action_module = providers.Container(
         ActionContainer,
+        permission_tree_cache=permission_tree_cache,
         db=db,
         logger=logger.provided.bind.call(name="action-module"),
         menu_repo=menu_repo,
@@ -105,6 +158,7 @@ class ApplicationContainer(DeclarativeContainer):
         AuthContainer,
         db=db,
         redis=redis,
+        token_cache=token_cache,
         logger=logger.provided.bind.call(name="auth-module"),
         repo=user_module.container.repo,
         auth_config=config.provided.auth,
@@ -112,6 +166,7 @@ class ApplicationContainer(DeclarativeContainer):
 
     permissions_module = providers.Container(
         PermissionsContainer,
+        permission_tree_cache=permission_tree_cache,
         db=db,
         redis=redis,
         logger=logger.provided.bind.call(name="permissions-module"),
@@ -141,6 +196,7 @@ class ApplicationContainer(DeclarativeContainer):
         db=db,
         document_repo=document_repo,
         knowledge_repo=knowledge_repo,
+        upload_spool=upload_spool,
         logger=logger.provided.bind.call(name="document-module"),
     )
 
@@ -1,61 +1,256 @@
+import asyncio
+import contextlib
+import functools
+import math
+import time
+import uuid
 from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, TypeVar
 
-from sqlalchemy.engine import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from loguru._logger import Logger
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, create_engine
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.asyncio.engine import create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
 
 from llmops_api.base.config import DatabaseConfig
+from llmops_api.base.db.instrument import QueryInstrumentation, render_labels
+
+_T = TypeVar("_T")
+
+IsolationLevel = Literal["READ COMMITTED", "REPEATABLE READ", "SERIALIZABLE"]
+
+_read_only: ContextVar[bool] = ContextVar("read_only", default=False)
+
+# 副本与主库WAL一致时延迟为0，否则为最后回放事务距今的秒数
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def read_only(func: Callable[..., Awaitable[_T]]) -> Callable[..., Awaitable[_T]]:
+    """
+    标记只读的service方法，方法内通过Database.transaction_session开启的事务会改为
+    自动提交的只读会话，并路由到只读副本
+
+    方法内不能有写操作，且需要能容忍副本的复制延迟以及多条语句间看到不同的快照
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> _T:
+        token = _read_only.set(True)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+
+    return wrapper
+
+
+class CompileCacheStats:
+    """
+    SQLAlchemy编译缓存的命中统计，按执行的语句计数
+
+    编译缓存在进程内按语句结构生效，与连接无关，经过PgBouncer事务池时同样有效
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {stats.name.lower(): 0 for stats in CacheStats}
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            self.counts[context.cache_hit.name.lower()] += 1
+
+    def hit_rate(self) -> float:
+        hits = self.counts["cache_hit"]
+        total = hits + self.counts["cache_miss"]
+        return hits / total if total > 0 else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.counts, "hit_rate": self.hit_rate()}
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.session_factory = async_sessionmaker(
+            bind=engine.execution_options(isolation_level="AUTOCOMMIT"), class_=AsyncSession
+        )
+        # 尚未检查过的副本视为不可用
+        self.lag = math.inf
+        self.checked_at = 0.0
+
+    def checkedout(self) -> int:
+        return self.engine.pool.checkedout()  # pyright: ignore[reportAttributeAccessIssue]
+
+    async def check_lag(self, timeout: float) -> None:
+        try:
+            # 超时包含建立连接，副本不可达时不会等待驱动默认的连接超时
+            async with asyncio.timeout(timeout):
+                async with self.engine.connect() as conn:
+                    self.lag = float(await conn.scalar(REPLICA_LAG_SQL) or 0)
+        except Exception:
+            # 副本不可用时视为延迟无限大，等待下次检查
+            self.lag = math.inf
+        self.checked_at = time.monotonic()
 
 
 class SyncDatabase:
-    def __init__(self, config: DatabaseConfig):
+    def __init__(self, config: DatabaseConfig, logger: Logger):
         self._config = config
+        self.instrumentation = QueryInstrumentation(logger, self._config.slow_query_threshold)
+        connect_args: Dict[str, Any] = {"server_settings": {"search_path": self._config.db_schema}}
+        if self._config.pgbouncer:
+            # psycopg不使用服务端预编译语句
+            connect_args["prepare_threshold"] = None
+
         self._engine = create_engine(
             self._config.sync_url,
-            connect_args={"server_settings": {"search_path": self._config.db_schema}},
-            isolation_level="REPEATABLE READ",
+            connect_args=connect_args,
+            isolation_level=self._config.isolation_level,
             pool_reset_on_return=None,
             pool_size=self._config.pool.pool_size,
             max_overflow=self._config.pool.max_overflow,
             pool_recycle=self._config.pool.pool_recyle,
             pool_timeout=self._config.pool.pool_timeout,
+            query_cache_size=self._config.query_cache_size,
             echo=self._config.echo,
         )
+        self.compile_cache_stats = CompileCacheStats()
+        self.compile_cache_stats.attach(self._engine)
+        self.instrumentation.attach(self._engine)
 
         self._session_factory = sessionmaker(bind=self._engine, class_=Session)
+        self._read_session_factory = sessionmaker(
+            bind=self._engine.execution_options(isolation_level="AUTOCOMMIT"), class_=Session
+        )
 
     @contextmanager
     def session(self):
         with self._session_factory() as session:
             yield session
 
+    def _checkout(self, session: Session, **execution_options: Any) -> None:
+        """提前获取连接，记录连接池等待时间"""
+        with self.instrumentation.pool_wait_timer():
+            session.connection(execution_options=execution_options or None)
+
     @contextmanager
-    def transaction_session(self):
+    def transaction_session(self, isolation_level: Optional[IsolationLevel] = None):
         with self._session_factory() as session:
             with session.begin():
+                if isolation_level is not None:
+                    self._checkout(session, isolation_level=isolation_level)
+                else:
+                    self._checkout(session)
                 yield session
 
+    @contextmanager
+    def read_session(self):
+        """自动提交的只读会话，不发送BEGIN/COMMIT，每条语句各自使用最新的快照"""
+        with self._read_session_factory() as session:
+            self._checkout(session)
+            yield session
+
     def close(self):
         self._engine.dispose()
 
 
 class Database:
-    def __init__(self, config: DatabaseConfig):
+    def __init__(self, config: DatabaseConfig, logger: Logger):
         self._config = config
-        self._engine = create_async_engine(
-            self._config.url,
-            connect_args={"server_settings": {"search_path": self._config.db_schema}},
-            isolation_level="REPEATABLE READ",
+        self.compile_cache_stats = CompileCacheStats()
+        self.instrumentation = QueryInstrumentation(logger, self._config.slow_query_threshold)
+        self._engine = self._create_engine(self._config.url)
+        self._session_factory = async_sessionmaker(bind=self._engine, class_=AsyncSession)
+        # 自动提交的只读会话，没有可用副本时回退到主库
+        self._read_only_session_factory = async_sessionmaker(
+            bind=self._engine.execution_options(isolation_level="AUTOCOMMIT"), class_=AsyncSession
+        )
+        self._replicas = [Replica(self._create_engine(url)) for url in self._config.replica_urls]
+        self._next_replica = 0
+        self._replica_monitor: Optional[asyncio.Task] = None
+
+    def _create_engine(self, url: str) -> AsyncEngine:
+        connect_args: Dict[str, Any] = {
+            "server_settings": {"search_path": self._config.db_schema},
+            "prepared_statement_cache_size": self._config.prepared_statement_cache_size,
+        }
+        if self._config.pgbouncer:
+            # 事务池中同一连接的语句可能落到不同的后端连接，预编译语句需使用唯一名称，
+            # 并关闭asyncpg自身的语句缓存
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+            connect_args["statement_cache_size"] = 0
+
+        engine = create_async_engine(
+            url,
+            connect_args=connect_args,
+            isolation_level=self._config.isolation_level,
             pool_reset_on_return=None,
             pool_size=self._config.pool.pool_size,
             max_overflow=self._config.pool.max_overflow,
             pool_recycle=self._config.pool.pool_recyle,
             pool_timeout=self._config.pool.pool_timeout,
+            query_cache_size=self._config.query_cache_size,
             echo=self._config.echo,
         )
-        self._session_factory = async_sessionmaker(bind=self._engine, class_=AsyncSession)
+        self.compile_cache_stats.attach(engine.sync_engine)
+        self.instrumentation.attach(engine.sync_engine)
+        return engine
+
+    async def check_replicas(self) -> None:
+        """并发检查所有副本的复制延迟"""
+        timeout = self._config.replica_lag_check_timeout
+        await asyncio.gather(*(replica.check_lag(timeout) for replica in self._replicas))
+
+    async def _monitor_replicas(self) -> None:
+        while True:
+            await asyncio.sleep(self._config.replica_lag_check_interval)
+            await self.check_replicas()
+
+    async def start_replica_monitor(self) -> None:
+        """
+        完成一次副本检查后在后台定期检查，请求路径只读取检查结果
+
+        未启动检查的进程(如celery worker)中副本始终视为不可用，只读查询走主库
+        """
+        if len(self._replicas) == 0 or self._replica_monitor is not None:
+            return
+        await self.check_replicas()
+        self._replica_monitor = asyncio.create_task(self._monitor_replicas())
+
+    async def stop_replica_monitor(self) -> None:
+        if self._replica_monitor is None:
+            return
+        self._replica_monitor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._replica_monitor
+        self._replica_monitor = None
+
+    def _select_replica(self) -> Optional[Replica]:
+        # 检查结果超过两个检查间隔未更新(检查任务未运行或已停止)的副本不使用
+        checked_after = time.monotonic() - 2 * self._config.replica_lag_check_interval
+        replicas: List[Replica] = [
+            r
+            for r in self._replicas
+            if r.checked_at >= checked_after and r.lag <= self._config.replica_max_lag
+        ]
+        if len(replicas) == 0:
+            return None
+
+        if self._config.replica_strategy == "least_connections":
+            return min(replicas, key=lambda r: r.checkedout())
+
+        self._next_replica = (self._next_replica + 1) % len(replicas)
+        return replicas[self._next_replica]
 
     @asynccontextmanager
     async def session(self):
@@ -63,10 +258,61 @@ class Database:
             yield session
 
     @asynccontextmanager
-    async def transaction_session(self):
+    async def transaction_session(self, isolation_level: Optional[IsolationLevel] = None):
+        if _read_only.get() and isolation_level is None:
+            async with self.read_only_session() as session:
+                yield session
+            return
+
         async with self._session_factory() as session:
             async with session.begin():
+                if isolation_level is not None:
+                    await self._checkout(session, isolation_level=isolation_level)
+                else:
+                    await self._checkout(session)
                 yield session
 
+    async def _checkout(self, session: AsyncSession, **execution_options: Any) -> None:
+        """提前获取连接，记录连接池等待时间"""
+        with self.instrumentation.pool_wait_timer():
+            await session.connection(execution_options=execution_options or None)
+
+    @asynccontextmanager
+    async def read_session(self):
+        """主库上自动提交的只读会话，不发送BEGIN/COMMIT，每条语句各自使用最新的快照"""
+        async with self._read_only_session_factory() as session:
+            await self._checkout(session)
+            yield session
+
+    @asynccontextmanager
+    async def read_only_session(self):
+        """自动提交的只读会话，优先使用只读副本，副本都不可用或延迟过高时回退到主库"""
+        replica = self._select_replica()
+        session_factory = (
+            self._read_only_session_factory if replica is None else replica.session_factory
+        )
+        async with session_factory() as session:
+            await self._checkout(session)
+            yield session
+
+    def render_metrics(self, labels: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Prometheus文本格式的数据库指标，labels附加到每个样本上"""
+        lines = self.instrumentation.render_metrics(labels)
+        lines.append("# TYPE db_compile_cache_total counter")
+        for name, count in self.compile_cache_stats.counts.items():
+            lines.append(f"db_compile_cache_total{render_labels(labels, result=name)} {count}")
+        lines.append("# TYPE db_pool_checked_out gauge")
+        checked_out = self._engine.pool.checkedout()  # pyright: ignore[reportAttributeAccessIssue]
+        lines.append(f"db_pool_checked_out{render_labels(labels, engine='primary')} {checked_out}")
+        for i, replica in enumerate(self._replicas):
+            engine = f"replica-{i}"
+            lines.append(
+                f"db_pool_checked_out{render_labels(labels, engine=engine)} {replica.checkedout()}"
+            )
+        return lines
+
     async def close(self):
+        await self.stop_replica_monitor()
         await self._engine.dispose()
+        for replica in self._replicas:
+            await replica.engine.dispose()
@@ -0,0 +1,190 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from loguru._logger import Logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 耗时直方图的分桶上限(秒)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+@dataclass
+class QueryStats:
+    """一次请求或任务内的数据库访问统计"""
+
+    statements: int = 0
+    db_time: float = 0.0
+    pool_wait: float = 0.0
+    slow_statements: int = 0
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "db_statements": self.statements,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "db_pool_wait_ms": round(self.pool_wait * 1000, 3),
+            "db_slow_statements": self.slow_statements,
+        }
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@dataclass
+class _ConnectTiming:
+    """获取连接期间连接池新建连接的耗时"""
+
+    started: float = 0.0
+    elapsed: float = 0.0
+
+
+_connect_timing: ContextVar[Optional[_ConnectTiming]] = ContextVar("connect_timing", default=None)
+
+
+@contextmanager
+def query_stats_scope() -> Iterator[QueryStats]:
+    """在此范围内执行的语句计入返回的QueryStats，用于按请求或任务统计"""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """只记录绑定参数的结构和类型，不记录参数值"""
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if len(parameters) > 0 and isinstance(parameters[0], (dict, list, tuple)):
+            return {"rows": len(parameters), "row": parameter_shape(parameters[0])}
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__
+
+
+def render_labels(labels: Optional[Dict[str, Any]] = None, **extra: Any) -> str:
+    """将标签渲染为Prometheus样本的标签部分，没有标签时返回空字符串"""
+    merged = {**(labels or {}), **extra}
+    if not merged:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in merged.items()) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.bucket_counts[i] += 1
+                break
+
+    def render(self, name: str, labels: Optional[Dict[str, Any]] = None) -> List[str]:
+        lines: List[str] = [f"# TYPE {name} histogram"]
+        cumulative = 0
+        for upper, count in zip(self.buckets, self.bucket_counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{render_labels(labels, le=upper)} {cumulative}")
+        lines.append(f"{name}_bucket{render_labels(labels, le='+Inf')} {self.count}")
+        lines.append(f"{name}_sum{render_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{render_labels(labels)} {self.count}")
+        return lines
+
+
+class QueryInstrumentation:
+    """
+    通过SQLAlchemy事件统计语句数量、耗时和连接池等待
+
+    统计同时计入当前query_stats_scope和进程级的Prometheus指标，
+    超过slow_query_threshold的语句以warning记录，附带绑定参数的结构
+    """
+
+    def __init__(self, logger: Logger, slow_query_threshold: float):
+        self.logger = logger
+        self.slow_query_threshold = slow_query_threshold
+        self.statement_seconds = Histogram()
+        self.pool_wait_seconds = Histogram()
+        self.slow_statements_total = 0
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        # 新建连接从do_connect开始，到连接池的connect事件(首次连接的初始化之后)结束
+        event.listen(engine, "do_connect", self._before_connect)
+        event.listen(engine, "connect", self._after_connect)
+
+    def _before_connect(self, dialect, conn_rec, cargs, cparams):
+        timing = _connect_timing.get()
+        if timing is not None:
+            timing.started = time.perf_counter()
+
+    def _after_connect(self, dbapi_connection, connection_record):
+        timing = _connect_timing.get()
+        if timing is not None and timing.started > 0:
+            timing.elapsed += time.perf_counter() - timing.started
+            timing.started = 0.0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        self.statement_seconds.observe(elapsed)
+
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+
+        if elapsed >= self.slow_query_threshold:
+            self.slow_statements_total += 1
+            if stats is not None:
+                stats.slow_statements += 1
+            self.logger.bind(
+                statement=statement,
+                parameters=parameter_shape(parameters),
+                elapsed_ms=round(elapsed * 1000, 3),
+            ).warning("slow statement")
+
+    @contextmanager
+    def pool_wait_timer(self) -> Iterator[None]:
+        """
+        统计范围内获取连接的等待耗时
+
+        连接池新建连接(超出pool_size、超过pool_recycle、启动时)的耗时包括TCP连接、认证
+        和首次连接的初始化，这部分不是连接池的等待，从中扣除
+        """
+        timing = _ConnectTiming()
+        token = _connect_timing.set(timing)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _connect_timing.reset(token)
+        self.record_pool_wait(time.perf_counter() - start - timing.elapsed)
+
+    def record_pool_wait(self, elapsed: float) -> None:
+        self.pool_wait_seconds.observe(elapsed)
+
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.pool_wait += elapsed
+
+    def render_metrics(self, labels: Optional[Dict[str, Any]] = None) -> List[str]:
+        lines = self.statement_seconds.render("db_statement_duration_seconds", labels)
+        lines.extend(self.pool_wait_seconds.render("db_pool_wait_seconds", labels))
+        lines.append("# TYPE db_slow_statements_total counter")
+        lines.append(
+            f"db_slow_statements_total{render_labels(labels)} {self.slow_statements_total}"
+        )
+        return lines
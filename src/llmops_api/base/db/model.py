@@ -1,9 +1,17 @@
 import datetime
-from typing import Any, Dict, List, Optional, Set, Type, cast
+from typing import Any, Iterable, List, Optional, Set, Type, TypeVar, cast
 
 import stringcase
 from pydantic import BaseModel
-from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint, func, inspect
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -13,17 +21,10 @@ from sqlalchemy.orm import (
     relationship,
 )
 
-from llmops_api.base.view.relation import Relation
+from llmops_api.base.db.converter import get_converter
 from llmops_api.util.sha256_with_salt import sha256_with_salt, verify_hashed
 
-
-def is_sqlalchemy_model_list(list: List[Any]) -> bool:
-    found = False
-    for item in list:
-        if not isinstance(item, Base):
-            found = True
-            break
-    return not found
+PydanticModelT = TypeVar("PydanticModelT", bound=BaseModel)
 
 
 class Base(AsyncAttrs, DeclarativeBase):
@@ -33,82 +34,26 @@ class Base(AsyncAttrs, DeclarativeBase):
 
     def to_pydantic(
         self,
-        pydantic_model: Type[BaseModel],
+        pydantic_model: Type[PydanticModelT],
         *,
         include: Optional[Set[str]] = None,
         exclude: Optional[Set[str]] = None,
-    ):
-        orm_attrs = self._get_attributes()
-
-        filtered_attrs = self._filter_attributes(orm_attrs, include=include, exclude=exclude)
-
-        attrs = {}
-
-        for name, info in pydantic_model.model_fields.items():
-            if name in filtered_attrs.keys():
-                value = filtered_attrs[name]
-
-                if isinstance(value, Base):
-                    for meta in info.metadata:
-                        if isinstance(meta, Relation):
-                            if meta.pydantic_model == "self":
-                                meta.pydantic_model = pydantic_model
-
-                            pydantic_value = value.to_pydantic(
-                                meta.pydantic_model,
-                                include=meta.include,
-                                exclude=meta.exclude,
-                            )
-                            attrs[name] = pydantic_value
-
-                    continue
-                elif isinstance(value, list):
-                    if is_sqlalchemy_model_list(value):
-                        attrs[name] = []
-                        for item in value:
-                            for meta in info.metadata:
-                                if isinstance(meta, Relation):
-                                    if meta.pydantic_model == "self":
-                                        meta.pydantic_model = pydantic_model
-                                    pydantic_value = item.to_pydantic(
-                                        meta.pydantic_model,
-                                        include=meta.include,
-                                        exclude=meta.exclude,
-                                    )
-                                    attrs[name].append(pydantic_value)
-                        continue
-
-                attrs[name] = value
-
-        return pydantic_model(**attrs)
-
-    def _get_attributes(self):
-        inspector = inspect(self)
-        columns = inspector.mapper.columns
-        attrs = {c.key: getattr(self, c.key) for c in columns}
-        relationships = inspector.mapper.relationships
-
-        # 添加关系属性
-        for rel in relationships:
-            # 仅处理已加载的关系
-            if rel.key in inspector.unloaded:
-                continue
-            attrs[rel.key] = getattr(self, rel.key)
-
-        return attrs
-
-    @staticmethod
-    def _filter_attributes(
-        attrs: Dict[str, Any],
+    ) -> PydanticModelT:
+        converter = get_converter(type(self), pydantic_model, include=include, exclude=exclude)
+        return cast(PydanticModelT, converter(self))
+
+    @classmethod
+    def to_pydantic_list(
+        cls,
+        items: Iterable["Base"],
+        pydantic_model: Type[PydanticModelT],
+        *,
         include: Optional[Set[str]] = None,
         exclude: Optional[Set[str]] = None,
-    ) -> Dict[str, Any]:
-        """根据include/exclude过滤属性字典"""
-        if include:
-            return {k: v for k, v in attrs.items() if k in include}
-        if exclude:
-            return {k: v for k, v in attrs.items() if k not in exclude}
-        return attrs
+    ) -> List[PydanticModelT]:
+        """批量转换同一ORM类的实例，转换器只查找一次"""
+        converter = get_converter(cls, pydantic_model, include=include, exclude=exclude)
+        return [cast(PydanticModelT, converter(item)) for item in items]
 
 
 class AutoIncrementID:
@@ -178,6 +123,9 @@ class SoftDelete:
 
 
 class User(Base, AutoIncrementID, OperateRecord, SoftDelete):
+    # 用户列表按(create_at, id)倒序游标分页
+    __table_args__ = (Index("ix_t_user_create_at_id", "create_at", "id"),)
+
     username: Mapped[str] = mapped_column(
         String(20),
         nullable=False,
@@ -1,27 +1,57 @@
+import base64
 import datetime
+import functools
+import json
+import uuid
 from abc import ABC, abstractmethod
 from typing import (
     Annotated,
     Any,
+    Callable,
+    Dict,
     Generic,
+    Iterable,
+    Iterator,
     List,
     Literal,
     Optional,
+    Sequence,
+    Set,
     Tuple,
     TypeVar,
     Union,
+    cast,
     get_args,
 )
 
 from loguru._logger import Logger
-from pydantic import BaseModel, Field
-from sqlalchemy import delete, func, insert, select, update
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import (
+    Dialect,
+    Select,
+    bindparam,
+    column,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+    table,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import Insert as PgInsert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session
 from sqlalchemy.sql._typing import _ColumnExpressionArgument, _ColumnExpressionOrStrLabelArgument
-from sqlalchemy.sql.base import ExecutableOption, _NoArg
+from sqlalchemy.sql.base import Executable, ExecutableOption, _NoArg
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.elements import ClauseElement
 
-from llmops_api.base.db.model import AutoIncrementID, Base, SoftDelete
+from llmops_api.base.db.model import AutoIncrementID, Base, OperateRecord, SoftDelete
+from llmops_api.base.enum.labeled_enum import BaseEnum
 
 
 class Condition(ABC):
@@ -41,6 +71,61 @@ class Paginator(BaseModel):
     ]
 
 
+class CursorPaginator(BaseModel):
+    """
+    游标分页，按(create_at, id)倒序，以上一页最后一条数据的(create_at, id)作为游标，
+    翻页耗时与页码无关，不统计总数
+    """
+
+    cursor: Annotated[
+        Optional[str],
+        Field(default=None, description="分页游标，为空时获取第一页"),
+    ]
+    page_size: Annotated[
+        int,
+        Field(default=20, ge=1, description="页长"),
+    ]
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, v: Optional[str]):
+        if v is not None:
+            cls.decode_cursor(v)
+        return v
+
+    @staticmethod
+    def encode_cursor(create_at: datetime.datetime, id: int) -> str:
+        payload = json.dumps([create_at.isoformat(), id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("utf-8").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            create_at, id = json.loads(payload)
+            return datetime.datetime.fromisoformat(create_at), int(id)
+        except (ValueError, TypeError) as e:
+            raise ValueError("非法的分页游标") from e
+
+    def next_cursor(self, model_list: List[Any]) -> Optional[str]:
+        """根据当前页数据生成下一页的游标，数据不足一页时说明已没有下一页"""
+        if len(model_list) < self.page_size:
+            return None
+        last = model_list[-1]
+        return self.encode_cursor(last.create_at, last.id)
+
+
+class CountMode(BaseEnum):
+    # 单独执行count(*)查询
+    separate = "separate"
+    # 在分页查询中通过count(*) OVER ()窗口函数一并获取总数，只需一次查询
+    # 窗口函数需要物化全部命中行，排序有索引时会失去limit提前结束的优势，
+    # 适合过滤条件复杂、count与分页查询本身都需要全量扫描的场景
+    window = "window"
+    # 根据EXPLAIN的估算行数获取近似总数，适用于不需要精确总数的大表
+    estimated = "estimated"
+
+
 class QueryConfig:
     def __init__(
         self,
@@ -48,6 +133,8 @@ class QueryConfig:
         options: List[ExecutableOption] = [],
         condition: Optional[Condition] = None,
         paginator: Optional[Paginator] = None,
+        cursor_paginator: Optional[CursorPaginator] = None,
+        count_mode: CountMode = CountMode.separate,
         order_by: List[
             Union[
                 Literal[None, _NoArg.NO_ARG],
@@ -58,6 +145,8 @@ class QueryConfig:
         self.options = options
         self.condition = condition
         self.paginator = paginator
+        self.cursor_paginator = cursor_paginator
+        self.count_mode = count_mode
         self.order_by = order_by
 
 
@@ -71,11 +160,273 @@ class RepoException(Exception):
         super().__init__(*args, **kwargs)
 
 
+# 估算总数低于该值时改为精确统计，小表的估算误差相对较大且精确统计的开销很小
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def filter_stmt(stmt: Select[Any], model: Any, query_config: QueryConfig) -> Select[Any]:
+    if query_config.condition is not None:
+        stmt = stmt.where(*query_config.condition.to_condition())
+
+    if issubclass(model, SoftDelete):
+        stmt = stmt.where(model.delete_at.is_(None))
+    return stmt
+
+
+def count_stmt(model: Any, query_config: QueryConfig) -> Select[Any]:
+    return filter_stmt(select(func.count()).select_from(model), model, query_config)
+
+
+def page_stmt(stmt: Select[Any], query_config: QueryConfig) -> Select[Any]:
+    paginator = cast(Paginator, query_config.paginator)
+    stmt = stmt.offset(paginator.page_size * (paginator.page - 1)).limit(paginator.page_size)
+    if len(query_config.order_by) > 0:
+        stmt = stmt.order_by(*query_config.order_by)
+    return stmt
+
+
+def window_page_stmt(model: Any, query_config: QueryConfig) -> Select[Any]:
+    """分页查询附带count(*) OVER ()列，总数在limit之前计算"""
+    stmt = select(model, func.count().over().label("total"))
+    if len(query_config.options) > 0:
+        stmt = stmt.options(*query_config.options)
+    return page_stmt(filter_stmt(stmt, model, query_config), query_config)
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) <语句>
+
+    被解释的语句按普通语句编译，过滤条件的值作为绑定参数传入，不内联到SQL文本中，
+    JSONB、数组、UUID等没有字面量渲染的类型同样可用
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select[Any]):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler: SQLCompiler, **kw: Any) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+def explain_stmt(model: Any, query_config: QueryConfig) -> Explain:
+    """生成估算总数用的EXPLAIN语句，估算行数来自pg_class.reltuples及列统计信息"""
+    return Explain(filter_stmt(select(literal_column("1")).select_from(model), model, query_config))
+
+
+def parse_explain_rows(plan: Any) -> int:
+    if isinstance(plan, (str, bytes)):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def cursor_page_stmt(stmt: Select[Any], model: Any, query_config: QueryConfig) -> Select[Any]:
+    """构建游标分页查询，排序固定为(create_at, id)倒序，忽略query_config.order_by"""
+    if not (issubclass(model, AutoIncrementID) and issubclass(model, OperateRecord)):
+        raise RepoException(
+            "cursor pagination only support the model that extends AutoIncrementID and OperateRecord"
+        )
+
+    cursor_paginator = cast(CursorPaginator, query_config.cursor_paginator)
+    stmt = filter_stmt(stmt, model, query_config)
+
+    if cursor_paginator.cursor is not None:
+        create_at, id = CursorPaginator.decode_cursor(cursor_paginator.cursor)
+        stmt = stmt.where(tuple_(model.create_at, model.id) < tuple_(create_at, id))
+
+    return stmt.order_by(model.create_at.desc(), model.id.desc()).limit(cursor_paginator.page_size)
+
+
+# 按(模型, 语句名)缓存结构固定的语句，参数通过bindparam在执行时传入，
+# 省去每次调用重新构建语句的开销，编译结果再由SQLAlchemy的编译缓存按语句结构复用
+_stmt_registry: Dict[Tuple[Any, str], Any] = {}
+
+
+def registered_stmt(model: Any, name: str, builder: Callable[[Any], T]) -> T:
+    key = (model, name)
+    stmt = _stmt_registry.get(key)
+    if stmt is None:
+        stmt = _stmt_registry[key] = builder(model)
+    return stmt
+
+
+def exists_stmt(model: Any, *where: _ColumnExpressionArgument[bool]) -> Select[Any]:
+    """SELECT EXISTS(SELECT 1 ... LIMIT 1)，找到第一条匹配的行即返回，不统计所有匹配行"""
+    stmt = select(literal_column("1")).select_from(model).where(*where)
+    if issubclass(model, SoftDelete):
+        stmt = stmt.where(model.delete_at.is_(None))
+    return select(stmt.limit(1).exists())
+
+
+def exists_by_id_stmt(model: Any) -> Select[Any]:
+    return exists_stmt(model, model.id == bindparam("id"))
+
+
+def exists_many_stmt(model: Any) -> Select[Any]:
+    stmt = select(model.id).where(model.id.in_(bindparam("ids", expanding=True)))
+    if issubclass(model, SoftDelete):
+        stmt = stmt.where(model.delete_at.is_(None))
+    return stmt
+
+
+def get_by_id_stmt(model: Any) -> Select[Any]:
+    stmt = select(model).where(model.id == bindparam("id"))
+    if issubclass(model, SoftDelete):
+        stmt = stmt.where(model.delete_at.is_(None))
+    return stmt
+
+
+# 批量写入时每条语句包含的行数，过大会超过postgresql单条语句32767个绑定参数的限制
+DEFAULT_BULK_BATCH_SIZE = 1000
+
+
+def batched(rows: Sequence[Dict[str, Any]], batch_size: int) -> Iterator[Sequence[Dict[str, Any]]]:
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    for i in range(0, len(rows), batch_size):
+        yield rows[i : i + batch_size]
+
+
+def bulk_insert_stmt(model: Any) -> Any:
+    stmt = insert(model)
+    if issubclass(model, AutoIncrementID):
+        stmt = stmt.returning(model.id, sort_by_parameter_order=True)
+    return stmt
+
+
+def on_conflict_stmt(
+    stmt: PgInsert,
+    model: Any,
+    columns: Sequence[str],
+    index_elements: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    update_by: Optional[int] = None,
+) -> PgInsert:
+    """为INSERT语句追加ON CONFLICT子句，update_columns为空时默认更新除冲突列和创建人外的所有传入列"""
+    if update_columns is None:
+        update_columns = [c for c in columns if c not in index_elements and c != "create_by"]
+
+    set_: Dict[str, Any] = {c: stmt.excluded[c] for c in update_columns}
+    if len(set_) == 0:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+    # ON CONFLICT DO UPDATE不会触发列的onupdate
+    if issubclass(model, OperateRecord):
+        set_["update_at"] = func.now()
+        if update_by is not None:
+            set_["update_by"] = update_by
+    # 冲突的行已被软删除时恢复该行
+    if issubclass(model, SoftDelete):
+        set_["delete_at"] = None
+        set_["delete_by"] = None
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+
+
+def bulk_upsert_stmt(
+    model: Any,
+    columns: Sequence[str],
+    index_elements: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+) -> PgInsert:
+    stmt = on_conflict_stmt(pg_insert(model), model, columns, index_elements, update_columns)
+    if issubclass(model, AutoIncrementID):
+        stmt = stmt.returning(model.id, sort_by_parameter_order=True)
+    return stmt
+
+
+def copy_columns(
+    model: Any, columns: Sequence[str], create_by: Optional[int]
+) -> Tuple[List[str], Dict[str, Callable[[], Any]]]:
+    """
+    COPY写入的列及未传入时各列的取值函数
+
+    COPY不经过SQLAlchemy的INSERT，模型上python端的默认值(default=...)不会生效，
+    这些列一并写入并在客户端求值；default为SQL表达式的列以及没有python端默认值的列
+    (id、create_at、delete_at等)不写入，由数据库默认值填充
+    """
+    columns = list(columns)
+    defaults: Dict[str, Callable[[], Any]] = {}
+
+    if issubclass(model, OperateRecord) and create_by is not None and "create_by" not in columns:
+        columns.append("create_by")
+        defaults["create_by"] = lambda: create_by
+
+    for c in model.__table__.columns:
+        default = c.default
+        if c.name in columns or default is None:
+            continue
+        if default.is_scalar:
+            columns.append(c.name)
+            defaults[c.name] = lambda value=default.arg: value
+        elif default.is_callable:
+            # SQLAlchemy将无参的默认值函数包装为接收执行上下文的函数
+            columns.append(c.name)
+            defaults[c.name] = functools.partial(default.arg, None)
+    return columns, defaults
+
+
+def copy_records_iter(
+    rows: Iterable[Dict[str, Any]], columns: Sequence[str], defaults: Dict[str, Callable[[], Any]]
+) -> Iterator[Tuple[Any, ...]]:
+    for row in rows:
+        yield tuple(
+            row[c] if c in row else defaults[c]() if c in defaults else None for c in columns
+        )
+
+
+def copy_update_columns(
+    columns: Sequence[str],
+    index_elements: Sequence[str],
+    update_columns: Optional[Sequence[str]],
+) -> List[str]:
+    """COPY合并时冲突行更新的列，默认只更新调用方传入的列，补齐默认值的列不覆盖已有数据"""
+    if update_columns is not None:
+        return list(update_columns)
+    return [c for c in columns if c not in index_elements and c != "create_by"]
+
+
+def copy_stmt(dialect: Dialect, table_name: str, columns: Sequence[str]) -> str:
+    quote = dialect.identifier_preparer.quote
+    return f"COPY {quote(table_name)} ({', '.join(quote(c) for c in columns)}) FROM STDIN"
+
+
+def staging_table_sql(dialect: Dialect, model: Any, columns: Sequence[str]) -> Tuple[str, str, str]:
+    """创建与目标表列类型一致、不带约束的临时表，用于COPY后再合并到目标表"""
+    quote = dialect.identifier_preparer.quote
+    staging_name = f"tmp_{model.__tablename__}_{uuid.uuid4().hex[:8]}"
+    create_sql = (
+        f"CREATE TEMP TABLE {quote(staging_name)} ON COMMIT DROP AS "
+        f"SELECT {', '.join(quote(c) for c in columns)} FROM {quote(model.__tablename__)} "
+        "WITH NO DATA"
+    )
+    drop_sql = f"DROP TABLE {quote(staging_name)}"
+    return staging_name, create_sql, drop_sql
+
+
+def merge_stmt(
+    model: Any,
+    staging_name: str,
+    columns: Sequence[str],
+    index_elements: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    update_by: Optional[int] = None,
+) -> PgInsert:
+    staging = table(staging_name, *[column(c) for c in columns])
+    stmt = pg_insert(model).from_select(list(columns), select(*staging.c), include_defaults=False)
+    return on_conflict_stmt(stmt, model, columns, index_elements, update_columns, update_by)
+
+
 class SyncBaseRepo(Generic[ModelT]):
     def __init__(self, logger: Logger):
         self.logger = logger
 
     def _check_type_arg(self) -> None:
+        if getattr(self, "_type_arg", None) is not None:
+            return
+
         self._type_arg = None
         for base in getattr(self, "__orig_bases__", []):
             if args := get_args(base):
@@ -93,15 +444,11 @@ class SyncBaseRepo(Generic[ModelT]):
         self._check_type_arg()
         session.execute(insert(self._type_arg).values(**kwargs))
 
-    def exists_when(self, session: AsyncSession, condition: Condition) -> bool:
+    def exists_when(self, session: Session, condition: Condition) -> bool:
         self._check_type_arg()
 
-        stmt = select(func.count("*")).where(*condition.to_condition())
-        if issubclass(self._type_arg, SoftDelete):
-            stmt = stmt.where(self._type_arg.delete_at.is_(None))
-        count = session.scalar(stmt)
-
-        return count > 0
+        stmt = exists_stmt(self._type_arg, *condition.to_condition())
+        return bool(session.scalar(stmt))
 
     def exists(self, session: Session, id: int) -> bool:
         self._check_type_arg()
@@ -110,16 +457,25 @@ class SyncBaseRepo(Generic[ModelT]):
             raise ValueError("id must be positive")
 
         if issubclass(self._type_arg, AutoIncrementID):
-            stmt = select(func.count(self._type_arg.id)).where(self._type_arg.id == id)
+            stmt = registered_stmt(self._type_arg, "exists_by_id", exists_by_id_stmt)
+            return bool(session.scalar(stmt, {"id": id}))
+        else:
+            raise RepoException("only support the model that extends AutoIncrementID")
 
-            if issubclass(self._type_arg, SoftDelete):
-                stmt = stmt.where(self._type_arg.delete_at.is_(None))
+    def exists_many(self, session: Session, ids: Iterable[int]) -> Set[int]:
+        """批量检查id是否存在，返回其中存在的id"""
+        self._check_type_arg()
 
-            count = session.scalar(stmt)
-            return count > 0
-        else:
+        if not issubclass(self._type_arg, AutoIncrementID):
             raise RepoException("only support the model that extends AutoIncrementID")
 
+        ids = set(ids)
+        if len(ids) == 0:
+            return set()
+
+        stmt = registered_stmt(self._type_arg, "exists_many", exists_many_stmt)
+        return set(session.scalars(stmt, {"ids": list(ids)}))
+
     def get_by_id(
         self,
         session: Session,
@@ -133,15 +489,12 @@ class SyncBaseRepo(Generic[ModelT]):
             raise ValueError("id must be positive")
 
         if issubclass(self._type_arg, AutoIncrementID):
-            stmt = select(self._type_arg)
+            stmt = registered_stmt(self._type_arg, "get_by_id", get_by_id_stmt)
 
             if len(options) > 0:
                 stmt = stmt.options(*options)
-            stmt = stmt.where(self._type_arg.id == id)
-            if issubclass(self._type_arg, SoftDelete):
-                stmt = stmt.where(self._type_arg.delete_at.is_(None))
 
-            result = session.scalars(stmt)
+            result = session.scalars(stmt, {"id": id})
             return result.one_or_none()
         else:
             raise RepoException("only support the model that extends AutoIncrementID")
@@ -150,6 +503,133 @@ class SyncBaseRepo(Generic[ModelT]):
         self._check_type_arg()
         session.execute(update(self._type_arg).where(self._type_arg.id == id).values(**kwargs))
 
+    def bulk_insert(
+        self,
+        session: Session,
+        rows: Sequence[Dict[str, Any]],
+        *,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> List[int]:
+        """批量插入，按batch_size分批执行，模型继承AutoIncrementID时按rows的顺序返回新增的id"""
+        self._check_type_arg()
+
+        ids: List[int] = []
+        stmt = bulk_insert_stmt(self._type_arg)
+        for batch in batched(rows, batch_size):
+            result = session.execute(stmt, batch)
+            if issubclass(self._type_arg, AutoIncrementID):
+                ids.extend(result.scalars())
+        return ids
+
+    def bulk_upsert(
+        self,
+        session: Session,
+        rows: Sequence[Dict[str, Any]],
+        *,
+        index_elements: Sequence[str],
+        update_columns: Optional[Sequence[str]] = None,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> List[int]:
+        """批量插入或更新，index_elements为唯一约束的列，返回插入或更新的行id"""
+        self._check_type_arg()
+
+        if len(rows) == 0:
+            return []
+
+        ids: List[int] = []
+        stmt = bulk_upsert_stmt(
+            self._type_arg, list(rows[0].keys()), index_elements, update_columns
+        )
+        for batch in batched(rows, batch_size):
+            result = session.execute(stmt, batch)
+            if issubclass(self._type_arg, AutoIncrementID):
+                ids.extend(result.scalars())
+        return ids
+
+    def bulk_update_by_ids(
+        self,
+        session: Session,
+        rows: Sequence[Dict[str, Any]],
+        *,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> None:
+        """按主键批量更新，每行必须包含id，各行可以更新不同的列"""
+        self._check_type_arg()
+
+        if not issubclass(self._type_arg, AutoIncrementID):
+            raise RepoException("only support the model that extends AutoIncrementID")
+
+        stmt = update(self._type_arg)
+        for batch in batched(rows, batch_size):
+            session.execute(stmt, batch)
+
+    def copy_records(
+        self,
+        session: Session,
+        rows: Iterable[Dict[str, Any]],
+        *,
+        columns: Sequence[str],
+        index_elements: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+        create_by: Optional[int] = None,
+    ) -> int:
+        """
+        通过psycopg的COPY流式写入大量数据，返回写入的行数
+
+        指定index_elements时先COPY到临时表，再通过INSERT ... ON CONFLICT合并到目标表。
+        未传入的列按模型python端的默认值补齐，default为SQL表达式的列由数据库默认值填充
+        """
+        self._check_type_arg()
+
+        connection = session.connection()
+        dialect = connection.dialect
+        if index_elements is not None:
+            update_columns = copy_update_columns(columns, index_elements, update_columns)
+        columns, defaults = copy_columns(self._type_arg, columns, create_by)
+        records = copy_records_iter(rows, columns, defaults)
+
+        target = self._type_arg.__tablename__
+        if index_elements is not None:
+            target, create_sql, drop_sql = staging_table_sql(dialect, self._type_arg, columns)
+            connection.exec_driver_sql(create_sql)
+
+        count = 0
+        driver_connection = connection.connection.driver_connection
+        with driver_connection.cursor() as cursor:
+            with cursor.copy(copy_stmt(dialect, target, columns)) as copy:
+                for record in records:
+                    copy.write_row(record)
+                    count += 1
+
+        if index_elements is not None:
+            session.execute(
+                merge_stmt(
+                    self._type_arg, target, columns, index_elements, update_columns, create_by
+                )
+            )
+            connection.exec_driver_sql(drop_sql)
+        return count
+
+    def _fetch_page_with_window_count(
+        self, session: Session, query_config: QueryConfig
+    ) -> Tuple[int, List[ModelT]]:
+        rows = session.execute(window_page_stmt(self._type_arg, query_config)).unique().all()
+        if len(rows) > 0:
+            return rows[0].total, [row[0] for row in rows]
+
+        # 页码超出范围时无法从窗口列获取总数，需单独统计
+        paginator = cast(Paginator, query_config.paginator)
+        if paginator.page == 1:
+            return 0, []
+        return session.scalar(count_stmt(self._type_arg, query_config)), []
+
+    def _estimate_count(self, session: Session, query_config: QueryConfig) -> int:
+        count = parse_explain_rows(session.scalar(explain_stmt(self._type_arg, query_config)))
+
+        if count < ESTIMATED_COUNT_THRESHOLD:
+            count = session.scalar(count_stmt(self._type_arg, query_config))
+        return count
+
     def fetch_list(
         self,
         session: Session,
@@ -162,24 +642,22 @@ class SyncBaseRepo(Generic[ModelT]):
         if len(query_config.options) > 0:
             stmt = stmt.options(*query_config.options)
 
+        if query_config.cursor_paginator is not None:
+            stmt = cursor_page_stmt(stmt, self._type_arg, query_config)
+            return None, list(session.scalars(stmt))
+
         if query_config.paginator is not None:
-            count_stmt = select(func.count("*"))
-            if query_config.condition is not None:
-                count_stmt = count_stmt.where(*query_config.condition.to_condition())
-                stmt = stmt.where(*query_config.condition.to_condition())
+            if query_config.count_mode == CountMode.window:
+                return self._fetch_page_with_window_count(session, query_config)
 
-            if issubclass(self._type_arg, SoftDelete):
-                count_stmt = count_stmt.where(self._type_arg.delete_at.is_(None))
-                stmt = stmt.where(self._type_arg.delete_at.is_(None))
+            if query_config.count_mode == CountMode.estimated:
+                count = self._estimate_count(session, query_config)
+            else:
+                count = session.scalar(count_stmt(self._type_arg, query_config))
 
-            count = session.scalar(count_stmt)
             model_list = []
             if count > 0:
-                stmt = stmt.offset(
-                    query_config.paginator.page_size * (query_config.paginator.page - 1)
-                ).limit(query_config.paginator.page_size)
-                if len(query_config.order_by) > 0:
-                    stmt = stmt.order_by(*query_config.order_by)
+                stmt = page_stmt(filter_stmt(stmt, self._type_arg, query_config), query_config)
                 model_list = session.scalars(stmt)
             return count, list(model_list)
         else:
@@ -212,6 +690,9 @@ class BaseRepo(Generic[ModelT]):
         self.logger = logger
 
     def _check_type_arg(self) -> None:
+        if getattr(self, "_type_arg", None) is not None:
+            return
+
         self._type_arg = None
         for base in getattr(self, "__orig_bases__", []):
             if args := get_args(base):
@@ -232,12 +713,8 @@ class BaseRepo(Generic[ModelT]):
     async def exists_when(self, session: AsyncSession, condition: Condition) -> bool:
         self._check_type_arg()
 
-        stmt = select(func.count("*")).where(*condition.to_condition())
-        if issubclass(self._type_arg, SoftDelete):
-            stmt = stmt.where(self._type_arg.delete_at.is_(None))
-        count = await session.scalar(stmt)
-
-        return count > 0
+        stmt = exists_stmt(self._type_arg, *condition.to_condition())
+        return bool(await session.scalar(stmt))
 
     async def exists(self, session: AsyncSession, id: int) -> bool:
         self._check_type_arg()
@@ -246,16 +723,25 @@ class BaseRepo(Generic[ModelT]):
             raise ValueError("id must be positive")
 
         if issubclass(self._type_arg, AutoIncrementID):
-            stmt = select(func.count(self._type_arg.id)).where(self._type_arg.id == id)
+            stmt = registered_stmt(self._type_arg, "exists_by_id", exists_by_id_stmt)
+            return bool(await session.scalar(stmt, {"id": id}))
+        else:
+            raise RepoException("only support the model that extends AutoIncrementID")
 
-            if issubclass(self._type_arg, SoftDelete):
-                stmt = stmt.where(self._type_arg.delete_at.is_(None))
+    async def exists_many(self, session: AsyncSession, ids: Iterable[int]) -> Set[int]:
+        """批量检查id是否存在，返回其中存在的id"""
+        self._check_type_arg()
 
-            count = await session.scalar(stmt)
-            return count > 0
-        else:
+        if not issubclass(self._type_arg, AutoIncrementID):
             raise RepoException("only support the model that extends AutoIncrementID")
 
+        ids = set(ids)
+        if len(ids) == 0:
+            return set()
+
+        stmt = registered_stmt(self._type_arg, "exists_many", exists_many_stmt)
+        return set(await session.scalars(stmt, {"ids": list(ids)}))
+
     async def get_by_id(
         self,
         session: AsyncSession,
@@ -269,15 +755,12 @@ class BaseRepo(Generic[ModelT]):
             raise ValueError("id must be positive")
 
         if issubclass(self._type_arg, AutoIncrementID):
-            stmt = select(self._type_arg)
+            stmt = registered_stmt(self._type_arg, "get_by_id", get_by_id_stmt)
 
             if len(options) > 0:
                 stmt = stmt.options(*options)
-            stmt = stmt.where(self._type_arg.id == id)
-            if issubclass(self._type_arg, SoftDelete):
-                stmt = stmt.where(self._type_arg.delete_at.is_(None))
 
-            result = await session.scalars(stmt)
+            result = await session.scalars(stmt, {"id": id})
             return result.one_or_none()
         else:
             raise RepoException("only support the model that extends AutoIncrementID")
@@ -288,6 +771,138 @@ class BaseRepo(Generic[ModelT]):
             update(self._type_arg).where(self._type_arg.id == id).values(**kwargs)
         )
 
+    async def bulk_insert(
+        self,
+        session: AsyncSession,
+        rows: Sequence[Dict[str, Any]],
+        *,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> List[int]:
+        """批量插入，按batch_size分批执行，模型继承AutoIncrementID时按rows的顺序返回新增的id"""
+        self._check_type_arg()
+
+        ids: List[int] = []
+        stmt = bulk_insert_stmt(self._type_arg)
+        for batch in batched(rows, batch_size):
+            result = await session.execute(stmt, batch)
+            if issubclass(self._type_arg, AutoIncrementID):
+                ids.extend(result.scalars())
+        return ids
+
+    async def bulk_upsert(
+        self,
+        session: AsyncSession,
+        rows: Sequence[Dict[str, Any]],
+        *,
+        index_elements: Sequence[str],
+        update_columns: Optional[Sequence[str]] = None,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> List[int]:
+        """批量插入或更新，index_elements为唯一约束的列，返回插入或更新的行id"""
+        self._check_type_arg()
+
+        if len(rows) == 0:
+            return []
+
+        ids: List[int] = []
+        stmt = bulk_upsert_stmt(
+            self._type_arg, list(rows[0].keys()), index_elements, update_columns
+        )
+        for batch in batched(rows, batch_size):
+            result = await session.execute(stmt, batch)
+            if issubclass(self._type_arg, AutoIncrementID):
+                ids.extend(result.scalars())
+        return ids
+
+    async def bulk_update_by_ids(
+        self,
+        session: AsyncSession,
+        rows: Sequence[Dict[str, Any]],
+        *,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> None:
+        """按主键批量更新，每行必须包含id，各行可以更新不同的列"""
+        self._check_type_arg()
+
+        if not issubclass(self._type_arg, AutoIncrementID):
+            raise RepoException("only support the model that extends AutoIncrementID")
+
+        stmt = update(self._type_arg)
+        for batch in batched(rows, batch_size):
+            await session.execute(stmt, batch)
+
+    async def copy_records(
+        self,
+        session: AsyncSession,
+        rows: Iterable[Dict[str, Any]],
+        *,
+        columns: Sequence[str],
+        index_elements: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+        create_by: Optional[int] = None,
+    ) -> int:
+        """
+        通过asyncpg的copy_records_to_table流式写入大量数据，返回写入的行数
+
+        指定index_elements时先COPY到临时表，再通过INSERT ... ON CONFLICT合并到目标表。
+        未传入的列按模型python端的默认值补齐，default为SQL表达式的列由数据库默认值填充
+        """
+        self._check_type_arg()
+
+        connection = await session.connection()
+        dialect = connection.dialect
+        if index_elements is not None:
+            update_columns = copy_update_columns(columns, index_elements, update_columns)
+        columns, defaults = copy_columns(self._type_arg, columns, create_by)
+        records = copy_records_iter(rows, columns, defaults)
+
+        target = self._type_arg.__tablename__
+        if index_elements is not None:
+            target, create_sql, drop_sql = staging_table_sql(dialect, self._type_arg, columns)
+            await connection.exec_driver_sql(create_sql)
+
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        if not driver_connection.is_in_transaction():
+            # SQLAlchemy的asyncpg适配层在执行第一条语句时才发送BEGIN，COPY直接使用asyncpg连接，
+            # 需要先执行一条语句开启会话的事务，否则COPY在事务外提交，不随会话回滚
+            await connection.exec_driver_sql("SELECT 1")
+
+        status = await driver_connection.copy_records_to_table(
+            target, records=records, columns=columns
+        )
+
+        if index_elements is not None:
+            await session.execute(
+                merge_stmt(
+                    self._type_arg, target, columns, index_elements, update_columns, create_by
+                )
+            )
+            await connection.exec_driver_sql(drop_sql)
+        # asyncpg返回命令状态，形如"COPY 100"
+        return int(status.split()[-1])
+
+    async def _fetch_page_with_window_count(
+        self, session: AsyncSession, query_config: QueryConfig
+    ) -> Tuple[int, List[ModelT]]:
+        result = await session.execute(window_page_stmt(self._type_arg, query_config))
+        rows = result.unique().all()
+        if len(rows) > 0:
+            return rows[0].total, [row[0] for row in rows]
+
+        # 页码超出范围时无法从窗口列获取总数，需单独统计
+        paginator = cast(Paginator, query_config.paginator)
+        if paginator.page == 1:
+            return 0, []
+        return await session.scalar(count_stmt(self._type_arg, query_config)), []
+
+    async def _estimate_count(self, session: AsyncSession, query_config: QueryConfig) -> int:
+        count = parse_explain_rows(await session.scalar(explain_stmt(self._type_arg, query_config)))
+
+        if count < ESTIMATED_COUNT_THRESHOLD:
+            count = await session.scalar(count_stmt(self._type_arg, query_config))
+        return count
+
     async def fetch_list(
         self,
         session: AsyncSession,
@@ -300,24 +915,22 @@ class BaseRepo(Generic[ModelT]):
         if len(query_config.options) > 0:
             stmt = stmt.options(*query_config.options)
 
+        if query_config.cursor_paginator is not None:
+            stmt = cursor_page_stmt(stmt, self._type_arg, query_config)
+            return None, list(await session.scalars(stmt))
+
         if query_config.paginator is not None:
-            count_stmt = select(func.count("*"))
-            if query_config.condition is not None:
-                count_stmt = count_stmt.where(*query_config.condition.to_condition())
-                stmt = stmt.where(*query_config.condition.to_condition())
+            if query_config.count_mode == CountMode.window:
+                return await self._fetch_page_with_window_count(session, query_config)
 
-            if issubclass(self._type_arg, SoftDelete):
-                count_stmt = count_stmt.where(self._type_arg.delete_at.is_(None))
-                stmt = stmt.where(self._type_arg.delete_at.is_(None))
+            if query_config.count_mode == CountMode.estimated:
+                count = await self._estimate_count(session, query_config)
+            else:
+                count = await session.scalar(count_stmt(self._type_arg, query_config))
 
-            count = await session.scalar(count_stmt)
             model_list = []
             if count > 0:
-                stmt = stmt.offset(
-                    query_config.paginator.page_size * (query_config.paginator.page - 1)
-                ).limit(query_config.paginator.page_size)
-                if len(query_config.order_by) > 0:
-                    stmt = stmt.order_by(*query_config.order_by)
+                stmt = page_stmt(filter_stmt(stmt, self._type_arg, query_config), query_config)
                 model_list = await session.scalars(stmt)
             return count, list(model_list)
         else:
@@ -1,8 +1,25 @@
 from enum import Enum
-from typing import Any
+from typing import Any, Dict, List
 
 
 class BaseEnum(Enum):
+    # 值 -> 枚举成员、名称 -> 枚举成员，在枚举类创建时构建
+    _value_member_map: Dict[Any, "BaseEnum"]
+    _name_member_map: Dict[str, "BaseEnum"]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # python3.11起，__init_subclass__被调用时枚举成员已创建完成
+        cls._value_member_map = {}
+        cls._name_member_map = {}
+        for member in cls:
+            try:
+                cls._value_member_map.setdefault(member.value, member)
+            except TypeError:
+                # 不可哈希的值在load时回退为逐个比较
+                pass
+            cls._name_member_map[member.name] = member
+
     @classmethod
     def load(cls, value: Any):
         """
@@ -12,10 +29,14 @@ class BaseEnum(Enum):
         :return 配的枚举成员
         :raise ValueError 找不到匹配的枚举成员时
         """
-        for member in cls:
-            if member.value == value:
-                return member
-        raise ValueError(f"值 '{value}' 在枚举 {cls.__name__} 中未找到")
+        try:
+            member = cls._value_member_map.get(value)
+        except TypeError:
+            member = next((member for member in cls if member.value == value), None)
+
+        if member is None:
+            raise ValueError(f"值 '{value}' 在枚举 {cls.__name__} 中未找到")
+        return member
 
     @classmethod
     def load_by_name(cls, name: str):
@@ -26,10 +47,10 @@ class BaseEnum(Enum):
         :return 匹配的枚举成员
         :raise ValueError 找不到匹配的枚举成员时
         """
-        for member in cls:
-            if member.name == name:
-                return member
-        raise ValueError(f"名称 '{name}' 在枚举 {cls.__name__} 中未找到")
+        member = cls._name_member_map.get(name)
+        if member is None:
+            raise ValueError(f"名称 '{name}' 在枚举 {cls.__name__} 中未找到")
+        return member
 
 
 class LabeledEnum(BaseEnum):
@@ -47,11 +68,17 @@ class LabeledEnum(BaseEnum):
         self._value_ = value
         self.label = label
 
+    _dict_list: List[Dict[str, Any]]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dict_list = [{"label": member.label, "value": member.value} for member in cls]
+
     @classmethod
     def to_dict_list(cls):
         """
         将枚举的所有项转换为字典数组
-        每个字典包含'value'和'label'两个键
+        每个字典包含'value'和'label'两个键，由枚举类创建时生成的结果复制，调用方可以修改
         :return: 包含所有枚举项字典的列表
         """
-        return [{"label": member.label, "value": member.value} for member in cls]
+        return [dict(item) for item in cls._dict_list]
@@ -1,19 +1,111 @@
+import time
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
 import redis.asyncio as redis
 
 from llmops_api.base.config.config import RedisConfig
+from llmops_api.base.db.instrument import render_labels
+
+# 当前获取连接的调用开始等待的时间
+_wait_started: ContextVar[float] = ContextVar("redis_pool_wait_started", default=0.0)
+
+
+@dataclass
+class RedisPoolMetrics:
+    max_connections: int
+    in_use: int
+    idle: int
+    # 获取连接的次数及等待耗时(秒)
+    wait_count: int
+    wait_time_total: float
+    wait_time_max: float
+
+    def render(self, labels: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Prometheus文本格式的连接池指标，labels附加到每个样本上"""
+        return [
+            "# TYPE redis_pool_max_connections gauge",
+            f"redis_pool_max_connections{render_labels(labels)} {self.max_connections}",
+            "# TYPE redis_pool_connections gauge",
+            f"redis_pool_connections{render_labels(labels, state='in_use')} {self.in_use}",
+            f"redis_pool_connections{render_labels(labels, state='idle')} {self.idle}",
+            "# TYPE redis_pool_wait_total counter",
+            f"redis_pool_wait_total{render_labels(labels)} {self.wait_count}",
+            "# TYPE redis_pool_wait_seconds_total counter",
+            f"redis_pool_wait_seconds_total{render_labels(labels)} {self.wait_time_total}",
+            "# TYPE redis_pool_wait_seconds_max gauge",
+            f"redis_pool_wait_seconds_max{render_labels(labels)} {self.wait_time_max}",
+        ]
+
+
+class MetricsConnectionPool(redis.BlockingConnectionPool):
+    """
+    连接数达到上限时等待空闲连接，并统计获取连接的等待耗时
+
+    等待耗时只统计到连接池交出连接为止，不包含之后建立连接、检查连接的时间
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.wait_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    async def get_connection(self, *args, **kwargs):
+        token = _wait_started.set(time.perf_counter())
+        try:
+            return await super().get_connection(*args, **kwargs)
+        finally:
+            _wait_started.reset(token)
+
+    async def ensure_connection(self, connection):
+        # 连接池交出连接之后、建立或检查连接之前调用
+        elapsed = time.perf_counter() - _wait_started.get()
+        self.wait_count += 1
+        self.wait_time_total += elapsed
+        self.wait_time_max = max(self.wait_time_max, elapsed)
+
+        await super().ensure_connection(connection)
+
+    def metrics(self) -> RedisPoolMetrics:
+        return RedisPoolMetrics(
+            max_connections=self.max_connections,
+            in_use=len(self._in_use_connections),
+            idle=len(self._available_connections),
+            wait_count=self.wait_count,
+            wait_time_total=self.wait_time_total,
+            wait_time_max=self.wait_time_max,
+        )
 
 
 class Redis:
     def __init__(self, config: RedisConfig):
-        self._pool = redis.ConnectionPool.from_url(config.url)  # type: ignore
+        self._pool = MetricsConnectionPool.from_url(
+            config.url,  # type: ignore
+            max_connections=config.max_connections,
+            timeout=config.pool_timeout,
+            health_check_interval=config.health_check_interval,
+        )
+
+        # 单例模式下所有调用方共享同一个客户端，避免每次使用时创建和关闭客户端
+        self._client = redis.Redis(connection_pool=self._pool) if config.singleton_client else None
 
     async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
         await self._pool.aclose()
 
+    def metrics(self) -> RedisPoolMetrics:
+        return self._pool.metrics()
+
     @asynccontextmanager
     async def client(self):
+        if self._client is not None:
+            yield self._client
+            return
+
         client = redis.Redis(connection_pool=self._pool)
         yield client
         await client.aclose()
@@ -4,6 +4,7 @@ from llmops_api.api.action import router as actionRouter
 from llmops_api.api.auth import router as authRouter
 from llmops_api.api.menu import router as menuRouter
 from llmops_api.api.menu_action import router as menuActionRouter
+from llmops_api.api.metrics import router as metricsRouter
 from llmops_api.api.permissisons import router as permissionsRouter
 from llmops_api.api.role import router as roleRouter
 from llmops_api.api.user import router as userRouter
@@ -16,6 +17,7 @@ routers = [
     menuActionRouter,
     roleRouter,
     permissionsRouter,
+    metricsRouter,
 ]
 
 
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+
+
+@dataclass
+class SpooledFile:
+    path: str
+    size: int
+
+
+class UploadSpool:
+    """
+    上传文件落盘
+
+    上传内容按块复制到spool_dir下，任务消息中只传递落盘路径，
+    worker由路径流式读取，文件大小不再影响broker消息和worker内存；
+    解析成功后由worker删除，解析失败的文件保留ttl秒后由sweep清理
+    """
+
+    def __init__(self, spool_dir: str, chunk_size: int, ttl: int):
+        self.spool_dir = spool_dir
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+
+    def _new_path(self, namespace: str, filename: str) -> Path:
+        # 保留原扩展名，解析时依赖扩展名判断文件类型
+        suffix = Path(filename).suffix.lower()
+        return Path(self.spool_dir, namespace, f"{uuid.uuid4().hex}{suffix}")
+
+    def _copy(self, source: BinaryIO, path: Path) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再改名，worker不会读到写了一半的文件
+        partial = path.with_name(f"{path.name}.part")
+        try:
+            with open(partial, "wb") as target:
+                shutil.copyfileobj(source, target, self.chunk_size)
+                size = target.tell()
+            os.replace(partial, path)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        return size
+
+    async def save(self, upload: UploadFile, namespace: str) -> SpooledFile:
+        path = self._new_path(namespace, upload.filename or "")
+        await upload.seek(0)
+        size = await asyncio.to_thread(self._copy, upload.file, path)
+        return SpooledFile(path=str(path), size=size)
+
+    @staticmethod
+    def remove(path: str) -> None:
+        Path(path).unlink(missing_ok=True)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """删除修改时间早于ttl的落盘文件(包括写了一半的临时文件)，返回删除的文件数"""
+        expire_before = (time.time() if now is None else now) - self.ttl
+        removed = 0
+        for path in Path(self.spool_dir).glob("*/*"):
+            try:
+                if path.is_file() and path.stat().st_mtime < expire_before:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                # 其他进程同时清理或已删除
+                continue
+        return removed
@@ -47,4 +47,7 @@ class PaginationListViewModel(BaseModel, Generic[ViewModelT]):
     items: Annotated[List[ViewModelT], Field(default_factory=list, description="数据列表")]
     page: Annotated[int, Field(description="页码")]
     page_size: Annotated[int, Field(description="页长")]
-    total: Annotated[int, Field(description="数据总长度")]
+    total: Annotated[Optional[int], Field(default=None, description="数据总长度，游标分页时不统计")]
+    next_cursor: Annotated[
+        Optional[str], Field(default=None, description="下一页游标，为空时没有下一页")
+    ]
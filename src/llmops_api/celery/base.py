@@ -8,7 +8,7 @@ container = init_celery_container()
 register_msgpack_with_pydantic()
 
 
-app = Celery()
+app = Celery(include=["llmops_api.tasks.knowledge"])
 
 app.conf.update(
     broker_url=container.config().celery.broker.url,
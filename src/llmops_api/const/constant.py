@@ -1,4 +1,6 @@
 import multiprocessing
+import os
+import tempfile
 
 import httpx
 
@@ -9,6 +11,18 @@ DEFAULT_DATABASE_HOST = "127.0.0.1"
 DEFAULT_DATABASE_PORT = "5432"
 DEFAULT_DATABASE_SCHEMA = "public"
 DEFAULT_DATABASE_USER = "llmops"
+# 默认事务隔离级别，READ COMMITTED、REPEATABLE READ或SERIALIZABLE
+DEFAULT_DATABASE_ISOLATION_LEVEL = "READ COMMITTED"
+# 只读副本，格式为host:port，多个以逗号分隔，为空时只读查询也走主库
+DEFAULT_DATABASE_REPLICA_HOSTS = ""
+# 副本选择策略，round_robin或least_connections
+DEFAULT_DATABASE_REPLICA_STRATEGY = "round_robin"
+# 副本复制延迟超过该秒数时不再路由到该副本
+DEFAULT_DATABASE_REPLICA_MAX_LAG = 5.0
+# 后台检查副本复制延迟的间隔(秒)，超过两个间隔未检查成功的副本不再使用
+DEFAULT_DATABASE_REPLICA_LAG_CHECK_INTERVAL = 10.0
+# 单次检查副本延迟的超时时间(秒)，包含建立连接，超时的副本视为不可用
+DEFAULT_DATABASE_REPLICA_LAG_CHECK_TIMEOUT = 2.0
 
 DEBUG_MODE = False
 
@@ -19,6 +33,14 @@ DEFAULT_SQLALCHEMY_POOL_MAX_OVERFLOW = DEFAULT_SQLALCHEMY_POOL_SIZE // 2
 DEFAULT_SQLALCHEMY_POOL_RECYLE = 60 * 60
 DEFAULT_SQLALCHEMY_POOL_TIMEOUT = 5 * 60
 DEFAULT_SQLALCHEMY_ECHO = False
+# 执行耗时超过该秒数的语句记录为慢查询
+DEFAULT_SQLALCHEMY_SLOW_QUERY_THRESHOLD = 0.5
+# SQLAlchemy按语句结构缓存编译结果的条目数
+DEFAULT_SQLALCHEMY_QUERY_CACHE_SIZE = 1200
+# asyncpg每个连接缓存的预编译语句数，为0时不缓存
+DEFAULT_DATABASE_PREPARED_STATEMENT_CACHE_SIZE = 100
+# 经过PgBouncer事务池连接时，预编译语句使用唯一名称，避免不同后端连接间的名称冲突
+DEFAULT_DATABASE_PGBOUNCER = False
 
 DEFAULT_CORS_ALLOW_ORIGINS = "127.0.0.1:3000,localhost:3000"
 DEFAULT_CORS_ALLOW_CREDENTIALS = True
@@ -31,9 +53,17 @@ DEFAULT_REDIS_USER_NAME = "llmops"
 DEFAULT_REDIS_HOST = "127.0.0.1"
 DEFAULT_REDIS_PORT = "6379"
 DEFAULT_REDIS_DB = 0
+DEFAULT_REDIS_SINGLETON_CLIENT = True
+DEFAULT_REDIS_MAX_CONNECTIONS = 50
+DEFAULT_REDIS_POOL_TIMEOUT = 5
+DEFAULT_REDIS_HEALTH_CHECK_INTERVAL = 30
 
 DEFAULT_ACCESS_TOKEN_EXPIRE = 60 * 60
 DEFAULT_REFRESH_TOKEN_EXPIRE = 30 * 24 * 60 * 60
+DEFAULT_ACCESS_TOKEN_CACHE_SIZE = 10000
+DEFAULT_ACCESS_TOKEN_CACHE_TTL = 5 * 60
+DEFAULT_PERMISSION_TREE_CACHE_SIZE = 10000
+DEFAULT_PERMISSION_TREE_CACHE_TTL = 60 * 60
 
 DEFAULT_ARK_MAX_RETRIES = 2
 DEFAULT_ARK_TIMEOUT_SECONDS = 600.0
@@ -63,3 +93,10 @@ DEFAULT_CELERY_BACKEND_SQLALCHEMY_POOL_TIMEOUT = 5 * 60
 DEFAULT_WORKER_PREFETCH_MULTIPLIER = 4
 DEFAULT_WORKER_MAX_TASKS_PER_CHILD = 100
 DEFAULT_RESULT_EXPIRES = 15 * 24 * 60 * 60
+
+# 上传文件落盘目录，api和worker需能访问同一路径(同机或共享挂载)，任务消息中只传递文件路径
+DEFAULT_UPLOAD_SPOOL_DIR = os.path.join(tempfile.gettempdir(), "llmops", "uploads")
+# 上传文件落盘时每次复制的字节数
+DEFAULT_UPLOAD_SPOOL_CHUNK_SIZE = 1024 * 1024
+# 落盘文件解析成功后即删除，解析失败的文件保留多久(秒)后清理
+DEFAULT_UPLOAD_SPOOL_TTL = 24 * 60 * 60
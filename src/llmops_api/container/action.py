@@ -8,12 +8,14 @@ class Container(containers.DeclarativeContainer):
     logger = providers.Dependency()
     menu_repo = providers.Dependency()
     action_repo = providers.Dependency()
+    permission_tree_cache = providers.Dependency()
     enforcer = providers.Dependency()
 
     action_service = providers.Singleton(
         ActionService,
         casbin_enforcer=enforcer,
         action_repo=action_repo,
+        permission_tree_cache=permission_tree_cache,
         menu_repo=menu_repo,
         transaction_factory=db.provided.transaction_session,
         logger=logger.provided.bind.call(name="action-service"),
@@ -1,19 +1,21 @@
 from dependency_injector import containers, providers
 
-from llmops_api.service.auth import AuthService
+from llmops_api.service.auth import new_auth_service
 
 
 class Container(containers.DeclarativeContainer):
     db = providers.Dependency()
     redis = providers.Dependency()
+    token_cache = providers.Dependency()
     logger = providers.Dependency()
     repo = providers.Dependency()
     auth_config = providers.Dependency()
     auth_service = providers.Singleton(
-        AuthService,
+        new_auth_service,
         repo=repo,
         transaction_factory=db.provided.transaction_session,
         redis_client_factory=redis.provided.client,
+        token_cache=token_cache,
         logger=logger.provided.bind.call(name="user-service"),
         auth_config=auth_config,
     )
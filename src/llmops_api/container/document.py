@@ -8,10 +8,12 @@ class Container(containers.DeclarativeContainer):
     logger = providers.Dependency()
     document_repo = providers.Dependency()
     knowledge_repo = providers.Dependency()
+    upload_spool = providers.Dependency()
     document_service = providers.Singleton(
         DocumentService,
         logger=logger.provided.bind.call(name="document-service"),
         transaction_factory=db.provided.transaction_session,
         document_repo=document_repo,
         knowledge_repo=knowledge_repo,
+        upload_spool=upload_spool,
     )
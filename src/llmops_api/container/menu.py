@@ -8,10 +8,12 @@ class Container(containers.DeclarativeContainer):
     logger = providers.Dependency()
     menu_repo = providers.Dependency()
     action_repo = providers.Dependency()
+    permission_tree_cache = providers.Dependency()
     menu_service = providers.Singleton(
         MenuService,
         menu_repo=menu_repo,
         action_repo=action_repo,
+        permission_tree_cache=permission_tree_cache,
         transaction_factory=db.provided.transaction_session,
         logger=logger.provided.bind.call(name="menu-service"),
     )
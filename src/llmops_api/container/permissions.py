@@ -10,6 +10,7 @@ class Container(containers.DeclarativeContainer):
     enforcer = providers.Dependency()
     menu_repo = providers.Dependency()
     action_repo = providers.Dependency()
+    permission_tree_cache = providers.Dependency()
     user_repo = providers.Dependency()
     role_repo = providers.Dependency()
 
@@ -18,8 +19,10 @@ class Container(containers.DeclarativeContainer):
         casbin_enforcer=enforcer,
         menu_repo=menu_repo,
         action_repo=action_repo,
+        permission_tree_cache=permission_tree_cache,
         user_repo=user_repo,
         role_repo=role_repo,
         transaction_factory=db.provided.transaction_session,
+        read_session_factory=db.provided.read_session,
         logger=logger.provided.bind.call(name="permissions-service"),
     )
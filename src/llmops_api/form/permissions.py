@@ -1,4 +1,4 @@
-from typing import Annotated
+from typing import Annotated, List
 
 from pydantic import BaseModel, Field
 
@@ -19,3 +19,24 @@ class AddRoleActionForm(BaseModel):
 
 class DeleteRoleActionForm(AddRoleActionForm):
     pass
+
+
+class PermissionCheckForm(BaseModel):
+    user_id: Annotated[int, Field(description="用户ID")]
+    path: Annotated[str, Field(description="后端接口路径")]
+    method: Annotated[str, Field(description="后端接口方法")]
+
+
+class BatchPermissionsForm(BaseModel):
+    checks: Annotated[
+        List[PermissionCheckForm],
+        Field(description="需要校验的用户权限", default_factory=list, max_length=200),
+    ]
+    user_ids: Annotated[
+        List[int],
+        Field(description="需要获取权限树的用户ID", default_factory=list, max_length=100),
+    ]
+    role_ids: Annotated[
+        List[int],
+        Field(description="需要获取权限的角色ID", default_factory=list, max_length=100),
+    ]
@@ -6,7 +6,7 @@ from sqlalchemy import or_
 from sqlalchemy.sql._typing import _ColumnExpressionArgument
 
 from llmops_api.base.db.model import User
-from llmops_api.base.db.repo import Condition, Paginator
+from llmops_api.base.db.repo import Condition, CursorPaginator, Paginator
 
 
 class AddUserForm(BaseModel):
@@ -86,6 +86,17 @@ class EditUserForm(BaseModel):
 
 class UserListQuery(Paginator, Condition):
     query: Annotated[str, Field(default="", description="query")]
+    cursor: Annotated[
+        Optional[str],
+        Field(default=None, description="分页游标，传入时按游标分页，忽略页码且不统计总数"),
+    ]
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, v: Optional[str]):
+        if v is not None:
+            CursorPaginator.decode_cursor(v)
+        return v
 
     def to_condition(self) -> List[_ColumnExpressionArgument[bool]]:
         if self.query != "":
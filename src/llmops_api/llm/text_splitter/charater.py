@@ -1,11 +1,14 @@
 import copy
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from langchain_core.documents.base import Document
 from langchain_text_splitters import (
     RecursiveCharacterTextSplitter as _RecursiveCharacterTextSplitter,
 )
 
+# 增量切分时缓冲区达到chunk_size的多少倍后切分一次
+STREAM_BUFFER_CHUNKS = 16
+
 
 class RecursiveCharacterTextSplitter(_RecursiveCharacterTextSplitter):
     def create_documents(
@@ -29,3 +32,71 @@ class RecursiveCharacterTextSplitter(_RecursiveCharacterTextSplitter):
                 new_doc = Document(page_content=chunk, metadata=metadata)
                 documents.append(new_doc)
         return documents
+
+    def split_text_stream(
+        self, texts: Iterable[str], separator: str = "\n\n"
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        增量切分，texts逐段以separator拼接，产出(片段在完整文本中的起始位置, 片段)
+
+        缓冲区超过chunk_size * STREAM_BUFFER_CHUNKS后切分一次，除最后一个片段外立即产出，
+        最后一个片段可能还没写满，连同之后的文本留到下一次切分，内存只保留缓冲区；
+        最后一个片段超过chunk_size时一并产出，留到下一次切分的文本不超过chunk_size
+        """
+        flush_size = self._chunk_size * STREAM_BUFFER_CHUNKS
+        parts: List[str] = []
+        buffered = 0
+        # 缓冲区在完整文本中的起始位置
+        base = 0
+
+        for text in texts:
+            if not text:
+                continue
+            parts.append(text)
+            buffered += len(text) + len(separator)
+            if buffered < flush_size:
+                continue
+
+            buffer = separator.join(parts)
+            chunks = self.split_text(buffer)
+            if chunks and len(chunks[-1]) <= self._chunk_size:
+                yield from self._locate_chunks(buffer, chunks[:-1], base)
+
+                # 最后一个片段及其后的空白留在缓冲区
+                tail_start = buffer.rfind(chunks[-1])
+                base += tail_start
+                parts = [buffer[tail_start:]]
+                buffered = len(parts[0]) + len(separator)
+            else:
+                # 超过chunk_size的片段(分隔符中没有""时无法再切分)不留在缓冲区，
+                # 否则没有分隔符的长文本会被反复切分
+                yield from self._locate_chunks(buffer, chunks, base)
+                base += len(buffer) + len(separator)
+                parts = []
+                buffered = 0
+
+        buffer = separator.join(parts)
+        yield from self._locate_chunks(buffer, self.split_text(buffer), base)
+
+    def _locate_chunks(
+        self, buffer: str, chunks: List[str], base: int
+    ) -> Iterator[Tuple[int, str]]:
+        index = 0
+        previous_chunk_len = 0
+        for chunk in chunks:
+            offset = index + previous_chunk_len - self._chunk_overlap
+            index = buffer.find(chunk, max(0, offset))
+            previous_chunk_len = len(chunk)
+            yield base + index, chunk
+
+    def create_documents_stream(
+        self, texts: Iterable[str], metadata: Optional[dict] = None
+    ) -> Iterator[Document]:
+        """增量切分texts，片段写满即产出Document，下游不必等全部切分完成即可开始向量化"""
+        _metadata = metadata or {}
+        for index, chunk in self.split_text_stream(texts):
+            chunk_metadata = copy.deepcopy(_metadata)
+            if self._add_start_index:
+                chunk_metadata["start_index"] = index
+            chunk_metadata["charaters_count"] = len(chunk)
+            yield Document(page_content=chunk, metadata=chunk_metadata)
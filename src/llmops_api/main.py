@@ -1,11 +1,12 @@
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from llmops_api.base.casbin import enforcer
 from llmops_api.base.container import init_container
+from llmops_api.base.db.instrument import query_stats_scope
 from llmops_api.base.exception import error_handlers
 from llmops_api.base.response import responses
 from llmops_api.base.routers import add_routers
@@ -15,14 +16,21 @@ from llmops_api.base.routers import add_routers
 async def lifespan(app: FastAPI):
     logger = app.container.logger()  # type: ignore
     db = app.container.db()  # type: ignore
+    # 只读副本的复制延迟在后台检查，请求路径不等待检查
+    await db.start_replica_monitor()
     casbin_enforcer: enforcer.CasbinEnforcer = await app.container.casbin_enforcer()  # type: ignore
+    token_cache = await app.container.token_cache()  # type: ignore
     redis = app.container.redis()  # type: ignore
+    # 预先加载token相关的lua脚本
+    await app.container.auth_module.auth_service()  # type: ignore
 
     yield
     logger.info("start close db engine...")
+    await db.stop_replica_monitor()
     await db.close()
     logger.info("db engine closed...")
     casbin_enforcer.watcher.stop_subscribe_msg()
+    token_cache.stop_subscribe_msg()
 
     await redis.close()
 
@@ -56,6 +64,23 @@ app.add_middleware(
     ),
 )
 
+
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    """按请求统计数据库语句数量和耗时，写入日志的payload，便于发现N+1查询"""
+    with query_stats_scope() as stats:
+        response = await call_next(request)
+
+    if stats.statements > 0:
+        container.logger().bind(
+            name="db-stats",
+            method=request.method,
+            path=request.url.path,
+            **stats.to_payload(),
+        ).info("request db stats")
+    return response
+
+
 # 添加路由
 add_routers(app)
 
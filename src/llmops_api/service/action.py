@@ -5,6 +5,7 @@ from loguru._logger import Logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from llmops_api.base.cache.versioned_cache import VersionedCache
 from llmops_api.base.casbin.enforcer import CasbinEnforcer
 from llmops_api.base.db.repo import QueryConfig
 from llmops_api.base.view.model import ListViewModel
@@ -22,12 +23,14 @@ class ActionService:
         casbin_enforcer: CasbinEnforcer,
         action_repo: ActionRepo,
         menu_repo: MenuRepo,
+        permission_tree_cache: VersionedCache,
         transaction_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
         logger: Logger,
     ):
         self.casbin_enforcer = casbin_enforcer
         self.action_repo = action_repo
         self.menu_repo = menu_repo
+        self.permission_tree_cache = permission_tree_cache
         self.transaction_factory = transaction_factory
         self.logger = logger
 
@@ -62,7 +65,7 @@ class ActionService:
                 ),
             )
 
-            view_list = [action.to_pydantic(ActionViewModel) for action in action_list]
+            view_list = Action.to_pydantic_list(action_list, ActionViewModel)
             return ListViewModel[ActionViewModel](items=view_list)
 
     async def _check_action_name_exists(self, session: AsyncSession, name: str):
@@ -82,7 +85,11 @@ class ActionService:
 
             await self.action_repo.add(session, action)
 
-            return action.to_pydantic(ActionViewModel)
+            action_view = action.to_pydantic(ActionViewModel)
+
+        # 事务提交后再使用户权限树缓存失效，避免缓存中写入变更前的数据
+        await self.permission_tree_cache.bump_version()
+        return action_view
 
     async def delete_action(self, action_id: int) -> None:
         async with self.transaction_factory() as session:
@@ -100,6 +107,8 @@ class ActionService:
 
             await self.action_repo.remove_by_id(session, action_id)
 
+        await self.permission_tree_cache.bump_version()
+
     async def edit_action(self, action_id: int, **kwargs: Any) -> ActionViewModel:
         async with self.transaction_factory() as session:
             action_exists = await self.action_repo.exists(session, action_id)
@@ -112,4 +121,6 @@ class ActionService:
                 await self._check_action_name_exists(session, name)
 
             await self.action_repo.update_by_id(session, action_id, **kwargs)
+
+        await self.permission_tree_cache.bump_version()
         return await self.get_action(action_id)
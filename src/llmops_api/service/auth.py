@@ -2,12 +2,14 @@ import base64
 import uuid
 from contextlib import AbstractAsyncContextManager
 from dataclasses import dataclass
-from typing import Callable
+from typing import Any, Callable, List, Optional
 
 from loguru._logger import Logger
 from redis.asyncio.client import Redis
+from redis.exceptions import NoScriptError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from llmops_api.base.cache.synced_cache import RedisSyncedCache
 from llmops_api.base.config.config import AuthConfig
 from llmops_api.exception.auth import (
     AccessTokenExpire,
@@ -18,7 +20,6 @@ from llmops_api.exception.auth import (
 )
 from llmops_api.repo.user import UserRepo
 from llmops_api.view.auth import TokensViewModel
-from llmops_api.view.user import UserViewModel
 
 
 @dataclass
@@ -28,20 +29,49 @@ class TokensInfo:
     user_id: int
 
 
+# KEYS: 旧access_token, 旧refresh_token, 新access_token, 新refresh_token
+# ARGV: access_token过期时间, refresh_token过期时间
+REFRESH_TOKENS_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return -1
+end
+
+local user_id = redis.call("GET", KEYS[2])
+if not user_id then
+    return -2
+end
+
+redis.call("DEL", KEYS[2])
+redis.call("SET", KEYS[3], user_id, "EX", ARGV[1])
+redis.call("SET", KEYS[4], user_id, "EX", ARGV[2])
+return user_id
+"""
+
+REFRESH_ACCESS_TOKEN_NOT_EXPIRE = -1
+REFRESH_REFRESH_TOKEN_EXPIRE = -2
+
+
 class AuthService:
     def __init__(
         self,
         repo: UserRepo,
         transaction_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
         redis_client_factory: Callable[..., AbstractAsyncContextManager[Redis]],
+        token_cache: RedisSyncedCache,
         auth_config: AuthConfig,
         logger: Logger,
     ):
         self.repo = repo
         self.transaction_factory = transaction_factory
         self.redis_client_factory = redis_client_factory
+        self.token_cache = token_cache
         self.auth_config = auth_config
         self.logger = logger
+        self._refresh_tokens_sha: Optional[str] = None
+
+    async def init(self):
+        async with self.redis_client_factory() as client:
+            self._refresh_tokens_sha = await client.script_load(REFRESH_TOKENS_SCRIPT)
 
     async def login(self, username: str, password: str) -> TokensViewModel:
         async with self.transaction_factory() as session:
@@ -66,14 +96,28 @@ class AuthService:
             user.update_by = user_id
             await self.repo.add(session, user)
 
-    async def fetch_user_id(self, access_token: str) -> UserViewModel:
+    async def fetch_user_id(self, access_token: str) -> int:
+        access_token_key = self._get_access_token_key(access_token)
+
+        user_id = self.token_cache.get(access_token_key)
+        if user_id is not None:
+            return user_id
+
         async with self.redis_client_factory() as client:
-            user_id = await client.get(self._get_access_token_key(access_token))
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.get(access_token_key)
+                pipe.pttl(access_token_key)
+                payload, pttl = await pipe.execute()
+
+        if payload is None:
+            raise AccessTokenExpire
 
-            if user_id is None:
-                raise AccessTokenExpire
+        user_id = int(payload.decode("utf-8"))
+        # 本地缓存的有效期不超过token的剩余有效期
+        if pttl > 0:
+            self.token_cache.set(access_token_key, user_id, pttl / 1000)
 
-            return int(user_id.decode("utf-8"))
+        return user_id
 
     async def refresh_token(self, access_token: str, refresh_token: str):
         return await self._refresh_tokens(access_token, refresh_token)
@@ -104,41 +148,56 @@ class AuthService:
         async with self.redis_client_factory() as client:
             access_token_key = self._get_access_token_key(info.access_token)
             refresh_token_key = self._get_refresh_token_key(info.access_token, info.refresh_token)
-            await client.set(
-                access_token_key,
-                str(info.user_id),
-                ex=self.auth_config.access_token_expire,
-            )
-            await client.set(
-                refresh_token_key,
-                str(info.user_id),
-                ex=self.auth_config.refresh_token_expire,
-            )
+
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.set(
+                    access_token_key,
+                    str(info.user_id),
+                    ex=self.auth_config.access_token_expire,
+                )
+                pipe.set(
+                    refresh_token_key,
+                    str(info.user_id),
+                    ex=self.auth_config.refresh_token_expire,
+                )
+                await pipe.execute()
 
             return TokensViewModel(access_token=info.access_token, refresh_token=info.refresh_token)
 
-    async def _refresh_tokens(self, access_token: str, refresh_token: str) -> TokensViewModel:
-        async with self.redis_client_factory() as client:
-            access_token_exists = await client.exists(self._get_access_token_key(access_token))
+    async def _eval_refresh_tokens_script(self, client: Redis, keys: List[str], args: List[Any]):
+        if self._refresh_tokens_sha is None:
+            self._refresh_tokens_sha = await client.script_load(REFRESH_TOKENS_SCRIPT)
 
-            if access_token_exists:
-                raise AccessTokenNotExpire
+        try:
+            return await client.evalsha(self._refresh_tokens_sha, len(keys), *keys, *args)  # type: ignore
+        except NoScriptError:
+            # redis重启或执行了SCRIPT FLUSH后需要重新加载脚本
+            self._refresh_tokens_sha = await client.script_load(REFRESH_TOKENS_SCRIPT)
+            return await client.evalsha(self._refresh_tokens_sha, len(keys), *keys, *args)  # type: ignore
 
-            refresh_token_key = self._get_refresh_token_key(access_token, refresh_token)
+    async def _refresh_tokens(self, access_token: str, refresh_token: str) -> TokensViewModel:
+        # 旧access_token过期后才允许刷新，此时本地token缓存中对应的项也已过期，无需再广播失效
+        new_access_token = base64.urlsafe_b64encode(uuid.uuid4().bytes).decode("utf-8")
 
-            refresh_token_payload = await client.get(refresh_token_key)
+        async with self.redis_client_factory() as client:
+            result = await self._eval_refresh_tokens_script(
+                client,
+                keys=[
+                    self._get_access_token_key(access_token),
+                    self._get_refresh_token_key(access_token, refresh_token),
+                    self._get_access_token_key(new_access_token),
+                    self._get_refresh_token_key(new_access_token, refresh_token),
+                ],
+                args=[self.auth_config.access_token_expire, self.auth_config.refresh_token_expire],
+            )
 
-            if refresh_token_payload is None:
-                raise RefreshTokenExpire
+        if result == REFRESH_ACCESS_TOKEN_NOT_EXPIRE:
+            raise AccessTokenNotExpire
 
-            await client.delete(refresh_token_key)
-            tokens = TokensInfo(
-                access_token=base64.urlsafe_b64encode(uuid.uuid4().bytes).decode("utf-8"),
-                refresh_token=refresh_token,
-                user_id=int(refresh_token_payload.decode("utf-8")),
-            )
+        if result == REFRESH_REFRESH_TOKEN_EXPIRE:
+            raise RefreshTokenExpire
 
-            return await self._save_tokens(tokens)
+        return TokensViewModel(access_token=new_access_token, refresh_token=refresh_token)
 
     async def _delete_tokens(self, access_token: str, refresh_token: str) -> None:
         async with self.redis_client_factory() as client:
@@ -146,3 +205,20 @@ class AuthService:
                 self._get_access_token_key(access_token),
                 self._get_refresh_token_key(access_token, refresh_token),
             )
+
+        await self.token_cache.invalidate(self._get_access_token_key(access_token))
+
+
+async def new_auth_service(
+    repo: UserRepo,
+    transaction_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+    redis_client_factory: Callable[..., AbstractAsyncContextManager[Redis]],
+    token_cache: RedisSyncedCache,
+    auth_config: AuthConfig,
+    logger: Logger,
+) -> AuthService:
+    auth_service = AuthService(
+        repo, transaction_factory, redis_client_factory, token_cache, auth_config, logger
+    )
+    await auth_service.init()
+    return auth_service
@@ -1,10 +1,12 @@
 from contextlib import AbstractAsyncContextManager
 from typing import Callable, List, Optional
 
+from fastapi import UploadFile
 from loguru._logger import Logger
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from llmops_api.base.upload.spool import UploadSpool
 from llmops_api.repo.document import KnowledgeDocumentRepo
 from llmops_api.repo.knowledge import KnowledgeRepo
 
@@ -13,7 +15,9 @@ class DocumentFile(BaseModel):
     knowledge_id: int
     document_id: Optional[int]
     filename: str
-    content: bytes
+    # 上传文件落盘后的路径，任务消息中只传递路径，不携带文件内容
+    path: str
+    size: int
 
 
 class DocumentFileSplitConfig(BaseModel):
@@ -42,11 +46,24 @@ class DocumentService:
         knowledge_repo: KnowledgeRepo,
         document_repo: KnowledgeDocumentRepo,
         transaction_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        upload_spool: UploadSpool,
     ):
         self.logger = logger
         self.transaction_factory = transaction_factory
         self.knowledge_repo = knowledge_repo
         self.document_repo = document_repo
+        self.upload_spool = upload_spool
+
+    async def spool_document_file(self, knowledge_id: int, upload: UploadFile) -> DocumentFile:
+        """上传文件落盘，返回只携带文件路径的DocumentFile，用于投递解析任务"""
+        spooled = await self.upload_spool.save(upload, namespace=str(knowledge_id))
+        return DocumentFile(
+            knowledge_id=knowledge_id,
+            document_id=None,
+            filename=upload.filename or "",
+            path=spooled.path,
+            size=spooled.size,
+        )
 
     async def create_documents(
         self, user_id: int, document_files: List[DocumentFile]
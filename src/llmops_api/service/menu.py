@@ -5,6 +5,8 @@ from loguru._logger import Logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
+from llmops_api.base.cache.versioned_cache import VersionedCache
+from llmops_api.base.db.engine import read_only
 from llmops_api.base.db.repo import QueryConfig
 from llmops_api.base.view.model import ListViewModel
 from llmops_api.exception.menu import (
@@ -31,6 +33,7 @@ class MenuService:
         self,
         menu_repo: MenuRepo,
         action_repo: ActionRepo,
+        permission_tree_cache: VersionedCache,
         transaction_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
         logger: Logger,
     ):
@@ -38,6 +41,7 @@ class MenuService:
         self.logger = logger
         self.menu_repo = menu_repo
         self.action_repo = action_repo
+        self.permission_tree_cache = permission_tree_cache
 
     async def _check_menu_name_exists(self, session: AsyncSession, name: str):
         menu_name_exists = await self.menu_repo.exists_when(session, FindMenuByName(name))
@@ -55,7 +59,11 @@ class MenuService:
 
             await self._check_menu_name_exists(session, menu.name)
             await self.menu_repo.add(session, menu)
-            return menu.to_pydantic(MenuViewModel)
+            menu_view = menu.to_pydantic(MenuViewModel)
+
+        # 事务提交后再使用户权限树缓存失效，避免缓存中写入变更前的数据
+        await self.permission_tree_cache.bump_version()
+        return menu_view
 
     async def delete_menu(self, menu_id: int, delete_by: int) -> None:
         async with self.transaction_factory() as session:
@@ -76,18 +84,24 @@ class MenuService:
 
             await self.menu_repo.remove_by_id(session, menu_id, delete_by=delete_by)
 
-    async def get_menu(self, menu_id: int) -> MenuViewModel:
-        async with self.transaction_factory() as session:
-            menu = await self.menu_repo.get_by_id(
-                session,
-                menu_id,
-                options=[joinedload(Menu.creator), joinedload(Menu.updator)],
-            )
+        await self.permission_tree_cache.bump_version()
 
-            if menu is None:
-                raise MenuNotExists
+    async def _get_menu(self, session: AsyncSession, menu_id: int) -> MenuViewModel:
+        menu = await self.menu_repo.get_by_id(
+            session,
+            menu_id,
+            options=[joinedload(Menu.creator), joinedload(Menu.updator)],
+        )
+
+        if menu is None:
+            raise MenuNotExists
+
+        return menu.to_pydantic(MenuViewModel)
 
-            return menu.to_pydantic(MenuViewModel)
+    @read_only
+    async def get_menu(self, menu_id: int) -> MenuViewModel:
+        async with self.transaction_factory() as session:
+            return await self._get_menu(session, menu_id)
 
     async def add_child_menu(self, parent_id: int, menu: Menu) -> MenuViewModel:
         menu.parent_id = parent_id
@@ -105,9 +119,13 @@ class MenuService:
                 await self._check_menu_name_exists(session, name)
 
             await self.menu_repo.update_by_id(session, menu_id, **kwargs)
+            # 在同一事务中读取，避免从只读副本读到修改前的数据
+            menu_view = await self._get_menu(session, menu_id)
 
-        return await self.get_menu(menu_id)
+        await self.permission_tree_cache.bump_version()
+        return menu_view
 
+    @read_only
     async def menu_list(self, menu_query: MenuQuery):
         async with self.transaction_factory() as session:
             _, first_level_menus = await self.menu_repo.fetch_list(
@@ -123,7 +141,7 @@ class MenuService:
                 ),
             )
 
-            first_level_menus = [menu.to_pydantic(MenuViewModel) for menu in first_level_menus]
+            first_level_menus = Menu.to_pydantic_list(first_level_menus, MenuViewModel)
             first_level_menu_ids = [menu.id for menu in first_level_menus]
 
             _, second_level_menus = await self.menu_repo.fetch_list(
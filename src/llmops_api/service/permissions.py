@@ -1,11 +1,13 @@
 from contextlib import AbstractAsyncContextManager
-from typing import Callable
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
 
 from loguru._logger import Logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.base import ExecutableOption
 
-from llmops_api.base.casbin.enforcer import CasbinEnforcer
+from llmops_api.base.cache.versioned_cache import VersionedCache
+from llmops_api.base.casbin.enforcer import CasbinEnforcer, Permission
 from llmops_api.base.db.model import User
 from llmops_api.base.db.repo import Paginator, QueryConfig
 from llmops_api.base.view.model import ListViewModel, PaginationListViewModel
@@ -13,14 +15,22 @@ from llmops_api.enum.menu import ActionMethod
 from llmops_api.exception.action import ActionNotExists
 from llmops_api.exception.role import RoleNotExists
 from llmops_api.exception.user import UserNotExists
+from llmops_api.form.permissions import BatchPermissionsForm
 from llmops_api.model.menu import Action, Menu
 from llmops_api.model.role import Role
 from llmops_api.repo.action import ActionRepo, FindActionByPathAndMethod
-from llmops_api.repo.menu import FindMenuByIDs, MenuRepo
+from llmops_api.repo.menu import MenuRepo
 from llmops_api.repo.role import FetchRoleByIDs, RoleRepo
 from llmops_api.repo.user import FetchUserByIDs, UserRepo
 from llmops_api.view.action import ActionViewModel
-from llmops_api.view.permissions import PermissionActionViewModel, PermissionViewModel
+from llmops_api.view.permissions import (
+    BatchPermissionsViewModel,
+    PermissionActionViewModel,
+    PermissionCheckViewModel,
+    PermissionViewModel,
+    RoleActionViewModel,
+    UserPermissionViewModel,
+)
 from llmops_api.view.role import RoleViewModel
 from llmops_api.view.user import UserViewModel
 
@@ -30,36 +40,41 @@ class PermissionsService:
         self,
         casbin_enforcer: CasbinEnforcer,
         transaction_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        read_session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
         user_repo: UserRepo,
         role_repo: RoleRepo,
         action_repo: ActionRepo,
         menu_repo: MenuRepo,
+        permission_tree_cache: VersionedCache[ListViewModel[PermissionViewModel]],
         logger: Logger,
     ):
         self.casbin_enforcer = casbin_enforcer
         self.transaction_factory = transaction_factory
+        # 只读查询使用自动提交会话，省去BEGIN/COMMIT往返；权限树会写入缓存，不能读副本
+        self.read_session_factory = read_session_factory
         self.user_repo = user_repo
         self.role_repo = role_repo
         self.action_repo = action_repo
         self.menu_repo = menu_repo
+        self.permission_tree_cache = permission_tree_cache
         self.logger = logger
 
-    async def _check_role_exists(self, session: AsyncSession, role_id: int) -> None:
-        role_exists = await self.role_repo.exists(session, role_id)
+    async def _check_role_exists(self, session: AsyncSession, *role_ids: int) -> None:
+        existing_ids = await self.role_repo.exists_many(session, role_ids)
 
-        if not role_exists:
+        if len(set(role_ids) - existing_ids) > 0:
             raise RoleNotExists
 
-    async def _check_user_exists(self, session: AsyncSession, user_id: int) -> None:
-        user_exists = await self.user_repo.exists(session, user_id)
+    async def _check_user_exists(self, session: AsyncSession, *user_ids: int) -> None:
+        existing_ids = await self.user_repo.exists_many(session, user_ids)
 
-        if not user_exists:
+        if len(set(user_ids) - existing_ids) > 0:
             raise UserNotExists
 
     async def get_users_for_role(
         self, role_id: int, paginator: Paginator
     ) -> PaginationListViewModel[UserViewModel]:
-        async with self.transaction_factory() as session:
+        async with self.read_session_factory() as session:
             await self._check_role_exists(session, role_id)
 
             users = await self.casbin_enforcer.enforcer.get_users_for_role(f"role::{role_id}")
@@ -75,7 +90,7 @@ class PermissionsService:
                 ),
             )
 
-            user_view_list = [user.to_pydantic(UserViewModel) for user in user_list]
+            user_view_list = User.to_pydantic_list(user_list, UserViewModel)
 
             return PaginationListViewModel[UserViewModel](
                 items=user_view_list,
@@ -85,7 +100,7 @@ class PermissionsService:
             )
 
     async def get_roles_for_user(self, user_id: int) -> ListViewModel[RoleViewModel]:
-        async with self.transaction_factory() as session:
+        async with self.read_session_factory() as session:
             await self._check_user_exists(session, user_id)
 
             roles = await self.casbin_enforcer.enforcer.get_roles_for_user(f"user::{user_id}")
@@ -96,7 +111,7 @@ class PermissionsService:
                 QueryConfig(condition=FetchRoleByIDs(role_ids), order_by=[Role.create_at.desc()]),
             )
 
-            role_view_list = [role.to_pydantic(RoleViewModel) for role in role_list]
+            role_view_list = Role.to_pydantic_list(role_list, RoleViewModel)
             return ListViewModel[RoleViewModel](items=role_view_list)
 
     async def add_role_for_user(self, user_id: int, role_id: int) -> None:
@@ -104,18 +119,14 @@ class PermissionsService:
             await self._check_role_exists(session, role_id)
             await self._check_user_exists(session, user_id)
 
-        await self.casbin_enforcer.enforcer.add_role_for_user(
-            f"user::{user_id}", f"role::{role_id}"
-        )
+        await self.casbin_enforcer.add_role_for_user(f"user::{user_id}", f"role::{role_id}")
 
     async def delete_role_for_user(self, user_id: int, role_id: int) -> None:
         async with self.transaction_factory() as session:
             await self._check_role_exists(session, role_id)
             await self._check_user_exists(session, user_id)
 
-        await self.casbin_enforcer.enforcer.delete_role_for_user(
-            f"user::{user_id}", f"role::{role_id}"
-        )
+        await self.casbin_enforcer.delete_role_for_user(f"user::{user_id}", f"role::{role_id}")
 
     async def _get_action(self, session: AsyncSession, action_id: int) -> Action:
         action = await self.action_repo.get_by_id(session, action_id)
@@ -124,26 +135,34 @@ class PermissionsService:
         return action
 
     async def get_action_for_role(self, role_id: int):
-        permissions = await self.casbin_enforcer.enforcer.get_implicit_permissions_for_user(
-            f"role::{role_id}"
-        )
-        permission_list = []
-        for permission in permissions:
-            _, path, method = permission
-            permission_list.append((path, ActionMethod.load(method)))
+        permissions = await self.casbin_enforcer.get_permission_set(f"role::{role_id}")
 
-        async with self.transaction_factory() as session:
-            _, actions = await self.action_repo.fetch_list(
-                session,
-                QueryConfig(
-                    condition=FindActionByPathAndMethod(path_and_method_tuple_list=permission_list),
-                    order_by=[Action.create_at.desc()],
-                ),
-            )
+        async with self.read_session_factory() as session:
+            actions = await self._fetch_actions(session, permissions)
 
-            action_views = [action.to_pydantic(ActionViewModel) for action in actions]
+            action_views = Action.to_pydantic_list(actions, ActionViewModel)
             return ListViewModel[ActionViewModel](items=action_views)
 
+    async def _fetch_actions(
+        self,
+        session: AsyncSession,
+        permissions: Iterable[Permission],
+        options: Optional[List[ExecutableOption]] = None,
+    ) -> List[Action]:
+        permission_list = [(path, ActionMethod.load(method)) for path, method in permissions]
+        if len(permission_list) == 0:
+            return []
+
+        _, actions = await self.action_repo.fetch_list(
+            session,
+            QueryConfig(
+                condition=FindActionByPathAndMethod(path_and_method_tuple_list=permission_list),
+                order_by=[Action.create_at.desc()],
+                options=options if options is not None else [],
+            ),
+        )
+        return actions
+
     async def add_action_for_role(self, role_id: int, action_id: int) -> None:
         async with self.transaction_factory() as session:
             await self._check_role_exists(session, role_id)
@@ -151,7 +170,7 @@ class PermissionsService:
             path = action.path
             method = action.method.value
 
-        await self.casbin_enforcer.enforcer.add_permission_for_user(
+        await self.casbin_enforcer.add_permission_for_user(
             f"role::{role_id}",
             path,
             method,
@@ -164,116 +183,160 @@ class PermissionsService:
             path = action.path
             method = action.method.value
 
-        await self.casbin_enforcer.enforcer.delete_permission_for_user(
+        await self.casbin_enforcer.delete_permission_for_user(
             f"role::{role_id}",
             path,
             method,
         )
 
-    async def get_user_permissions(self, user_id: int) -> ListViewModel[PermissionViewModel]:
-        permissions = await self.casbin_enforcer.enforcer.get_implicit_permissions_for_user(
-            f"user::{user_id}"
+    async def get_user_permissions_version(self) -> str:
+        """
+        用户权限树的版本号，策略或菜单、操作变更后改变
+
+        使用redis中共享的策略版本号，同一客户端的请求落到不同worker时ETag一致
+        """
+        policy_version = await self.casbin_enforcer.sync_version()
+        menu_version = await self.permission_tree_cache.fetch_version()
+        return f"{policy_version}.{menu_version}"
+
+    async def get_user_permissions(
+        self, user_id: int, version: Optional[str] = None
+    ) -> ListViewModel[PermissionViewModel]:
+        # 先确定版本号再构建权限树，保证缓存中的权限树不旧于其版本号
+        if version is None:
+            version = await self.get_user_permissions_version()
+
+        cache_key = f"{user_id}:{version}"
+        user_permissions = await self.permission_tree_cache.get(cache_key)
+        if user_permissions is not None:
+            return user_permissions
+
+        permissions = await self.casbin_enforcer.get_permission_set(f"user::{user_id}")
+
+        async with self.read_session_factory() as session:
+            actions = await self._fetch_actions(
+                session, permissions, options=[joinedload(Action.menu).joinedload(Menu.parent)]
+            )
+            user_permissions = ListViewModel[PermissionViewModel](
+                items=self._build_permission_tree(actions)
+            )
+
+        await self.permission_tree_cache.set(cache_key, user_permissions)
+        return user_permissions
+
+    async def batch_permissions(self, form: BatchPermissionsForm) -> BatchPermissionsViewModel:
+        """批量校验用户权限、获取用户权限树和角色权限
+
+        所有主体共用一次角色图遍历，操作及其菜单在一次关联查询中获取
+        """
+        user_ids = [check.user_id for check in form.checks] + form.user_ids
+        subs = [f"user::{user_id}" for user_id in user_ids]
+        subs.extend(f"role::{role_id}" for role_id in form.role_ids)
+        permission_sets = await self.casbin_enforcer.get_permission_sets(subs)
+
+        checks = [
+            PermissionCheckViewModel(
+                user_id=check.user_id,
+                path=check.path,
+                method=check.method,
+                allowed=(check.path, check.method.upper())
+                in permission_sets[f"user::{check.user_id}"],
+            )
+            for check in form.checks
+        ]
+
+        tree_permission_sets = [permission_sets[f"user::{user_id}"] for user_id in form.user_ids]
+        tree_permission_sets.extend(
+            permission_sets[f"role::{role_id}"] for role_id in form.role_ids
         )
 
-        permission_list = []
-        for permission in permissions:
-            _, path, method = permission
-            permission_list.append((path, ActionMethod.load(method)))
+        async with self.read_session_factory() as session:
+            await self._check_user_exists(session, *user_ids)
+            await self._check_role_exists(session, *form.role_ids)
 
-        async with self.transaction_factory() as session:
-            _, actions = await self.action_repo.fetch_list(
+            actions = await self._fetch_actions(
                 session,
-                QueryConfig(
-                    condition=FindActionByPathAndMethod(path_and_method_tuple_list=permission_list),
-                    order_by=[Action.create_at.desc()],
-                    options=[joinedload(Action.menu)],
-                ),
+                set().union(*tree_permission_sets),
+                options=[joinedload(Action.menu).joinedload(Menu.parent)],
             )
 
-            second_level_parent_ids = [
-                action.menu.parent_id for action in actions if action.menu.parent_id is not None
+            users = [
+                UserPermissionViewModel(
+                    user_id=user_id,
+                    permissions=self._build_permission_tree(
+                        self._filter_actions(actions, permission_sets[f"user::{user_id}"])
+                    ),
+                )
+                for user_id in dict.fromkeys(form.user_ids)
             ]
 
-            _, second_level_menu_parents = await self.menu_repo.fetch_list(
-                session,
-                QueryConfig(
-                    condition=FindMenuByIDs(second_level_parent_ids),
-                    order_by=[Menu.create_at.desc()],
-                ),
-            )
-
-            second_level_menu_parents_map = {menu.id: menu for menu in second_level_menu_parents}
-
-            first_level_menu_map = {}
-            first_level_actions_map = {}
-            second_level_menu_map = {}
-            second_level_actions_map = {}
-
-            for action in actions:
-                if action.menu.parent_id is None:
-                    # 一级菜单处理
-                    first_level_menu_map[action.menu_id] = action.menu
-                    action_set = first_level_actions_map.get(action.menu_id, set())
-                    action_set.add(action)
-                    first_level_actions_map[action.menu_id] = action_set
-
-                else:
-                    # 二级菜单处理
-                    second_level_menu_map[action.menu_id] = action.menu
-                    action_set = second_level_actions_map.get(action.menu_id, set())
-                    action_set.add(action)
-                    second_level_actions_map[action.menu_id] = action_set
-            permissions_map = {}
-
-            for menu_id, menu in first_level_menu_map.items():
-                permissions_map[menu_id] = PermissionViewModel(
-                    menu_id=menu_id,
-                    menu_path=menu.path,
+            roles = [
+                RoleActionViewModel(
+                    role_id=role_id,
                     actions=[
-                        PermissionActionViewModel(
-                            action_name=action.name,
-                            action_path=action.path,
-                            action_method=action.method,
+                        action.to_pydantic(ActionViewModel)
+                        for action in self._filter_actions(
+                            actions, permission_sets[f"role::{role_id}"]
                         )
-                        for action in first_level_actions_map.get(menu_id, set())
                     ],
                 )
+                for role_id in dict.fromkeys(form.role_ids)
+            ]
+
+        return BatchPermissionsViewModel(checks=checks, users=users, roles=roles)
+
+    @staticmethod
+    def _filter_actions(actions: List[Action], permissions: FrozenSet[Permission]) -> List[Action]:
+        return [action for action in actions if (action.path, action.method.value) in permissions]
+
+    @staticmethod
+    def _build_permission_tree(actions: List[Action]) -> List[PermissionViewModel]:
+        """按一级菜单、二级菜单组织操作，操作需预先加载所属菜单及其父菜单"""
+        # 一级菜单ID -> 一级菜单权限
+        permissions_map: Dict[int, PermissionViewModel] = {}
+        # 二级菜单ID -> 二级菜单权限
+        children_map: Dict[int, PermissionViewModel] = {}
+
+        for action in actions:
+            menu = action.menu
+            if menu is None:
+                continue
+
+            action_view = PermissionActionViewModel(
+                action_name=action.name,
+                action_path=action.path,
+                action_method=action.method.value,
+            )
 
-            for menu_id, menu in second_level_menu_map.items():
-                if permissions_map.get(menu.parent_id, None) is not None:
-                    parent_permission = permissions_map[menu.parent_id]
-                else:
-                    parent_menu = second_level_menu_parents_map[menu.parent_id]
+            if menu.parent_id is None:
+                # 一级菜单处理
+                permission = permissions_map.get(menu.id)
+                if permission is None:
+                    permission = PermissionViewModel(menu_id=menu.id, menu_path=menu.path)
+                    permissions_map[menu.id] = permission
+                permission.actions.append(action_view)
+                continue
+
+            # 二级菜单处理
+            parent_menu = menu.parent
+            if parent_menu is None:
+                continue
+
+            child = children_map.get(menu.id)
+            if child is None:
+                parent_permission = permissions_map.get(parent_menu.id)
+                if parent_permission is None:
                     parent_permission = PermissionViewModel(
-                        menu_id=parent_menu.id,
-                        menu_path=parent_menu.path,
+                        menu_id=parent_menu.id, menu_path=parent_menu.path
                     )
+                    permissions_map[parent_menu.id] = parent_permission
 
-                parent_permission.children.append(
-                    PermissionViewModel(
-                        menu_id=menu_id,
-                        menu_path=menu.path,
-                        actions=[
-                            PermissionActionViewModel(
-                                action_name=action.name,
-                                action_path=action.path,
-                                action_method=action.method,
-                            )
-                            for action in second_level_actions_map.get(menu_id, set())
-                        ],
-                    )
-                )
-                permissions_map[menu_id] = parent_permission
-            return ListViewModel[PermissionViewModel](items=list(permissions_map.values()))
+                child = PermissionViewModel(menu_id=menu.id, menu_path=menu.path)
+                parent_permission.children.append(child)
+                children_map[menu.id] = child
+            child.actions.append(action_view)
 
-    async def has_permission(self, user_id: int, path: str, method: str) -> bool:
-        permissions = await self.casbin_enforcer.enforcer.get_implicit_permissions_for_user(
-            f"user::{user_id}"
-        )
+        return list(permissions_map.values())
 
-        for permission in permissions:
-            _, _path, _method = permission
-
-            if path == _path and _method == method:
-                return True
-        return False
+    async def has_permission(self, user_id: int, path: str, method: str) -> bool:
+        return await self.casbin_enforcer.has_permission(f"user::{user_id}", path, method)
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from llmops_api.base.casbin.enforcer import CasbinEnforcer
+from llmops_api.base.db.engine import read_only
 from llmops_api.base.db.repo import QueryConfig
 from llmops_api.base.view.model import ListViewModel
 from llmops_api.exception.role import RoleHasUsers, RoleNameExists, RoleNotExists
@@ -27,6 +28,7 @@ class RoleService:
         self.transaction_factory = transaction_factory
         self.logger = logger
 
+    @read_only
     async def role_list(self, query: str = "") -> ListViewModel[RoleViewModel]:
         async with self.transaction_factory() as session:
             _, role_list = await self.repo.fetch_list(
@@ -38,7 +40,7 @@ class RoleService:
                 ),
             )
 
-            role_view_list = [role.to_pydantic(RoleViewModel) for role in role_list]
+            role_view_list = Role.to_pydantic_list(role_list, RoleViewModel)
             return ListViewModel[RoleViewModel](items=role_view_list)
 
     async def _check_role_name_exists(self, session: AsyncSession, name: str):
@@ -53,18 +55,22 @@ class RoleService:
             await self.repo.add(session, role)
             return role.to_pydantic(RoleViewModel)
 
-    async def get_role(self, role_id: int) -> RoleViewModel:
-        async with self.transaction_factory() as session:
-            role = await self.repo.get_by_id(
-                session,
-                role_id,
-                options=[joinedload(Role.creator), joinedload(Role.updator)],
-            )
+    async def _get_role(self, session: AsyncSession, role_id: int) -> RoleViewModel:
+        role = await self.repo.get_by_id(
+            session,
+            role_id,
+            options=[joinedload(Role.creator), joinedload(Role.updator)],
+        )
 
-            if role is None:
-                raise RoleNotExists
+        if role is None:
+            raise RoleNotExists
 
-            return role.to_pydantic(RoleViewModel)
+        return role.to_pydantic(RoleViewModel)
+
+    @read_only
+    async def get_role(self, role_id: int) -> RoleViewModel:
+        async with self.transaction_factory() as session:
+            return await self._get_role(session, role_id)
 
     async def edit_role(self, role_id: int, **kwargs: Any) -> RoleViewModel:
         async with self.transaction_factory() as session:
@@ -78,8 +84,8 @@ class RoleService:
                 await self._check_role_name_exists(session, name)
 
             await self.repo.update_by_id(session, role_id, **kwargs)
-
-        return await self.get_role(role_id)
+            # 在同一事务中读取，避免从只读副本读到修改前的数据
+            return await self._get_role(session, role_id)
 
     async def delete_role(self, role_id: int, delete_by: int) -> None:
         users = await self.enforcer.enforcer.get_users_for_role(f"role::{role_id}")
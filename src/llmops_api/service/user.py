@@ -1,12 +1,13 @@
 from contextlib import AbstractAsyncContextManager
-from typing import Any, Callable, cast
+from typing import Any, Callable
 
 from loguru._logger import Logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from llmops_api.base.db.engine import read_only
 from llmops_api.base.db.model import User
-from llmops_api.base.db.repo import Paginator, QueryConfig
+from llmops_api.base.db.repo import CursorPaginator, Paginator, QueryConfig
 from llmops_api.base.view.model import PaginationListViewModel
 from llmops_api.exception.user import UsernameExists, UserNotExists
 from llmops_api.form.user import UserListQuery
@@ -70,29 +71,36 @@ class UserService:
 
         return user.to_pydantic(UserViewModel)
 
+    @read_only
     async def user_list(
         self, user_list_query: UserListQuery
     ) -> PaginationListViewModel[UserViewModel]:
-        async with self.transaction_factory() as session:
-            result = await self.repo.fetch_list(
-                session,
-                QueryConfig(
-                    options=[joinedload(User.creator), joinedload(User.updator)],
-                    condition=user_list_query,
-                    paginator=Paginator(
-                        page=user_list_query.page,
-                        page_size=user_list_query.page_size,
-                    ),
-                    order_by=[User.create_at.desc()],
-                ),
+        cursor_paginator = CursorPaginator(
+            cursor=user_list_query.cursor, page_size=user_list_query.page_size
+        )
+        query_config = QueryConfig(
+            options=[joinedload(User.creator), joinedload(User.updator)],
+            condition=user_list_query,
+            order_by=[User.create_at.desc(), User.id.desc()],
+        )
+
+        # 传入游标时按游标分页，否则按页码分页，两种方式的排序一致，页码分页返回的游标可继续用于游标分页
+        if user_list_query.cursor is not None:
+            query_config.cursor_paginator = cursor_paginator
+        else:
+            query_config.paginator = Paginator(
+                page=user_list_query.page,
+                page_size=user_list_query.page_size,
             )
 
-            count, user_list = result
+        async with self.transaction_factory() as session:
+            count, user_list = await self.repo.fetch_list(session, query_config)
 
-            user_view_list = [user.to_pydantic(UserViewModel) for user in user_list]
+            user_view_list = User.to_pydantic_list(user_list, UserViewModel)
             return PaginationListViewModel[UserViewModel](
                 items=user_view_list,
                 page=user_list_query.page,
                 page_size=user_list_query.page_size,
-                total=cast(int, count),
+                total=count,
+                next_cursor=cursor_paginator.next_cursor(user_list),
             )
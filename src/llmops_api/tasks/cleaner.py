@@ -0,0 +1,87 @@
+import bisect
+import functools
+import re
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from urlextract import URLExtract
+
+# 与unstructured的clean_extra_whitespace等价：\xa0和换行替换为空格，连续空白合并为一个空格
+_WHITESPACE = re.compile(r"[ \xa0\n]{2,}|[\xa0\n]")
+
+# URL和邮箱不含空白，且点号后必有字符；只把这样的词交给URLExtract，
+# 避免对全文跑它的TLD正则
+_CANDIDATE = re.compile(r"\S*\.\S+")
+
+
+@functools.cache
+def get_url_extractor() -> URLExtract:
+    """进程内共享的URL/邮箱提取器，TLD列表只加载一次"""
+    return URLExtract(extract_email=True)
+
+
+def _url_spans(text: str) -> Iterable[Tuple[int, int]]:
+    """URL和邮箱在原文中的位置"""
+    # 候选词以空格拼接后一次提取，空格是URLExtract的分隔符，不会产生跨词的匹配
+    tokens: List[str] = []
+    joined_starts: List[int] = []
+    text_starts: List[int] = []
+    pos = 0
+    for m in _CANDIDATE.finditer(text):
+        tokens.append(m.group())
+        joined_starts.append(pos)
+        text_starts.append(m.start())
+        pos += len(tokens[-1]) + 1
+
+    if not tokens:
+        return
+
+    for _, (start, end) in get_url_extractor().gen_urls(" ".join(tokens), get_indices=True):
+        i = bisect.bisect_right(joined_starts, start) - 1
+        shift = text_starts[i] - joined_starts[i]
+        yield start + shift, end + shift
+
+
+def _pieces(text: str, remove_url_and_email: bool) -> Iterable[str]:
+    """去掉URL和邮箱后剩余的文本片段，按原文顺序产出"""
+    if not remove_url_and_email:
+        yield text
+        return
+
+    prev = 0
+    for start, end in _url_spans(text):
+        yield text[prev:start]
+        prev = max(prev, end)
+    yield text[prev:]
+
+
+def clean_text(text: str, *, remove_extra_whitespace: bool, remove_url_and_email: bool) -> str:
+    """
+    一次扫描完成URL、邮箱删除和空白清理
+
+    URL和邮箱按提取到的位置切掉，不再对每个URL做一次全文replace；
+    空白清理在拼接片段时逐段进行，片段衔接处的空白一并合并
+    """
+    if not remove_extra_whitespace:
+        return "".join(_pieces(text, remove_url_and_email))
+
+    out: List[str] = []
+    for piece in _pieces(text, remove_url_and_email):
+        piece = _WHITESPACE.sub(" ", piece)
+        if out and out[-1].endswith(" ") and piece.startswith(" "):
+            piece = piece[1:]
+        if piece:
+            out.append(piece)
+    return "".join(out).strip()
+
+
+def build_text_cleaner(
+    remove_extra_whitespace: bool, remove_url_and_email: bool
+) -> Optional[Callable[[str], str]]:
+    """按切分配置生成文本清理函数，两项都未开启时返回None"""
+    if not remove_extra_whitespace and not remove_url_and_email:
+        return None
+    return functools.partial(
+        clean_text,
+        remove_extra_whitespace=remove_extra_whitespace,
+        remove_url_and_email=remove_url_and_email,
+    )
@@ -0,0 +1,102 @@
+import codecs
+import csv
+import json
+from typing import Any, Callable, Dict, Iterator, List
+
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer
+
+# 判断文本编码时读取的字节数
+ENCODING_PROBE_SIZE = 64 * 1024
+
+
+class FallbackToUnstructured(Exception):
+    """快速解析无法处理该文件，在产出任何文本之前抛出，改由unstructured解析"""
+
+
+def _check_utf8(path: str) -> None:
+    # 只支持utf-8，其他编码(如gbk)交给unstructured检测
+    with open(path, "rb") as f:
+        head = f.read(ENCODING_PROBE_SIZE)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError as e:
+        raise FallbackToUnstructured(f"{path} is not utf-8") from e
+
+
+def extract_text(path: str) -> Iterator[str]:
+    """纯文本、markdown按空行分段，逐行读取，不把整个文件读入内存"""
+    _check_utf8(path)
+
+    lines: List[str] = []
+    with open(path, encoding="utf-8-sig", errors="replace", newline=None) as f:
+        for line in f:
+            if line.strip():
+                lines.append(line)
+                continue
+            if lines:
+                yield "".join(lines).rstrip("\n")
+                lines = []
+    if lines:
+        yield "".join(lines).rstrip("\n")
+
+
+def extract_csv(path: str) -> Iterator[str]:
+    """逐行读取csv，每行单元格以逗号和空格拼接为一段"""
+    _check_utf8(path)
+
+    with open(path, encoding="utf-8-sig", errors="replace", newline="") as f:
+        for row in csv.reader(f):
+            if any(row):
+                yield ", ".join(row)
+
+
+def _dump_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=1)
+
+
+def extract_json(path: str) -> Iterator[str]:
+    """顶层为数组时每个元素一段，为对象时每个键值一段"""
+    _check_utf8(path)
+
+    with open(path, encoding="utf-8-sig") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise FallbackToUnstructured(f"{path} is not valid json") from e
+
+    if isinstance(data, list):
+        for item in data:
+            yield _dump_json(item)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            yield f"{key}: {_dump_json(value)}"
+    else:
+        yield _dump_json(data)
+
+
+def extract_pdf(path: str) -> Iterator[str]:
+    """pdfminer逐页解析，每个文本块一段；没有文本层的扫描件交给unstructured"""
+    found = False
+    for page in extract_pages(path):
+        for element in page:
+            if not isinstance(element, LTTextContainer):
+                continue
+            text = element.get_text().strip()
+            if text:
+                found = True
+                yield text
+
+    if not found:
+        raise FallbackToUnstructured(f"{path} has no text layer")
+
+
+# 扩展名到快速解析函数，未列出的格式由unstructured解析
+FAST_EXTRACTORS: Dict[str, Callable[[str], Iterator[str]]] = {
+    ".txt": extract_text,
+    ".md": extract_text,
+    ".markdown": extract_text,
+    ".csv": extract_csv,
+    ".json": extract_json,
+    ".pdf": extract_pdf,
+}
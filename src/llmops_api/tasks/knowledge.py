@@ -1,23 +1,34 @@
-import io
-import sys
-from typing import Any, Callable, Dict, List, Optional, cast
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
+from celery import Task, chord, group
 from langchain_core.documents.base import Document
-from langchain_unstructured import UnstructuredLoader
 from pydantic import BaseModel, Field, RootModel
-from unstructured.cleaners.core import clean_extra_whitespace
-from urlextract import URLExtract
 
+from llmops_api.celery.base import app, container
 from llmops_api.llm.text_splitter.charater import RecursiveCharacterTextSplitter
+from llmops_api.tasks.cleaner import build_text_cleaner
+from llmops_api.tasks.extractor import FAST_EXTRACTORS, FallbackToUnstructured
+from llmops_api.tasks.model.models import DocumentBatchResult, DocumentFileResult
 
 # from llmops_api.service.document import DocumentFile, DocumentFileSplitConfig
 
+logger = container.logger().bind(name="knowledge-task")
+upload_spool = container.upload_spool()
+
+# 切分出的片段每攒够多少个保存一次
+CHUNK_SAVE_BATCH_SIZE = 100
+
 
 class DocumentFile(BaseModel):
     knowledge_id: int
     document_id: Optional[int]
     filename: str
-    content: bytes
+    # 上传文件落盘后的路径，任务消息中只传递路径，不携带文件内容
+    path: str
+    size: int
 
 
 class DocumentFileSplitConfig(BaseModel):
@@ -37,69 +48,153 @@ class DocumentList(RootModel):
     root: List[Document]
 
 
-def remove_url_and_email(text: str) -> str:
-    # 初始化 URL 提取器
-    extractor = URLExtract(extract_email=True)
-    urls = extractor.find_urls(text)
+def _load_with_unstructured(
+    file: DocumentFile, post_processors: List[Callable[[str], str]]
+) -> Iterator[str]:
+    # unstructured导入耗时较长，只在需要时导入
+    from langchain_unstructured import UnstructuredLoader
 
-    # 删除 URL
-    for url in urls:
-        text = text.replace(url, "")
+    # 由落盘路径读取，解析器按需流式读取文件，不再把整个文件读入内存
+    loader = UnstructuredLoader(
+        file_path=file.path,
+        metadata_filename=file.filename,
+        post_processors=post_processors,
+        partition_via_api=False,
+    )
+    for element in loader.lazy_load():
+        yield element.page_content
 
-    return text
 
+def load_document(file: DocumentFile, config: DocumentFileSplitConfig) -> Iterator[str]:
+    """
+    逐个产出解析出的元素文本，不再把整个文档合并成一个字符串
 
-def load_document(file: DocumentFile, config: DocumentFileSplitConfig) -> Document:
-    post_processors = []
+    txt、md、csv、json、pdf走FAST_EXTRACTORS直接解析，其他格式以及快速解析无法处理的文件
+    (非utf-8编码、没有文本层的pdf等)由unstructured解析
+    """
+    cleaner = build_text_cleaner(config.remove_extra_whitespace, config.remove_url_and_email)
+    post_processors: List[Callable[[str], str]] = [] if cleaner is None else [cleaner]
 
-    if config.remove_extra_whitespace:
-        post_processors.append(clean_extra_whitespace)
+    extractor = FAST_EXTRACTORS.get(Path(file.filename).suffix.lower())
+    if extractor is None:
+        yield from _load_with_unstructured(file, post_processors)
+        return
 
-    if config.remove_url_and_email:
-        post_processors.append(remove_url_and_email)
+    try:
+        for text in extractor(file.path):
+            yield text if cleaner is None else cleaner(text)
+    except FallbackToUnstructured as e:
+        logger.bind(filename=file.filename, reason=str(e)).info("fallback to unstructured")
+        yield from _load_with_unstructured(file, post_processors)
 
-    file_stream = io.BytesIO(file.content)
 
-    loader = UnstructuredLoader(
-        file=file_stream,
-        metadata_filename=file.filename,
-        post_processors=cast(list[Callable[[str], str]] | None, post_processors),
-        chunking_strategy="basic",
-        max_characters=sys.maxsize,
-        include_orig_elements=False,
-        partition_via_api=False,
+def split_document(file: DocumentFile, config: DocumentFileSplitConfig) -> Iterator[Document]:
+    """
+    解析并切分文档，元素按顺序送入切分器，片段写满即产出
+
+    元素之间以空行拼接，调用方可以边迭代边向量化，不必等整个文档切分完成；
+    缓冲区衔接处的片段划分可能与整篇切分略有不同，但不丢内容，重叠保留
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=config.chunk_size,
+        chunk_overlap=config.chunk_overlap,
+        separators=config.separators if config.separators is None else config.separators.split(","),
+        is_separator_regex=config.is_separator_regex,
     )
-    documents = loader.load()
     metadata: Dict[str, Any] = {
         "knowledge_id": file.knowledge_id,
         "document_id": file.document_id,
         "filename": file.filename,
     }
 
-    if len(documents) > 1:
-        text = "\n\n".join([el.page_content for el in documents])
-        document = Document(page_content=text, metadata=metadata)
-    else:
-        document = Document(
-            page_content=documents[0].page_content,
-            metadata=metadata,
-        )
-    return document
+    return splitter.create_documents_stream(load_document(file, config), metadata)
 
 
-def split_document(document: Document, config: DocumentFileSplitConfig) -> List[Document]:
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=config.chunk_size,
-        chunk_overlap=config.chunk_overlap,
-        separators=config.separators if config.separators is None else config.separators.split(","),
-        is_separator_regex=config.is_separator_regex,
-    )
+def save_document_chunk(knowledge_id: int, document_id: Optional[int], documents: List[Document]):
+    pass
 
-    return splitter.split_documents([document])
 
+@app.task
+def parse_document_file(file: DocumentFile, config: DocumentFileSplitConfig) -> DocumentFileResult:
+    """
+    解析、切分并保存单个文件，失败时记录错误，不影响同一批次的其他文件
+
+    解析成功后删除落盘文件，失败的文件保留到过期后由UploadSpool.sweep清理
+    """
+    started = time.perf_counter()
+    chunks = 0
+    error = None
+    try:
+        documents = split_document(file, config)
+        while batch := list(islice(documents, CHUNK_SAVE_BATCH_SIZE)):
+            save_document_chunk(file.knowledge_id, file.document_id, batch)
+            chunks += len(batch)
+    except Exception as e:
+        logger.bind(filename=file.filename, path=file.path).exception("parse document file failed")
+        error = str(e)
+
+    if error is None:
+        upload_spool.remove(file.path)
+
+    return DocumentFileResult(
+        knowledge_id=file.knowledge_id,
+        document_id=file.document_id,
+        filename=file.filename,
+        chunks=chunks,
+        elapsed=time.perf_counter() - started,
+        error=error,
+    )
 
-def save_document_chunk(knowledge_id: int, document_id: int, documents: List[Document]):
-    pass
+
+@app.task
+def merge_document_results(
+    results: List[DocumentFileResult], queued_at: float
+) -> DocumentBatchResult:
+    """汇总批次内各文件的处理结果和耗时，批次耗时从投递批次时算起，包含排队时间"""
+    batch = DocumentBatchResult(
+        files=results,
+        chunks=sum(result.chunks for result in results),
+        elapsed=time.time() - queued_at,
+    )
+    for result in results:
+        logger.bind(**result.model_dump()).info("document file processed")
+    logger.bind(
+        files=len(results),
+        chunks=batch.chunks,
+        elapsed=batch.elapsed,
+        slowest=max((result.elapsed for result in results), default=0.0),
+        failed=sum(1 for result in results if result.error is not None),
+    ).info("document batch processed")
+    return batch
+
+
+@app.task(bind=True)
+def ingest_document_files(
+    self: Task,
+    files: DocumentFileList,
+    config: DocumentFileSplitConfig,
+    queued_at: Optional[float] = None,
+) -> DocumentBatchResult:
+    """
+    批量导入文件，每个文件一个parse_document_file任务，由worker的各个进程并行解析，
+    全部完成后由merge_document_results汇总，批次耗时接近最慢的单个文件而不是所有文件之和
+
+    queued_at为投递任务时的time.time()，由调用方传入，未传入时从本任务开始执行算起；
+    本任务被替换为chord，结果即为汇总后的DocumentBatchResult
+    """
+    if queued_at is None:
+        queued_at = time.time()
+
+    # 顺带清理解析失败后过期的落盘文件
+    removed = upload_spool.sweep()
+    if removed > 0:
+        logger.bind(removed=removed).info("expired spool files removed")
+
+    workflow = chord(
+        group(parse_document_file.s(file, config) for file in files.root),
+        merge_document_results.s(queued_at=queued_at),
+    )
+    return self.replace(workflow)
 
 
 if __name__ == "__main__":
@@ -8,7 +8,9 @@ class DocumentFile(BaseModel):
     knowledge_id: int
     document_id: Optional[int] = Field(default=None)
     filename: str
-    content: bytes
+    # 上传文件落盘后的路径，任务消息中只传递路径，不携带文件内容
+    path: str
+    size: int
 
 
 class DocumentFileSplitConfig(BaseModel):
@@ -26,3 +28,20 @@ class DocumentFileList(RootModel):
 
 class DocumentList(RootModel):
     root: List[Document]
+
+
+class DocumentFileResult(BaseModel):
+    knowledge_id: int
+    document_id: Optional[int] = Field(default=None)
+    filename: str
+    chunks: int = Field(default=0)
+    # 解析、切分、保存单个文件的耗时(秒)
+    elapsed: float
+    error: Optional[str] = Field(default=None)
+
+
+class DocumentBatchResult(BaseModel):
+    files: List[DocumentFileResult]
+    chunks: int
+    # 从投递批量任务到所有文件处理完成的耗时(秒)
+    elapsed: float
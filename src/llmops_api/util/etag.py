@@ -0,0 +1,23 @@
+from typing import Optional
+
+
+def _opaque_tag(tag: str) -> str:
+    # 弱比较忽略W/前缀，代理压缩响应时会把强ETag改为弱ETag(如nginx gzip)
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    按RFC 9110的弱比较判断If-None-Match是否命中etag
+
+    If-None-Match可以是以逗号分隔的多个ETag，或者*
+    """
+    if if_none_match is None:
+        return False
+
+    target = _opaque_tag(etag)
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag != "" and _opaque_tag(tag) == target):
+            return True
+    return False
@@ -2,6 +2,8 @@ from typing import Annotated, List
 
 from pydantic import BaseModel, Field
 
+from llmops_api.view.action import ActionViewModel
+
 
 class PermissionActionViewModel(BaseModel):
     action_name: Annotated[str, Field(description="操作名称")]
@@ -19,3 +21,34 @@ class PermissionViewModel(BaseModel):
         List["PermissionViewModel"],
         Field(description="子菜单权限", default_factory=list),
     ]
+
+
+class PermissionCheckViewModel(BaseModel):
+    user_id: Annotated[int, Field(description="用户ID")]
+    path: Annotated[str, Field(description="后端接口路径")]
+    method: Annotated[str, Field(description="后端接口方法")]
+    allowed: Annotated[bool, Field(description="是否有权限")]
+
+
+class UserPermissionViewModel(BaseModel):
+    user_id: Annotated[int, Field(description="用户ID")]
+    permissions: Annotated[
+        List[PermissionViewModel], Field(description="用户权限树", default_factory=list)
+    ]
+
+
+class RoleActionViewModel(BaseModel):
+    role_id: Annotated[int, Field(description="角色ID")]
+    actions: Annotated[
+        List[ActionViewModel], Field(description="角色有权限的操作列表", default_factory=list)
+    ]
+
+
+class BatchPermissionsViewModel(BaseModel):
+    checks: Annotated[
+        List[PermissionCheckViewModel], Field(description="权限校验结果", default_factory=list)
+    ]
+    users: Annotated[
+        List[UserPermissionViewModel], Field(description="用户权限树", default_factory=list)
+    ]
+    roles: Annotated[List[RoleActionViewModel], Field(description="角色权限", default_factory=list)]
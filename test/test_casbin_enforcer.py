@@ -0,0 +1,340 @@
+import asyncio
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from casbin.persist.adapters.asyncio import AsyncAdapter
+from loguru import logger
+
+from llmops_api.base.casbin.enforcer import CasbinEnforcer
+from llmops_api.base.casbin.snapshot import PolicySnapshot
+from llmops_api.base.casbin.watcher import Message
+
+RULES = [
+    ("p", ["role::1", "/api/users", "GET"]),
+    ("p", ["role::1", "/api/users", "POST"]),
+    ("p", ["role::2", "/api/roles", "GET"]),
+    ("g", ["user::1", "role::1"]),
+]
+
+
+class MemoryAdapter(AsyncAdapter):
+    async def load_policy(self, model):
+        pass
+
+    async def save_policy(self, model):
+        return True
+
+    async def add_policy(self, sec, ptype, rule):
+        return True
+
+    async def remove_policy(self, sec, ptype, rule):
+        return True
+
+    async def remove_filtered_policy(self, sec, ptype, field_index, *field_values):
+        return True
+
+
+class RecordingWatcher:
+    """只记录发出的变更消息，由测试决定何时回环"""
+
+    def __init__(self):
+        self.local_id = str(uuid4())
+        self.messages: List[Message] = []
+        self.mutex = asyncio.Lock()
+
+    def _publish(self, **kwargs) -> int:
+        version = len(self.messages) + 1
+        self.messages.append(Message(version=version, local_id=self.local_id, **kwargs))
+        return version
+
+    async def update_for_add_policy(self, sec, ptype, rule):
+        return self._publish(method="UpdateForAddPolicy", sec=sec, ptype=ptype, rules=rule)
+
+    async def update_for_remove_policy(self, sec, ptype, rule):
+        return self._publish(method="UpdateForRemovePolicy", sec=sec, ptype=ptype, rules=rule)
+
+
+async def new_enforcer(watcher: RecordingWatcher) -> CasbinEnforcer:
+    enforcer = CasbinEnforcer(MemoryAdapter(), watcher, logger)  # type: ignore
+    enforcer.watcher_id = watcher.local_id
+    enforcer.enforcer.set_watcher(watcher)
+    await enforcer._apply_rules([(ptype, list(rule)) for ptype, rule in RULES], 0)
+    return enforcer
+
+
+async def echo(enforcer: CasbinEnforcer, messages: List[Message]):
+    for msg in messages:
+        await enforcer._watcher_callback(msg.model_dump_json())
+
+
+def test_revoke_permission_without_echo():
+    async def run():
+        enforcer = await new_enforcer(RecordingWatcher())
+        assert await enforcer.has_permission("user::1", "/api/users", "POST")
+
+        await enforcer.delete_permission_for_user("role::1", "/api/users", "POST")
+        assert not await enforcer.has_permission("user::1", "/api/users", "POST")
+        assert not await enforcer.has_permission("role::1", "/api/users", "POST")
+
+    asyncio.run(run())
+
+
+def test_role_change_without_echo():
+    async def run():
+        enforcer = await new_enforcer(RecordingWatcher())
+        assert not await enforcer.has_permission("user::1", "/api/roles", "GET")
+
+        await enforcer.add_role_for_user("user::1", "role::2")
+        assert await enforcer.has_permission("user::1", "/api/roles", "GET")
+
+        await enforcer.delete_role_for_user("user::1", "role::1")
+        assert not await enforcer.has_permission("user::1", "/api/users", "GET")
+
+    asyncio.run(run())
+
+
+def test_late_echo_does_not_revert_index():
+    async def run():
+        watcher = RecordingWatcher()
+        enforcer = await new_enforcer(watcher)
+
+        await enforcer.add_permission_for_user("role::2", "/api/menus", "GET")
+        await enforcer.delete_permission_for_user("role::2", "/api/menus", "GET")
+        await enforcer.add_permission_for_user("role::2", "/api/menus", "GET")
+
+        # 三次变更的回环在之后才到达
+        await echo(enforcer, watcher.messages)
+        assert await enforcer.has_permission("role::2", "/api/menus", "GET")
+        assert enforcer.policy_version == 3
+
+    asyncio.run(run())
+
+
+def test_remote_message_updates_index():
+    async def run():
+        enforcer = await new_enforcer(RecordingWatcher())
+        assert await enforcer.has_permission("user::1", "/api/users", "GET")
+
+        remote = Message(
+            version=1,
+            method="UpdateForRemovePolicy",
+            local_id="other-worker",
+            sec="p",
+            ptype="p",
+            rules=["role::1", "/api/users", "GET"],
+        )
+        await echo(enforcer, [remote])
+        assert not await enforcer.has_permission("user::1", "/api/users", "GET")
+
+    asyncio.run(run())
+
+
+def track_reloads(enforcer: CasbinEnforcer) -> List[int]:
+    reloads: List[int] = []
+
+    async def reload_policy(save_snapshot: bool = False):
+        reloads.append(enforcer.policy_version)
+
+    enforcer._reload_policy = reload_policy  # type: ignore
+    return reloads
+
+
+def test_unversioned_message_reloads_policy():
+    async def run():
+        enforcer = await new_enforcer(RecordingWatcher())
+        enforcer.policy_version = 5
+        reloads = track_reloads(enforcer)
+
+        # 旧版本worker发出的消息没有version字段
+        message = '{"method":"UpdateForAddPolicy","local_id":"old-worker","sec":"p","ptype":"p"}'
+        await enforcer._watcher_callback(message)
+        assert reloads == [5]
+
+    asyncio.run(run())
+
+
+def test_own_update_message_skips_reload():
+    async def run():
+        watcher = RecordingWatcher()
+        enforcer = await new_enforcer(watcher)
+        reloads = track_reloads(enforcer)
+
+        own = Message(version=1, method="Update", local_id=watcher.local_id)
+        await echo(enforcer, [own])
+        assert reloads == []
+        assert enforcer.policy_version == 1
+
+        remote = Message(version=2, method="Update", local_id="other-worker")
+        await echo(enforcer, [remote])
+        assert reloads == [1]
+
+    asyncio.run(run())
+
+
+class SnapshotWatcher(RecordingWatcher):
+    """在内存中保存快照和变更日志，并统计快照的读取次数"""
+
+    def __init__(self):
+        super().__init__()
+        self.version = 0
+        self.deltas: List[Message] = []
+        self.snapshot: Optional[PolicySnapshot] = None
+        self.lock_owner: Optional[str] = None
+        self.calls: Dict[str, int] = {"fetch_snapshot": 0, "fetch_snapshot_version": 0}
+
+    async def fetch_version(self) -> int:
+        return self.version
+
+    async def fetch_messages(self, min_version: int, max_version: int) -> List[Message]:
+        return [msg for msg in self.deltas if min_version <= msg.version <= max_version]
+
+    async def fetch_snapshot(self) -> Optional[bytes]:
+        self.calls["fetch_snapshot"] += 1
+        return None if self.snapshot is None else self.snapshot.dumps()
+
+    async def fetch_snapshot_version(self) -> Optional[int]:
+        self.calls["fetch_snapshot_version"] += 1
+        return None if self.snapshot is None else self.snapshot.version
+
+    async def save_snapshot(self, version: int, payload: bytes) -> bool:
+        self.snapshot = PolicySnapshot.loads(payload)
+        return True
+
+    async def acquire_snapshot_lock(self, timeout: float) -> bool:
+        if self.lock_owner is not None:
+            return False
+        self.lock_owner = self.local_id
+        return True
+
+    async def release_snapshot_lock(self):
+        self.lock_owner = None
+
+
+def test_wait_for_snapshot_polls_version_only():
+    async def run():
+        watcher = SnapshotWatcher()
+        watcher.lock_owner = "other-worker"
+        enforcer = CasbinEnforcer(MemoryAdapter(), watcher, logger, 5)  # type: ignore
+        enforcer.watcher_id = watcher.local_id
+
+        async def build_snapshot():
+            await asyncio.sleep(0.5)
+            watcher.snapshot = PolicySnapshot(0, [(ptype, list(rule)) for ptype, rule in RULES])
+            watcher.lock_owner = None
+
+        task = asyncio.create_task(build_snapshot())
+        await enforcer._load_policy_on_startup()
+        await task
+
+        assert watcher.calls["fetch_snapshot"] == 1
+        assert watcher.calls["fetch_snapshot_version"] > 1
+        assert await enforcer.has_permission("user::1", "/api/users", "GET")
+
+    asyncio.run(run())
+
+
+def test_rewrite_snapshot_after_deltas():
+    async def run():
+        watcher = SnapshotWatcher()
+        enforcer = CasbinEnforcer(MemoryAdapter(), watcher, logger, 5, 2)  # type: ignore
+        enforcer.watcher_id = watcher.local_id
+        await enforcer._apply_rules([(ptype, list(rule)) for ptype, rule in RULES], 0)
+
+        for version, path in enumerate(["/api/a", "/api/b"], start=1):
+            remote = Message(
+                version=version,
+                method="UpdateForAddPolicy",
+                local_id="other-worker",
+                sec="p",
+                ptype="p",
+                rules=["role::2", path, "GET"],
+            )
+            await echo(enforcer, [remote])
+        assert enforcer._snapshot_task is not None
+        await enforcer._snapshot_task
+
+        assert watcher.snapshot is not None
+        assert watcher.snapshot.version == 2
+        assert ("p", ["role::2", "/api/b", "GET"]) in watcher.snapshot.rules
+        assert enforcer.snapshot_version == 2
+
+    asyncio.run(run())
+
+
+def test_sync_version_catches_up_before_message_arrives():
+    async def run():
+        watcher = SnapshotWatcher()
+        enforcer = CasbinEnforcer(MemoryAdapter(), watcher, logger)  # type: ignore
+        enforcer.watcher_id = watcher.local_id
+        await enforcer._apply_rules([(ptype, list(rule)) for ptype, rule in RULES], 0)
+
+        # 其他worker已发布变更，本worker尚未收到消息
+        watcher.version = 1
+        watcher.deltas.append(
+            Message(
+                version=1,
+                method="UpdateForAddPolicy",
+                local_id="other-worker",
+                sec="g",
+                ptype="g",
+                rules=["user::1", "role::2"],
+            )
+        )
+
+        assert await enforcer.sync_version() == 1
+        assert enforcer.policy_version == 1
+        assert await enforcer.has_permission("user::1", "/api/roles", "GET")
+
+        # 消息随后到达时不再重复应用
+        await echo(enforcer, watcher.deltas)
+        assert enforcer.policy_version == 1
+
+    asyncio.run(run())
+
+
+class StoreAdapter(MemoryAdapter):
+    """内存中的策略表，读取和写入都有延迟，模拟与全量加载交错的数据库提交"""
+
+    def __init__(self, load_delay: float, commit_delay: float):
+        self.rules = [(ptype, list(rule)) for ptype, rule in RULES]
+        self.load_delay = load_delay
+        self.commit_delay = commit_delay
+
+    async def load_policy_rules(self):
+        rules = [(ptype, list(rule)) for ptype, rule in self.rules]
+        await asyncio.sleep(self.load_delay)
+        return rules
+
+    async def remove_policy(self, sec, ptype, rule):
+        await asyncio.sleep(self.commit_delay)
+        self.rules.remove((ptype, list(rule)))
+        return True
+
+
+def test_reload_keeps_concurrent_role_revoke():
+    async def run(load_delay: float, commit_delay: float):
+        watcher = SnapshotWatcher()
+        adapter = StoreAdapter(load_delay, commit_delay)
+        enforcer = CasbinEnforcer(adapter, watcher, logger)  # type: ignore
+        enforcer.watcher_id = watcher.local_id
+        await enforcer._apply_rules(await adapter.load_policy_rules(), 0)
+        assert await enforcer.has_permission("user::1", "/api/users", "GET")
+
+        async def reload():
+            # 与收到其他worker的Update消息时一样，持有watcher.mutex全量加载
+            async with watcher.mutex:
+                await enforcer._reload_policy()
+
+        task = asyncio.create_task(reload())
+        await asyncio.sleep(0)
+        assert await enforcer.delete_role_for_user("user::1", "role::1")
+        await task
+
+        assert not enforcer.enforcer.model.has_policy("g", "g", ["user::1", "role::1"])
+        assert not await enforcer.has_permission("user::1", "/api/users", "GET")
+        assert [msg.method for msg in watcher.messages] == ["UpdateForRemovePolicy"]
+
+    # 提交早于加载完成：加载读到的是提交前的策略
+    asyncio.run(run(load_delay=0.2, commit_delay=0.1))
+    # 加载完成时仍未提交
+    asyncio.run(run(load_delay=0.1, commit_delay=0.2))
@@ -0,0 +1,59 @@
+import random
+
+from unstructured.cleaners.core import clean_extra_whitespace
+
+from llmops_api.tasks.cleaner import build_text_cleaner, clean_text, get_url_extractor
+
+SAMPLES = [
+    "",
+    "   ",
+    "a  b",
+    " 前导和结尾的空白 \n",
+    "line1\nline2\n\n\nline3",
+    "a\xa0b\xa0\xa0c",
+    "\xa0\n \xa0x \n\n y\xa0",
+    "tab\tstays\t\tas is",
+]
+
+
+def random_text(rnd: random.Random) -> str:
+    return "".join(rnd.choice(["a", "文", " ", "\n", "\xa0", "\t", ".", "b"]) for _ in range(60))
+
+
+def test_whitespace_matches_unstructured():
+    rnd = random.Random(1)
+    for text in SAMPLES + [random_text(rnd) for _ in range(200)]:
+        cleaned = clean_text(text, remove_extra_whitespace=True, remove_url_and_email=False)
+        assert cleaned == clean_extra_whitespace(text), repr(text)
+
+
+def test_url_and_email_spans_removed():
+    text = "文档见 https://example.com/a?b=1 ，联系 dev@example.org 或 www.example.cn/path。"
+    urls = [url for url, _ in get_url_extractor().gen_urls(text, get_indices=True)]
+    assert len(urls) == 3
+
+    cleaned = clean_text(text, remove_extra_whitespace=False, remove_url_and_email=True)
+    expected = text
+    for url in urls:
+        expected = expected.replace(url, "")
+    assert cleaned == expected
+
+
+def test_url_removal_then_whitespace():
+    text = "see  https://example.com/x\n\nand  mail a@b.com  now"
+
+    cleaned = clean_text(text, remove_extra_whitespace=True, remove_url_and_email=True)
+    assert cleaned == "see and mail now"
+
+
+def test_text_without_candidates_unchanged():
+    text = "没有链接的文本，也没有邮箱"
+    assert clean_text(text, remove_extra_whitespace=False, remove_url_and_email=True) == text
+
+
+def test_build_text_cleaner():
+    assert build_text_cleaner(False, False) is None
+
+    cleaner = build_text_cleaner(True, False)
+    assert cleaner is not None
+    assert cleaner(" a \n b ") == "a b"
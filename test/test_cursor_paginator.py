@@ -0,0 +1,48 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from llmops_api.base.db.model import User
+from llmops_api.base.db.repo import CursorPaginator, QueryConfig, cursor_page_stmt
+
+CREATE_AT = datetime.datetime(2025, 6, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc)
+
+
+def test_cursor_round_trip():
+    cursor = CursorPaginator.encode_cursor(CREATE_AT, 42)
+    assert "=" not in cursor
+    assert CursorPaginator.decode_cursor(cursor) == (CREATE_AT, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "W10", "WyJ4IiwxXQ", "e30"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        CursorPaginator.decode_cursor(cursor)
+    with pytest.raises(ValidationError):
+        CursorPaginator(cursor=cursor)
+
+
+def test_next_cursor():
+    paginator = CursorPaginator(page_size=2)
+    rows = [SimpleNamespace(create_at=CREATE_AT, id=i) for i in (9, 8)]
+
+    assert paginator.next_cursor(rows[:1]) is None
+    next_cursor = paginator.next_cursor(rows)
+    assert next_cursor is not None
+    assert CursorPaginator.decode_cursor(next_cursor) == (CREATE_AT, 8)
+
+
+def test_cursor_page_stmt():
+    cursor = CursorPaginator.encode_cursor(CREATE_AT, 42)
+    query_config = QueryConfig(cursor_paginator=CursorPaginator(cursor=cursor, page_size=10))
+
+    stmt = cursor_page_stmt(select(User), User, query_config)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "(t_user.create_at, t_user.id) < (" in sql
+    assert "ORDER BY t_user.create_at DESC, t_user.id DESC" in sql
+    assert stmt.compile().params["param_1"] == CREATE_AT
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from loguru import logger
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from llmops_api.base.config.config import DatabaseConfig, SqlAlchemyPoolConfig
+from llmops_api.base.db.engine import SyncDatabase
+
+CONNECT_TIME = 0.2
+
+
+def slow_connect(dialect, conn_rec, cargs, cparams):
+    """建立连接耗时CONNECT_TIME"""
+    time.sleep(CONNECT_TIME)
+
+
+def new_database() -> SyncDatabase:
+    """连接池只有一个连接的sqlite数据库，替换掉配置中的PostgreSQL引擎"""
+    config = DatabaseConfig(password="llmops", pool=SqlAlchemyPoolConfig())
+    db = SyncDatabase(config, logger)  # type: ignore
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+    db.instrumentation.attach(engine)
+    event.listen(engine, "do_connect", slow_connect)
+    db._session_factory = sessionmaker(bind=engine)
+    return db
+
+
+def test_wait_time_excludes_connect_time():
+    db = new_database()
+    pool_wait = db.instrumentation.pool_wait_seconds
+
+    with db.transaction_session():
+        pass
+    assert pool_wait.count == 1
+    assert pool_wait.sum < CONNECT_TIME / 2
+
+    # 唯一的连接被占用，等待其他线程归还
+    held = db._session_factory()
+    held.connection()
+    timer = threading.Timer(0.3, held.close)
+    timer.start()
+    with db.transaction_session():
+        pass
+    timer.join()
+
+    assert pool_wait.count == 2
+    assert pool_wait.sum >= 0.25
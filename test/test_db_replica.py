@@ -0,0 +1,152 @@
+import asyncio
+import math
+import time
+from typing import List
+
+from loguru import logger
+
+from llmops_api.base.config.config import DatabaseConfig, SqlAlchemyPoolConfig
+from llmops_api.base.db.engine import Database, read_only
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class FakeSession:
+    def __init__(self, name: str, opened: List[str]):
+        self.name = name
+        self.opened = opened
+
+    async def __aenter__(self):
+        self.opened.append(self.name)
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def begin(self):
+        return FakeTransaction()
+
+    async def connection(self, execution_options=None):
+        pass
+
+
+def new_database(replica_hosts: str = "replica-0:5432,replica-1:5432", **kwargs) -> Database:
+    config = DatabaseConfig(
+        password="llmops",
+        pool=SqlAlchemyPoolConfig(),
+        replica_hosts_str=replica_hosts,
+        **kwargs,
+    )
+    return Database(config, logger)  # type: ignore
+
+
+def use_fake_sessions(db: Database) -> List[str]:
+    """将主库、主库只读和各副本的会话替换为只记录名称的假会话"""
+    opened: List[str] = []
+    db._session_factory = lambda: FakeSession("primary", opened)  # type: ignore
+    db._read_only_session_factory = lambda: FakeSession("primary-read", opened)  # type: ignore
+    for i, replica in enumerate(db._replicas):
+        replica.session_factory = lambda name=f"replica-{i}": FakeSession(name, opened)  # type: ignore
+    return opened
+
+
+def set_lags(db: Database, *lags: float):
+    now = time.monotonic()
+    for replica, lag in zip(db._replicas, lags):
+        replica.lag = lag
+        replica.checked_at = now
+
+
+def test_lagging_replica_skipped():
+    async def run():
+        db = new_database(replica_max_lag=5)
+        opened = use_fake_sessions(db)
+        set_lags(db, 30, 0.5)
+
+        for _ in range(4):
+            async with db.read_only_session():
+                pass
+        assert opened == ["replica-1"] * 4
+
+    asyncio.run(run())
+
+
+def test_all_replicas_down_fall_back_to_primary():
+    async def run():
+        db = new_database()
+        opened = use_fake_sessions(db)
+        set_lags(db, math.inf, math.inf)
+
+        async with db.read_only_session():
+            pass
+        assert opened == ["primary-read"]
+
+    asyncio.run(run())
+
+
+def test_stale_lag_check_not_used():
+    async def run():
+        db = new_database(replica_lag_check_interval=10)
+        opened = use_fake_sessions(db)
+        set_lags(db, 0, 0)
+        for replica in db._replicas:
+            replica.checked_at = time.monotonic() - 30
+
+        async with db.read_only_session():
+            pass
+        assert opened == ["primary-read"]
+
+    asyncio.run(run())
+
+
+def test_unreachable_replica_check_is_bounded():
+    async def run():
+        # 不可路由的地址，连接会一直挂起直到超时
+        db = new_database("10.255.255.1:5432", replica_lag_check_timeout=0.3)
+        opened = use_fake_sessions(db)
+
+        start = time.monotonic()
+        await db.start_replica_monitor()
+        assert time.monotonic() - start < 2
+        assert db._replicas[0].lag == math.inf
+
+        # 请求路径只读取检查结果，不再连接副本
+        start = time.monotonic()
+        async with db.read_only_session():
+            pass
+        assert time.monotonic() - start < 0.1
+        assert opened == ["primary-read"]
+
+        await db.close()
+
+    asyncio.run(run())
+
+
+def test_read_only_routing():
+    async def run():
+        db = new_database()
+        opened = use_fake_sessions(db)
+        set_lags(db, 0, 0)
+
+        @read_only
+        async def list_items():
+            async with db.transaction_session():
+                pass
+            # 显式指定隔离级别时仍使用主库事务
+            async with db.transaction_session(isolation_level="REPEATABLE READ"):
+                pass
+
+        await list_items()
+        async with db.transaction_session():
+            pass
+
+        assert opened[0].startswith("replica-")
+        assert opened[1:] == ["primary", "primary"]
+
+    asyncio.run(run())
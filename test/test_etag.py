@@ -0,0 +1,28 @@
+from llmops_api.util.etag import etag_matches
+
+ETAG = '"1-42"'
+
+
+def test_single_tag():
+    assert etag_matches('"1-42"', ETAG)
+    assert not etag_matches('"1-41"', ETAG)
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches("", ETAG)
+
+
+def test_tag_list():
+    assert etag_matches('"1-40", "1-42"', ETAG)
+    assert etag_matches('"1-40","1-42" ,', ETAG)
+    assert not etag_matches('"1-40", "1-41"', ETAG)
+
+
+def test_weak_tag():
+    # nginx gzip压缩响应时把强ETag改为弱ETag
+    assert etag_matches('W/"1-42"', ETAG)
+    assert etag_matches('"1-40", W/"1-42"', ETAG)
+    assert etag_matches('"1-42"', 'W/"1-42"')
+    assert not etag_matches('W/"1-41"', ETAG)
+
+
+def test_wildcard():
+    assert etag_matches("*", ETAG)
@@ -0,0 +1,93 @@
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from llmops_api.tasks.extractor import (
+    FallbackToUnstructured,
+    extract_csv,
+    extract_json,
+    extract_pdf,
+    extract_text,
+)
+
+
+def write_pdf(path: Path, text: Optional[str]) -> str:
+    """生成单页pdf，text为None时页面没有文本层"""
+    content = b"" if text is None else f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        b" /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_extract_text_by_paragraph(tmp_path: Path):
+    path = tmp_path / "doc.txt"
+    path.write_text("\ufeff第一段\n第一段续\n\n\n第二段\r\n", encoding="utf-8")
+
+    assert list(extract_text(str(path))) == ["第一段\n第一段续", "第二段"]
+
+
+def test_non_utf8_falls_back(tmp_path: Path):
+    path = tmp_path / "doc.txt"
+    path.write_bytes("中文文本".encode("gbk"))
+
+    with pytest.raises(FallbackToUnstructured):
+        list(extract_text(str(path)))
+    with pytest.raises(FallbackToUnstructured):
+        list(extract_csv(str(path)))
+
+
+def test_extract_csv_rows(tmp_path: Path):
+    path = tmp_path / "doc.csv"
+    path.write_text('name,desc\n张三,"a, b"\n,\n', encoding="utf-8")
+
+    assert list(extract_csv(str(path))) == ["name, desc", "张三, a, b"]
+
+
+def test_extract_json(tmp_path: Path):
+    path = tmp_path / "doc.json"
+    path.write_text('{"a": 1, "b": ["中文"]}', encoding="utf-8")
+    assert list(extract_json(str(path))) == ["a: 1", 'b: [\n "中文"\n]']
+
+    path.write_text('[{"a": 1}, 2]', encoding="utf-8")
+    assert list(extract_json(str(path))) == ['{\n "a": 1\n}', "2"]
+
+
+def test_invalid_json_falls_back(tmp_path: Path):
+    path = tmp_path / "doc.json"
+    path.write_text('{"a": 1,', encoding="utf-8")
+
+    with pytest.raises(FallbackToUnstructured):
+        list(extract_json(str(path)))
+
+
+def test_extract_pdf_text_layer(tmp_path: Path):
+    path = write_pdf(tmp_path / "doc.pdf", "Hello PDF")
+
+    assert list(extract_pdf(path)) == ["Hello PDF"]
+
+
+def test_pdf_without_text_layer_falls_back(tmp_path: Path):
+    path = write_pdf(tmp_path / "scan.pdf", None)
+
+    with pytest.raises(FallbackToUnstructured):
+        list(extract_pdf(path))
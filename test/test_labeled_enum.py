@@ -0,0 +1,43 @@
+import pytest
+
+from llmops_api.base.enum.labeled_enum import BaseEnum, LabeledEnum
+
+
+class Color(LabeledEnum):
+    RED = ("red", "红色")
+    GREEN = ("green", "绿色")
+
+
+class Shape(BaseEnum):
+    SQUARE = [4, 4]
+    POINT = 0
+
+
+def test_load_by_value_and_name():
+    assert Color.load("red") is Color.RED
+    assert Color.load_by_name("GREEN") is Color.GREEN
+    assert Color.GREEN.label == "绿色"
+
+
+def test_load_missing_raises():
+    with pytest.raises(ValueError):
+        Color.load("blue")
+    with pytest.raises(ValueError):
+        Color.load_by_name("BLUE")
+
+
+def test_load_unhashable_value():
+    assert Shape.load([4, 4]) is Shape.SQUARE
+    assert Shape.load(0) is Shape.POINT
+
+
+def test_to_dict_list_returns_copy():
+    items = Color.to_dict_list()
+    assert items == [{"label": "红色", "value": "red"}, {"label": "绿色", "value": "green"}]
+
+    items[0]["label"] = "changed"
+    items.append({"label": "蓝色", "value": "blue"})
+    assert Color.to_dict_list() == [
+        {"label": "红色", "value": "red"},
+        {"label": "绿色", "value": "green"},
+    ]
@@ -0,0 +1,59 @@
+import asyncio
+
+from llmops_api.base.redis.pool import MetricsConnectionPool
+
+CONNECT_TIME = 0.2
+
+
+class SlowConnection:
+    """建立连接耗时CONNECT_TIME的连接"""
+
+    def __init__(self, **kwargs):
+        self.connected = False
+
+    async def connect(self):
+        if not self.connected:
+            await asyncio.sleep(CONNECT_TIME)
+            self.connected = True
+
+    async def disconnect(self, *args, **kwargs):
+        self.connected = False
+
+    async def can_read_destructive(self):
+        return False
+
+    async def re_auth(self):
+        pass
+
+
+def test_wait_time_excludes_connect_time():
+    async def run():
+        pool = MetricsConnectionPool(connection_class=SlowConnection, max_connections=1, timeout=5)
+        connection = await pool.get_connection()
+
+        metrics = pool.metrics()
+        assert metrics.wait_count == 1
+        assert metrics.wait_time_max < CONNECT_TIME / 2
+
+        async def release_later():
+            await asyncio.sleep(0.1)
+            await pool.release(connection)
+
+        task = asyncio.create_task(release_later())
+        await pool.get_connection()
+        await task
+
+        metrics = pool.metrics()
+        assert metrics.wait_count == 2
+        assert 0.1 <= metrics.wait_time_max < 0.1 + CONNECT_TIME / 2
+
+    asyncio.run(run())
+
+
+def test_render_metrics_with_worker_label():
+    pool = MetricsConnectionPool(connection_class=SlowConnection, max_connections=4)
+    lines = pool.metrics().render({"worker": 123})
+
+    assert 'redis_pool_max_connections{worker="123"} 4' in lines
+    assert 'redis_pool_connections{worker="123",state="idle"} 0' in lines
+    assert 'redis_pool_wait_total{worker="123"} 0' in lines
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from loguru import logger
+from sqlalchemy import JSON, Integer, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from llmops_api.base.db.model import User
+from llmops_api.base.db.repo import copy_columns, copy_records_iter, copy_update_columns
+from llmops_api.repo.user import UserRepo
+
+# 指向可写的PostgreSQL测试库(postgresql+asyncpg://...)时运行COPY的集成测试
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class CopyTestBase(DeclarativeBase):
+    pass
+
+
+class CopyItem(CopyTestBase):
+    """默认值为函数的列，使用独立的registry，不影响项目模型的映射"""
+
+    __tablename__ = "t_copy_item"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+
+
+def test_copy_columns_fill_python_defaults():
+    columns, defaults = copy_columns(User, ["username", "password", "password_salt"], 7)
+
+    assert columns == ["username", "password", "password_salt", "create_by", "email", "phone"]
+    # 没有python端默认值的列交给数据库
+    assert "create_at" not in columns and "id" not in columns
+
+    rows = [
+        {"username": "a", "password": "p", "password_salt": "s"},
+        {"username": "b", "password": "p", "password_salt": "s", "email": None},
+    ]
+    assert list(copy_records_iter(rows, columns, defaults)) == [
+        ("a", "p", "s", 7, "", ""),
+        ("b", "p", "s", 7, None, ""),
+    ]
+
+
+def test_copy_columns_callable_default():
+    columns, defaults = copy_columns(CopyItem, [], None)
+    assert columns == ["payload"]
+
+    first, second = copy_records_iter([{}, {}], columns, defaults)
+    index = columns.index("payload")
+    assert first[index] == {} and first[index] is not second[index]
+
+
+def test_copy_update_columns_excludes_filled_defaults():
+    assert copy_update_columns(["username", "email", "create_by"], ["username"], None) == ["email"]
+    assert copy_update_columns(["username", "email"], ["username"], ["phone"]) == ["phone"]
+
+
+@pytest.mark.skipif(TEST_DATABASE_URL is None, reason="TEST_DATABASE_URL not set")
+def test_copy_records_rolls_back_with_session():
+    async def run():
+        engine = create_async_engine(str(TEST_DATABASE_URL))
+        async with engine.begin() as conn:
+            await conn.run_sync(User.__table__.create, checkfirst=True)
+
+        prefix = uuid.uuid4().hex[:8]
+        rows = [
+            {"username": f"{prefix}{i}", "password": "p", "password_salt": "s"} for i in range(100)
+        ]
+        repo = UserRepo(logger)  # type: ignore
+        try:
+            async with AsyncSession(engine) as session:
+                await session.begin()
+                assert await repo.copy_records(session, rows, columns=list(rows[0])) == 100
+                count_stmt = (
+                    select(func.count()).select_from(User).where(User.username.startswith(prefix))
+                )
+                assert await session.scalar(count_stmt) == 100
+                assert (
+                    await session.scalar(select(User.email).where(User.username == f"{prefix}0"))
+                    == ""
+                )
+                await session.rollback()
+
+            async with AsyncSession(engine) as session:
+                assert await session.scalar(count_stmt) == 0
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+import uuid
+from typing import List
+
+from sqlalchemy import type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.dialects.postgresql.psycopg import dialect as psycopg_dialect
+from sqlalchemy.sql._typing import _ColumnExpressionArgument
+
+from llmops_api.base.db.model import User
+from llmops_api.base.db.repo import Condition, QueryConfig, explain_stmt, parse_explain_rows
+
+TOKEN = uuid.uuid4()
+
+
+class UserFilter(Condition):
+    def to_condition(self) -> List[_ColumnExpressionArgument[bool]]:
+        return [
+            User.username == "o'hara",
+            type_coerce(User.email, JSONB).contains({"tags": ["a"]}),
+            type_coerce(User.phone, UUID) == TOKEN,
+        ]
+
+
+def test_explain_uses_bound_parameters():
+    stmt = explain_stmt(User, QueryConfig(condition=UserFilter()))
+
+    for dialect in (asyncpg_dialect(), psycopg_dialect()):
+        compiled = stmt.compile(dialect=dialect)
+        sql = str(compiled)
+
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT 1")
+        assert "o'hara" not in sql
+        assert str(TOKEN) not in sql
+        assert "o'hara" in compiled.params.values()
+        assert TOKEN in compiled.params.values()
+
+
+def test_parse_explain_rows():
+    plan = '[{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 1234}}]'
+    assert parse_explain_rows(plan) == 1234
+    assert parse_explain_rows([{"Plan": {"Plan Rows": 5}}]) == 5
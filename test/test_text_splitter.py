@@ -0,0 +1,62 @@
+import random
+import re
+from typing import List
+
+from llmops_api.llm.text_splitter.charater import (
+    STREAM_BUFFER_CHUNKS,
+    RecursiveCharacterTextSplitter,
+)
+
+WORDS = ["alpha", "beta", "gamma", "delta", "文本", "切分", "向量"]
+
+
+def paragraphs(count: int, seed: int = 1) -> List[str]:
+    rnd = random.Random(seed)
+    return [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 40))) for _ in range(count)]
+
+
+def test_stream_matches_split_text_within_one_buffer():
+    splitter = RecursiveCharacterTextSplitter(chunk_size=50, chunk_overlap=10)
+    texts = paragraphs(5)
+    text = "\n\n".join(texts)
+    assert len(text) < 50 * STREAM_BUFFER_CHUNKS
+
+    chunks = list(splitter.split_text_stream(texts))
+    assert [chunk for _, chunk in chunks] == splitter.split_text(text)
+
+
+def test_stream_chunks_located_in_full_text():
+    splitter = RecursiveCharacterTextSplitter(chunk_size=50, chunk_overlap=10)
+    texts = paragraphs(400)
+    text = "\n\n".join(texts)
+
+    chunks = list(splitter.split_text_stream(texts))
+    assert len(chunks) > 0
+    for index, chunk in chunks:
+        assert text[index : index + len(chunk)] == chunk
+        assert len(chunk) <= 50
+
+    # 不考虑重叠时，所有片段依次覆盖完整文本
+    no_overlap = RecursiveCharacterTextSplitter(chunk_size=50, chunk_overlap=0)
+    streamed = "".join(chunk for _, chunk in no_overlap.split_text_stream(texts))
+    assert re.sub(r"\s", "", streamed) == re.sub(r"\s", "", text)
+
+
+def test_stream_carry_bounded_without_separator():
+    # 分隔符中没有""，没有换行的长文本无法切分到chunk_size以内
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=20, chunk_overlap=0, separators=["\n\n", "\n"]
+    )
+    split_lengths: List[int] = []
+    split_text = splitter.split_text
+
+    def record_split_text(text: str) -> List[str]:
+        split_lengths.append(len(text))
+        return split_text(text)
+
+    splitter.split_text = record_split_text  # type: ignore
+    texts = ["x" * 10] * 2000
+    chunks = list(splitter.split_text_stream(texts, separator=" "))
+
+    assert max(split_lengths) < 2 * 20 * STREAM_BUFFER_CHUNKS
+    assert "".join(chunk for _, chunk in chunks).count("x") == 20000
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from llmops_api.base.cache.ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def test_item_expires(clock: Clock):
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_item_ttl_clamped_to_cache_ttl(clock: Clock):
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=10)
+    cache.set("long", 1, ttl=60)
+    cache.set("short", 2, ttl=5)
+
+    clock.now += 5
+    assert cache.get("short") is None
+    assert cache.get("long") == 1
+    clock.now += 5
+    assert cache.get("long") is None
+
+
+def test_non_positive_ttl_not_cached(clock: Clock):
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1, ttl=0)
+    cache.set("b", 2, ttl=-1)
+
+    assert len(cache) == 0
+
+
+def test_least_recently_used_evicted(clock: Clock):
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # 读取a之后b成为最久未使用的项
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_delete_and_clear(clock: Clock):
+    cache: TTLCache[str, int] = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_maxsize_must_be_positive():
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=0, ttl=10)
@@ -0,0 +1,64 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from llmops_api.base.upload.spool import UploadSpool
+from llmops_api.tasks import knowledge
+from llmops_api.tasks.knowledge import DocumentFile, DocumentFileSplitConfig, parse_document_file
+
+SPLIT_CONFIG = DocumentFileSplitConfig(chunk_size=500, chunk_overlap=50)
+
+
+def spool_file(path: Path, content: str, age: float = 0) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    if age > 0:
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_sweep_removes_expired_files(tmp_path: Path):
+    spool = UploadSpool(str(tmp_path), chunk_size=1024, ttl=60)
+    expired = spool_file(tmp_path / "1" / "expired.txt", "a", age=120)
+    partial = spool_file(tmp_path / "1" / "partial.txt.part", "a", age=120)
+    fresh = spool_file(tmp_path / "2" / "fresh.txt", "a")
+
+    assert spool.sweep() == 2
+    assert not expired.exists()
+    assert not partial.exists()
+    assert fresh.exists()
+
+
+def new_document_file(path: Path) -> DocumentFile:
+    return DocumentFile(
+        knowledge_id=1,
+        document_id=None,
+        filename=path.name,
+        path=str(path),
+        size=path.stat().st_size,
+    )
+
+
+def test_parse_removes_file_on_success(tmp_path: Path):
+    path = spool_file(tmp_path / "1" / "doc.txt", "第一段\n\n第二段")
+
+    result = parse_document_file(new_document_file(path), SPLIT_CONFIG)
+    assert result.error is None
+    assert result.chunks == 1
+    assert not path.exists()
+
+
+def test_parse_keeps_file_on_failure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = spool_file(tmp_path / "1" / "doc.txt", "第一段\n\n第二段")
+
+    def save_failed(*args):
+        raise RuntimeError("save failed")
+
+    monkeypatch.setattr(knowledge, "save_document_chunk", save_failed)
+    result = parse_document_file(new_document_file(path), SPLIT_CONFIG)
+    assert result.error == "save failed"
+    # 失败的文件留待排查，过期后由sweep清理
+    assert path.exists()
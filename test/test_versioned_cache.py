@@ -0,0 +1,71 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from loguru import logger
+
+from llmops_api.base.cache.versioned_cache import VersionedCache
+
+
+class MemoryRedis:
+    def __init__(self):
+        self.data: Dict[str, bytes] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str | bytes, ex: Optional[int] = None):
+        self.data[key] = value.encode("utf-8") if isinstance(value, str) else value
+
+    async def incr(self, key: str) -> int:
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode("utf-8")
+        return value
+
+
+def new_cache(redis: MemoryRedis) -> VersionedCache[str]:
+    @asynccontextmanager
+    async def client_factory():
+        yield redis
+
+    return VersionedCache(
+        redis_client_factory=client_factory,  # type: ignore
+        logger=logger,  # type: ignore
+        name="test",
+        dumps=lambda value: value,
+        loads=lambda payload: payload.decode("utf-8"),
+        maxsize=16,
+        ttl=60,
+    )
+
+
+def test_bump_version_changes_cache_key():
+    async def run():
+        redis = MemoryRedis()
+        cache = new_cache(redis)
+        assert await cache.fetch_version() == 0
+
+        await cache.set(f"1:{await cache.fetch_version()}", "old")
+        assert await cache.bump_version() == 1
+
+        version = await cache.fetch_version()
+        assert version == 1
+        assert await cache.get(f"1:{version}") is None
+        assert await cache.get("1:0") == "old"
+
+    asyncio.run(run())
+
+
+def test_version_shared_between_workers():
+    async def run():
+        redis = MemoryRedis()
+        worker_a, worker_b = new_cache(redis), new_cache(redis)
+
+        await worker_a.set("1:0", "tree")
+        # 其他worker未在进程内缓存时从redis读取
+        assert await worker_b.get("1:0") == "tree"
+
+        await worker_a.bump_version()
+        assert await worker_b.fetch_version() == 1
+
+    asyncio.run(run())